@@ -0,0 +1,126 @@
+'''
+Appearances
+Index of which of a team's games each player appeared in, built from
+Basketball Reference game logs, for counting the games any set of players
+played together.
+
+Each player's appearances for a team are kept as a bitset over the team's
+games (bit g - 1 set if the player appeared in the team's game g), so the
+games a pair or a whole group shared is the popcount of their bitsets ANDed
+together. Game logs only ever gain rows, so updating the index only reads the
+rows added since the last update.
+'''
+
+import itertools
+
+import pandas as pd
+
+# game log stats the index reads
+STAT_IDS = ['player_game_num_career', 'team_game_num_season', 'team_name_abbr']
+
+def popcount(bits):
+    '''
+    Count the set bits of a bitset.
+
+    Inputs:
+    bits (int): bitset
+
+    Returns: int
+    '''
+    return bin(bits).count('1')
+
+class AppearanceIndex:
+    '''
+    Bitsets of the games each player appeared in for each team.
+    '''
+    def __init__(self):
+        self.bitsets = {} # (player, team) -> int
+        self.n_rows = {} # player -> game log rows already indexed
+
+    def add_game_log(self, player, rows):
+        '''
+        Index the rows of a player's game log added since the last update. A
+        game log with fewer rows than already indexed (e.g. a new season under
+        the same player key) is indexed again from scratch.
+
+        Inputs:
+        player (hashable): key of the player, e.g. (player id, season)
+        rows (list of dicts): game log rows with the STAT_IDS stats as text,
+            oldest first
+
+        Returns: int, rows indexed
+        '''
+        n_indexed = self.n_rows.get(player, 0)
+        if len(rows) < n_indexed:
+            self.remove_player(player)
+            n_indexed = 0
+
+        for row in rows[n_indexed:]:
+            # rows for games a player missed have no career game number
+            game = row.get('team_game_num_season', '')
+            if not row.get('player_game_num_career') or not game.isdigit():
+                continue
+            key = (player, row.get('team_name_abbr'))
+            self.bitsets[key] = self.bitsets.get(key, 0) | 1 << (int(game) - 1)
+        self.n_rows[player] = len(rows)
+
+        return len(rows) - n_indexed
+
+    def remove_player(self, player):
+        '''
+        Forget every appearance of a player.
+
+        Inputs:
+        player (hashable): key of the player
+        '''
+        self.bitsets = {
+            key: bits for key, bits in self.bitsets.items() if key[0] != player
+        }
+        self.n_rows.pop(player, None)
+
+    def get_bitset(self, player, team):
+        '''
+        Get the games a player appeared in for a team.
+
+        Inputs:
+        player (hashable): key of the player
+        team (str): team abbreviation, e.g. GSW
+
+        Returns: int, bit g - 1 set for the team's game g
+        '''
+        return self.bitsets.get((player, team), 0)
+
+    def count_games(self, players, team):
+        '''
+        Count the team's games every one of a group of players appeared in.
+
+        Inputs:
+        players (iterable): keys of the players
+        team (str): team abbreviation
+
+        Returns: int
+        '''
+        bits = None
+        for player in players:
+            player_bits = self.get_bitset(player, team)
+            bits = player_bits if bits is None else bits & player_bits
+
+        return popcount(bits or 0)
+
+    def get_pair_matrix(self, players, team):
+        '''
+        Count the team's games each pair of players appeared in together, e.g.
+        for a whole roster.
+
+        Inputs:
+        players (list): keys of the players
+        team (str): team abbreviation
+
+        Returns: pd.DataFrame, players x players, games played on the diagonal
+        '''
+        bitsets = [self.get_bitset(player, team) for player in players]
+        counts = [[0] * len(players) for _ in players]
+        for i, j in itertools.combinations_with_replacement(range(len(players)), 2):
+            counts[i][j] = counts[j][i] = popcount(bitsets[i] & bitsets[j])
+
+        return pd.DataFrame(counts, index=players, columns=players)
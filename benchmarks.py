@@ -0,0 +1,1594 @@
+'''
+NBA Sheets benchmarks
+Offline timings for the NBA Sheets pipeline. Run with `python benchmarks.py`.
+'''
+
+import argparse
+import contextlib
+import functools
+import io
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import BaseAdapter
+
+import appearances
+import fake_gspread
+import fetch
+import history
+import leaderboard
+import metrics
+import nba_sheets
+import parsers
+import picks_store
+import projection
+import scoring
+import scrapes
+import sheets
+import standings_engine
+import standings_sources
+import tiebreakers
+
+SCRAPE_URLS = [
+    'https://www.foxsports.com/nba/standings',
+    'https://www.basketball-reference.com/players/c/curryst01/gamelog/2026',
+    'https://www.basketball-reference.com/players/c/curryse01/gamelog/2026',
+    'https://www.basketball-reference.com/players/e/edwaran01.html',
+    'https://www.basketball-reference.com/players/e/edwaran01.html',
+]
+
+# pool the fake Sheets API holds, so the benchmarks need no sheet_info.json
+FAKE_POOL = {
+    'name': None, 'sheet_id': 'fake-sheet',
+    'responses_ws_name': 'Form Responses 1',
+}
+
+# (url, case name, scraper, scraper arguments after the url, id and class of
+#  the table the scraper reads)
+PARSER_CASES = [
+    (
+        'https://www.foxsports.com/nba/standings',
+        'get_standings', standings_sources.get_standings, (), None,
+        'data-table'
+    ),
+    (
+        'https://www.foxsports.com/nba/standings',
+        'get_conference_standings', None, (), None, 'data-table'
+    ),
+    (
+        'https://www.basketball-reference.com/players/c/curryst01/gamelog/2026',
+        'parse_bbref_player_season_game_log',
+        nba_sheets.parse_bbref_player_season_game_log,
+        (['player_game_num_career', 'team_game_num_season', 'team_name_abbr'],),
+        'player_game_log_reg', None
+    ),
+    (
+        'https://www.basketball-reference.com/players/e/edwaran01.html',
+        'parse_bbref_player_pg', nba_sheets.parse_bbref_player_pg,
+        ('totals_stats.2026', 'fg3a', int), 'totals_stats', None
+    ),
+    (
+        'https://www.basketball-reference.com/friv/mvp.html',
+        'parse_bbref_mvp_tracker', nba_sheets.parse_bbref_mvp_tracker,
+        ('Nikola Jokic',), 'players', None
+    ),
+]
+
+class StubAdapter(BaseAdapter):
+    '''
+    Transport that answers every request with a canned page after a fixed
+    delay, standing in for a slow remote server. Pages carry an ETag and
+    conditional requests for an unchanged page get a 304.
+
+    Inputs:
+    pages (dict): page body by URL; other URLs get an empty page
+    delay (float): seconds to wait before answering
+    delays (dict): seconds to wait for particular URLs instead of delay
+    '''
+    def __init__(self, pages=None, delay=0.25, delays=None):
+        super().__init__()
+        self.pages = pages or {}
+        self.delay = delay
+        self.delays = delays or {}
+        self.n_requests = 0
+
+    def send(self, request, **kwargs):
+        self.n_requests += 1
+        time.sleep(self.delays.get(request.url, self.delay))
+
+        content = self.pages.get(request.url, b'<html></html>')
+        etag = f'"{hash(content)}"'
+
+        r = requests.Response()
+        r.url = request.url
+        r.request = request
+        r.headers['ETag'] = etag
+        if request.headers.get('If-None-Match') == etag:
+            r.status_code = 304
+            r._content = b''
+        else:
+            r.status_code = 200
+            # a file-like body, so streamed requests read it in chunks
+            r.raw = io.BytesIO(content)
+
+        return r
+
+    def close(self):
+        pass
+
+def benchmark_concurrent_fetch(delay=0.25):
+    '''
+    Compare one-at-a-time downloads of every scrape source (as the script used
+    to do them) with the concurrent, deduplicated fetch layer, against a
+    stubbed transport.
+
+    Inputs:
+    delay (float): seconds the stubbed server takes to answer each request
+
+    Returns: dict of wall times in seconds
+    '''
+    session = fetch.make_session(StubAdapter(delay=delay))
+
+    start = time.perf_counter()
+    for url in SCRAPE_URLS:
+        session.get(url).raise_for_status()
+    sequential = time.perf_counter() - start
+
+    fetch.set_session(session)
+    fetch.clear_memo()
+    page_cache_dir = fetch.PAGE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fetch.PAGE_CACHE_DIR = cache_dir
+        start = time.perf_counter()
+        futures = fetch.run_concurrently(
+            {i: (fetch.get_page, url) for i, url in enumerate(SCRAPE_URLS)}
+        )
+        for future in futures.values():
+            future.result()
+        concurrent = time.perf_counter() - start
+
+    fetch.PAGE_CACHE_DIR = page_cache_dir
+    fetch.set_session(None)
+    fetch.clear_memo()
+
+    return {'sequential': sequential, 'concurrent': concurrent}
+
+def benchmark_page_cache(delay=0.25):
+    '''
+    Time a cold run, a revalidating warm run, and a within-TTL warm run of every
+    scrape source against a stubbed transport whose pages never change.
+
+    Inputs:
+    delay (float): seconds the stubbed server takes to answer each request
+
+    Returns: dict of wall times in seconds and each run's cache counters
+    '''
+    adapter = StubAdapter(delay=delay)
+    fetch.set_session(fetch.make_session(adapter))
+
+    page_cache_dir = fetch.PAGE_CACHE_DIR
+    timings = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fetch.PAGE_CACHE_DIR = cache_dir
+        for run, ttl in [('cold', 0), ('revalidated', 0), ('fresh', 60)]:
+            fetch.clear_memo()
+            fetch.reset_cache_stats()
+            start = time.perf_counter()
+            for url in SCRAPE_URLS:
+                fetch.get_page(url, ttl=ttl)
+            timings[run] = time.perf_counter() - start
+            timings[f'{run}_stats'] = fetch.get_cache_stats()
+
+    fetch.PAGE_CACHE_DIR = page_cache_dir
+    fetch.set_session(None)
+    fetch.clear_memo()
+
+    return timings
+
+@contextlib.contextmanager
+def replaying(fixtures_dir=fetch.FIXTURES_DIR):
+    '''
+    Serve every page from a fixtures directory for the duration of a with
+    block, then restore the live session and page cache.
+
+    Inputs:
+    fixtures_dir (str): directory of pages saved with --record
+    '''
+    page_cache_dir = fetch.PAGE_CACHE_DIR
+    fetch.use_replay(fixtures_dir)
+    try:
+        yield
+    finally:
+        fetch.PAGE_CACHE_DIR = page_cache_dir
+        fetch.set_session(None)
+        fetch.clear_memo()
+
+@contextlib.contextmanager
+def parser_backend(backend):
+    '''
+    Make the scrapers use a given parser backend for the duration of a with
+    block.
+
+    Inputs:
+    backend (str): key of parsers.BACKENDS
+    '''
+    default_backend = parsers.PARSER_BACKEND
+    parsers.PARSER_BACKEND = backend
+    try:
+        yield
+    finally:
+        parsers.PARSER_BACKEND = default_backend
+
+def get_conference_standings_tables(url, table_class):
+    '''
+    Parse every conference standings table on a Fox Sports standings page.
+
+    Inputs:
+    url (str): web address of the standings page
+    table_class (str): class of the conference tables
+
+    Returns: list of pandas dataframes
+    '''
+    r = fetch.get_page(url)
+
+    return [
+        standings_sources.get_conference_standings(table)
+        for table in parsers.find_tables(r.content, table_class=table_class)
+    ]
+
+def count_table_rows(content, table_id, table_class):
+    '''
+    Count the data rows (rows with at least one td cell) of every table
+    matching an id and/or class, with the full html.parser tree.
+
+    Inputs:
+    content (bytes): page body
+    table_id (str): id attribute of the table
+    table_class (str): one of the table's classes
+
+    Returns: int
+    '''
+    tables = parsers.find_tables(content, table_id, table_class, 'html.parser')
+
+    return sum(
+        1 for table in tables for row in table.find_all('tr') if row.find('td')
+    )
+
+def load_parser_cases(fixtures_dir=fetch.FIXTURES_DIR):
+    '''
+    Build a runner for each parser case with a recorded page, skipping cases
+    without one.
+
+    Inputs:
+    fixtures_dir (str): directory of pages saved with --record
+
+    Returns: list of tuples of case name, runner (a function of no arguments
+        returning the scraper's result), and number of table rows parsed
+    '''
+    cases = []
+    for url, name, scraper, args, table_id, table_class in PARSER_CASES:
+        fp = fetch.get_fixture_path(url, fixtures_dir)
+        if not os.path.exists(fp):
+            continue
+        with open(fp, 'rb') as f:
+            n_rows = count_table_rows(f.read(), table_id, table_class)
+
+        if scraper is None:
+            runner = functools.partial(
+                get_conference_standings_tables, url, table_class
+            )
+        else:
+            runner = functools.partial(scraper, url, *args)
+        cases.append((name, runner, n_rows))
+
+    return cases
+
+def results_equal(a, b):
+    '''
+    Compare two scraper results, including dataframes and lists of them.
+
+    Returns: bool
+    '''
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(map(results_equal, a, b))
+    if isinstance(a, pd.DataFrame) or isinstance(b, pd.DataFrame):
+        return (
+            isinstance(a, pd.DataFrame) and isinstance(b, pd.DataFrame) and
+            a.equals(b)
+        )
+    return a == b
+
+def get_available_backends():
+    '''
+    List the parser backends whose dependencies are installed.
+
+    Returns: list of str
+    '''
+    return [
+        backend for backend in parsers.BACKENDS
+        if parsers.is_backend_available(backend)
+    ]
+
+def get_missing_fixtures(fixtures_dir=fetch.FIXTURES_DIR):
+    '''
+    List the pages the benchmarks replay that aren't saved in a fixtures
+    directory.
+
+    Inputs:
+    fixtures_dir (str): directory of pages saved with --record
+
+    Returns: list of str (URLs)
+    '''
+    return [
+        url for url in dict.fromkeys(SCRAPE_URLS)
+        if not os.path.exists(fetch.get_fixture_path(url, fixtures_dir))
+    ]
+
+def check_parser_parity(fixtures_dir=fetch.FIXTURES_DIR):
+    '''
+    Check that every available parser backend gives the same result as the
+    full html.parser tree for each recorded page.
+
+    Inputs:
+    fixtures_dir (str): directory of pages saved with --record
+
+    Returns: dict mapping (case name, backend) to whether results match
+    '''
+    parity = {}
+    with replaying(fixtures_dir):
+        for name, runner, _ in load_parser_cases(fixtures_dir):
+            with parser_backend('html.parser'):
+                expected = runner()
+            for backend in get_available_backends():
+                with parser_backend(backend):
+                    parity[(name, backend)] = results_equal(expected, runner())
+
+    return parity
+
+def benchmark_parsers(fixtures_dir=fetch.FIXTURES_DIR, n_iter=20):
+    '''
+    Time each parser case on its recorded page with every available parser
+    backend, and measure the peak memory of one run. Pages are read from disk
+    once, so timings cover parsing only.
+
+    Peak memory is what tracemalloc sees: Python objects, including the
+    BeautifulSoup tree, but not the C parsers' own buffers.
+
+    Inputs:
+    fixtures_dir (str): directory of pages saved with --record
+    n_iter (int): runs per case and backend
+
+    Returns: dict mapping (case name, backend) to dict of mean seconds per
+        run, table rows, rows per second, and peak KB allocated
+    '''
+    results = {}
+    with replaying(fixtures_dir):
+        for name, runner, n_rows in load_parser_cases(fixtures_dir):
+            for backend in get_available_backends():
+                with parser_backend(backend):
+                    runner() # read the page into the per-run memo
+
+                    start = time.perf_counter()
+                    for _ in range(n_iter):
+                        runner()
+                    seconds = (time.perf_counter() - start) / n_iter
+
+                    tracemalloc.start()
+                    runner()
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                results[(name, backend)] = {
+                    'seconds': seconds,
+                    'rows': n_rows,
+                    'rows_per_second': n_rows / seconds,
+                    'peak_kb': peak / 1024,
+                }
+
+    return results
+
+def make_fake_responses(n_entrants, seed=0):
+    '''
+    Generate form responses with random picks, in the layout of the real
+    responses worksheet.
+
+    Inputs:
+    n_entrants (int): number of responses
+    seed (int): random seed
+
+    Returns: list of lists, header row first
+    '''
+    rng = random.Random(seed)
+    teams = list(standings_sources.NAMES_MAP.values())
+    # NAMES_MAP lists the Western Conference first
+    conference_teams = {'Western': teams[:15], 'Eastern': teams[15:]}
+
+    header = list(nba_sheets.COLS_MAP)
+    rows = [header]
+    for i in range(n_entrants):
+        picks = {
+            conference: rng.sample(conference_teams[conference], 8)
+            for conference in conference_teams
+        }
+        row = []
+        for col in header:
+            field = nba_sheets.COLS_MAP[col]
+            conference, _, rank = field.partition('_')
+            if conference in picks:
+                row.append(picks[conference][int(rank) - 1])
+            elif field.startswith('Tiebreaker_'):
+                row.append(rng.randint(0, 400))
+            elif field == 'timestamp':
+                row.append(
+                    f'10/1/2025 {i // 3600 % 24}:{i // 60 % 60:02d}:{i % 60:02d}'
+                )
+            elif field == 'Email':
+                row.append(f'entrant{i}@example.com')
+            elif field == 'Name':
+                row.append(f'Entrant {i}')
+            elif field == 'Picks Source':
+                row.append('Media' if i % 10 == 0 else 'Bettor')
+            else:
+                row.append('')
+        rows.append(row)
+
+    return rows
+
+def make_fake_workbook_server(
+    n_entrants=100, latency=0.2, sheet_ids=None, sleep=False
+):
+    '''
+    Create a fake Sheets API holding the pool's spreadsheet, with only its
+    form responses filled in.
+
+    Inputs:
+    n_entrants (int): number of form responses
+    latency (float): simulated seconds per API call
+    sheet_ids (list of str): spreadsheets to create, each with its own
+        responses; by default, FAKE_POOL's
+    sleep (bool): if True, actually wait out the simulated latency
+
+    Returns: fake_gspread.FakeSheetsServer
+    '''
+    server = fake_gspread.FakeSheetsServer(latency=latency, sleep=sleep)
+    if sheet_ids is None:
+        sheet_ids = [FAKE_POOL['sheet_id']]
+    for i, sheet_id in enumerate(sheet_ids):
+        server.create_spreadsheet(sheet_id)
+        responses = make_fake_responses(n_entrants, seed=i)
+        server.add_sheet(sheet_id, {
+            'title': FAKE_POOL['responses_ws_name'],
+            'gridProperties': {
+                'rowCount': len(responses), 'columnCount': len(responses[0])
+            },
+        })
+        wb = fake_gspread.open_fake_workbook(server, sheet_id)
+        wb.worksheet(FAKE_POOL['responses_ws_name']).update(responses)
+
+    return server
+
+def benchmark_pipeline(
+    fixtures_dir=fetch.FIXTURES_DIR, n_entrants=100, latency=0.2, n_runs=2
+):
+    '''
+    Run the whole script end to end against saved pages and a fake workbook,
+    reporting Sheets API calls and payload bytes for each run. The first run
+    creates every tab and reads every response; later runs show the steady
+    state.
+
+    Inputs:
+    fixtures_dir (str): directory of saved pages
+    n_entrants (int): number of form responses in the fake workbook
+    latency (float): simulated seconds per Sheets API call
+    n_runs (int): number of consecutive runs
+
+    Returns: list of dicts of wall time, stage results, fake API stats, and
+        seconds per stage
+    '''
+    server = make_fake_workbook_server(n_entrants, latency)
+
+    picks_store_dir = picks_store.PICKS_STORE_DIR
+    history_dir = history.HISTORY_DIR
+    results = []
+    with replaying(fixtures_dir), tempfile.TemporaryDirectory() as store_dir:
+        picks_store.PICKS_STORE_DIR = os.path.join(store_dir, 'picks')
+        history.HISTORY_DIR = os.path.join(store_dir, 'history')
+        for _ in range(n_runs):
+            fetch.clear_memo()
+            server.reset_stats()
+            wb = fake_gspread.open_fake_workbook(server, FAKE_POOL['sheet_id'])
+            start = time.perf_counter()
+            # the script prints its progress; keep it out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    nba_sheets.update_pools([FAKE_POOL], {None: wb})
+                    is_ok = True
+                except AssertionError:
+                    is_ok = False
+            results.append({
+                'seconds': time.perf_counter() - start,
+                'ok': is_ok,
+                **server.stats,
+                'stage_seconds': {
+                    metric['labels']['stage']: round(metric['value'], 3)
+                    for metric in metrics.get_metrics()
+                    if metric['name'] == metrics.PREFIX + 'stage_seconds'
+                },
+            })
+    picks_store.PICKS_STORE_DIR = picks_store_dir
+    history.HISTORY_DIR = history_dir
+
+    return results
+
+def benchmark_pools(
+    fixtures_dir=fetch.FIXTURES_DIR, pool_counts=(1, 2, 4), n_entrants=100,
+    latency=0.05
+):
+    '''
+    Update growing numbers of pools in one run against saved pages and a fake
+    Sheets API that really waits out its latency, to show each extra pool only
+    adds its own Sheets I/O: the pages are downloaded and parsed once.
+
+    Inputs:
+    fixtures_dir (str): directory of saved pages
+    pool_counts (iterable of int): numbers of pools to run
+    n_entrants (int): number of form responses in each pool
+    latency (float): seconds per Sheets API call
+
+    Returns: list of dicts of pools, wall seconds, pages downloaded, whether
+        every pool updated, and Sheets API calls
+    '''
+    picks_store_dir = picks_store.PICKS_STORE_DIR
+    history_dir = history.HISTORY_DIR
+    results = []
+    with replaying(fixtures_dir), tempfile.TemporaryDirectory() as store_dir:
+        picks_store.PICKS_STORE_DIR = os.path.join(store_dir, 'picks')
+        history.HISTORY_DIR = os.path.join(store_dir, 'history')
+        for n_pools in pool_counts:
+            pools = [
+                {
+                    'name': f'pool{i}', 'sheet_id': f'pool{i}-{n_pools}',
+                    'responses_ws_name': FAKE_POOL['responses_ws_name'],
+                }
+                for i in range(n_pools)
+            ]
+            server = make_fake_workbook_server(
+                n_entrants, latency, [pool['sheet_id'] for pool in pools],
+                sleep=True
+            )
+            server.reset_stats()
+            workbooks = {
+                pool['name']: fake_gspread.open_fake_workbook(server, pool['sheet_id'])
+                for pool in pools
+            }
+            fetch.clear_memo()
+            fetch.reset_cache_stats()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    nba_sheets.update_pools(pools, workbooks, n_simulations=0)
+                    is_ok = True
+                except AssertionError:
+                    is_ok = False
+            results.append({
+                'pools': n_pools,
+                'seconds': time.perf_counter() - start,
+                'downloads': fetch.get_cache_stats()['misses'],
+                'ok': is_ok,
+                'calls': server.stats['calls'],
+            })
+    picks_store.PICKS_STORE_DIR = picks_store_dir
+    history.HISTORY_DIR = history_dir
+
+    return results
+
+def benchmark_retries(
+    fixtures_dir=fetch.FIXTURES_DIR, errors=(429, 503, 429), n_entrants=100,
+    quota_per_minute=30
+):
+    '''
+    Run the whole script against saved pages and a fake Sheets API that fails
+    its first calls with quota and server errors, then again against one whose
+    per-minute quota is used up for the first moments of the run, with a tight
+    request budget, to check a run rides out both instead of failing its
+    stages.
+
+    Inputs:
+    fixtures_dir (str): directory of saved pages
+    errors (iterable of int): status codes the first calls fail with
+    n_entrants (int): number of form responses in the fake workbook
+    quota_per_minute (int): the second fake API's quota
+
+    Returns: list of dicts of scenario, wall seconds, whether the run
+        succeeded, Sheets API calls, retries, and seconds spent throttled
+    '''
+    picks_store_dir = picks_store.PICKS_STORE_DIR
+    history_dir = history.HISTORY_DIR
+    budget = (
+        sheets.API_REQUESTS_PER_MINUTE, sheets.API_BURST,
+        sheets.API_BACKOFF_SECONDS
+    )
+    results = []
+    with replaying(fixtures_dir), tempfile.TemporaryDirectory() as store_dir:
+        picks_store.PICKS_STORE_DIR = os.path.join(store_dir, 'picks')
+        history.HISTORY_DIR = os.path.join(store_dir, 'history')
+        sheets.API_BACKOFF_SECONDS = 0.1
+        for scenario in ['errors', 'quota']:
+            server = make_fake_workbook_server(n_entrants, 0)
+            wb = fake_gspread.open_fake_workbook(server, FAKE_POOL['sheet_id'])
+            if scenario == 'errors':
+                server.inject_errors(*errors)
+            else:
+                # an earlier run used up the quota, which frees up shortly
+                server.quota_per_minute = quota_per_minute
+                server.call_times.extend(
+                    [time.monotonic() - 59.8] * quota_per_minute
+                )
+                sheets.API_REQUESTS_PER_MINUTE = 120
+                sheets.API_BURST = 2
+            server.reset_stats()
+            fetch.clear_memo()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    nba_sheets.update_pools([FAKE_POOL], {None: wb}, n_simulations=0)
+                    is_ok = True
+                except AssertionError:
+                    is_ok = False
+            counters = {}
+            for metric in metrics.get_metrics():
+                counters[metric['name']] = (
+                    counters.get(metric['name'], 0) + metric['value']
+                )
+            results.append({
+                'scenario': scenario,
+                'seconds': time.perf_counter() - start,
+                'ok': is_ok,
+                'calls': server.stats['calls'],
+                'retries': counters.get(
+                    metrics.PREFIX + 'sheets_api_retries_total', 0
+                ),
+                'throttled_seconds': counters.get(
+                    metrics.PREFIX + 'sheets_api_throttle_seconds_total', 0
+                ),
+            })
+    picks_store.PICKS_STORE_DIR = picks_store_dir
+    history.HISTORY_DIR = history_dir
+    (
+        sheets.API_REQUESTS_PER_MINUTE, sheets.API_BURST,
+        sheets.API_BACKOFF_SECONDS
+    ) = budget
+
+    return results
+
+def make_fake_standings_picks(n_bettors, seed=0):
+    '''
+    Generate standings and standings picks in the layout parse_picks_ws(...)
+    returns, with every bettor picking 8 random teams per conference.
+
+    Inputs:
+    n_bettors (int): number of bettors
+    seed (int): random seed
+
+    Returns: tuple of pd.DataFrame (standings) and pd.DataFrame (picks)
+    '''
+    rng = np.random.default_rng(seed)
+    teams = list(standings_sources.NAMES_MAP.values())
+    # NAMES_MAP lists the Western Conference first
+    conference_teams = {'Western': teams[:15], 'Eastern': teams[15:]}
+
+    standings_df = pd.DataFrame([
+        {'Conference': conference, 'Rank': rank, 'Team': team}
+        for conference, teams in conference_teams.items()
+        for rank, team in enumerate(teams, 1)
+    ])
+
+    emails = np.array([f'entrant{i}@example.com' for i in range(n_bettors)])
+    names = np.array([f'Entrant {i}' for i in range(n_bettors)])
+    picks_dfs = []
+    for conference, teams in conference_teams.items():
+        picked = rng.random((n_bettors, len(teams))).argsort(axis=1)[:, :8]
+        picks_dfs.append(pd.DataFrame({
+            'Email': np.repeat(emails, 8),
+            'Name': np.repeat(names, 8),
+            'Picks Source': 'Bettor',
+            'Team': np.array(teams)[picked.ravel()],
+            'Conference': conference,
+            'Picks Rank': np.tile(np.arange(1, 9), n_bettors),
+        }))
+
+    return standings_df, pd.concat(picks_dfs, ignore_index=True)
+
+def make_fake_tiebreaker_picks(standings_picks_df, seed=0):
+    '''
+    Generate tiebreaker picks in the layout parse_picks_ws(...) returns, one
+    random pick per tiebreaker for every entrant with standings picks.
+
+    Inputs:
+    standings_picks_df (pd.DataFrame): from make_fake_standings_picks(...)
+    seed (int): random seed
+
+    Returns: pd.DataFrame
+    '''
+    rng = np.random.default_rng(seed)
+    entrants_df = standings_picks_df[nba_sheets.RESPONSE_ID_COLS].drop_duplicates()
+
+    return pd.concat([
+        entrants_df.assign(**{
+            'Pick Value': rng.integers(0, 100, len(entrants_df)).astype(str),
+            'Tiebreaker #': str(n),
+        })
+        for n in [1, 2]
+    ], ignore_index=True)
+
+def summarize_standings_picks_cross_join(standings_df, standings_picks_df):
+    '''
+    The teams x bettors cross join summarize_standings_picks(...) used before
+    it counted ranks in a matrix, kept to check and time the new version.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings
+    standings_picks_df (pd.DataFrame): standings picks
+
+    Returns: pd.DataFrame
+    '''
+    standings_picks_df = standings_picks_df.loc[
+        standings_picks_df['Picks Source'] == "Bettor", :
+    ]
+
+    standings_df = standings_df.loc[:, ['Conference', 'Team']].drop_duplicates()
+    standings_df['__key__'] = 1
+    bettors_df = standings_picks_df.loc[:, ['Email']].drop_duplicates()
+    bettors_df['__key__'] = 1
+
+    scaffold_df = (
+        standings_df
+        .merge(bettors_df, on='__key__', how='inner')
+        .drop('__key__', axis=1)
+        .merge(
+            standings_picks_df, on=['Conference', 'Team', 'Email'], how='left'
+        )
+        .loc[:, ['Conference', 'Team', 'Picks Rank']]
+    )
+    scaffold_df['Picks Rank'] = scaffold_df['Picks Rank'].fillna(9)
+
+    summary_df = (
+        scaffold_df
+        .groupby(['Conference', 'Team'])
+        ['Picks Rank']
+        .agg([
+            'min',
+            'max',
+            'median',
+            lambda x: pd.Series.mode(x).min(),
+            lambda x: (x != 9).sum() / x.count()]
+        )
+        .reset_index()
+    )
+    summary_df.columns = [
+        'Conference',
+        'Team',
+        'Highest Rank',
+        'Lowest Rank',
+        'Median Rank',
+        'Most Common Rank',
+        '# Ranked'
+    ]
+
+    for col in ["Highest Rank", "Lowest Rank", "Median Rank", "Most Common Rank"]:
+        not_ranked_mask = summary_df[col] > 8
+        summary_df[col] = summary_df[col].mask(not_ranked_mask, '')
+
+    return summary_df
+
+def time_and_trace(fxn, *args):
+    '''
+    Run a function once, timing it and tracing its peak memory.
+
+    Inputs:
+    fxn (function): function to run
+    args: arguments to pass to fxn
+
+    Returns: tuple of the result, seconds, and peak KB allocated
+    '''
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fxn(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, seconds, peak / 1024
+
+def benchmark_streaming(fixtures_dir=fetch.FIXTURES_DIR, padding_kb=400):
+    '''
+    Compare the existing Basketball Reference scrapers, which download a
+    whole page and parse it, with streaming each table and stopping at its
+    end. Every saved page is padded with padding_kb of other tables after its
+    own, as on the real (multi-hundred-KB) pages.
+
+    Inputs:
+    fixtures_dir (str): directory of saved pages
+    padding_kb (int): KB of HTML added after each page's table
+
+    Returns: list of dicts of case, seconds, peak KB and KB downloaded for
+        each way, and whether they found the same values
+    '''
+    game_log_stat_ids = [
+        'player_game_num_career', 'team_game_num_season', 'team_name_abbr'
+    ]
+    filler = (
+        '<table id="padding"><tbody>' +
+        '<tr><td data-stat="x">0</td></tr>' * (padding_kb * 1024 // 32) +
+        '</tbody></table>'
+    ).encode('utf-8')
+    pages = {}
+    for url in set(SCRAPE_URLS):
+        with open(fetch.get_fixture_path(url, fixtures_dir), 'rb') as f:
+            content = f.read()
+        pages[url] = content.replace(b'</body>', filler + b'</body>', 1)
+
+    cases = [
+        (
+            'https://www.basketball-reference.com/players/c/curryst01/gamelog/2026',
+            'parse_bbref_player_season_game_log', 'player_game_log_reg',
+            (game_log_stat_ids,), game_log_stat_ids
+        ),
+        (
+            'https://www.basketball-reference.com/players/e/edwaran01.html',
+            'parse_bbref_player_pg', 'totals_stats',
+            ('totals_stats.2026', 'fg3a', int), ['fg3a']
+        ),
+    ]
+
+    page_cache_dir = fetch.PAGE_CACHE_DIR
+    fetch.PAGE_CACHE_DIR = None
+    fetch.set_session(fetch.make_session(StubAdapter(pages, delay=0)))
+    results = []
+    for url, scraper, table_id, args, stat_ids in cases:
+        fetch.clear_memo()
+        fetch.reset_cache_stats()
+        expected, seconds, peak_kb = time_and_trace(
+            getattr(nba_sheets, scraper), url, *args
+        )
+        full_kb = fetch.get_cache_stats()['bytes_downloaded'] / 1024
+
+        fetch.clear_memo()
+        fetch.reset_cache_stats()
+        rows, stream_seconds, stream_peak_kb = time_and_trace(
+            tiebreakers.stream_bbref_table, url, table_id, stat_ids
+        )
+        stream_kb = fetch.get_cache_stats()['bytes_downloaded'] / 1024
+
+        if scraper == 'parse_bbref_player_pg':
+            streamed = [int(row['fg3a']) for row in rows if row['row_id'] == args[0]]
+            matches = streamed == [expected]
+        else:
+            streamed = [
+                {k: v for k, v in row.items() if k != 'row_id'} for row in rows
+            ]
+            matches = streamed == expected
+        results.append({
+            'case': scraper,
+            'seconds': seconds,
+            'peak_kb': peak_kb,
+            'downloaded_kb': full_kb,
+            'stream_seconds': stream_seconds,
+            'stream_peak_kb': stream_peak_kb,
+            'stream_downloaded_kb': stream_kb,
+            'matches': matches,
+        })
+    fetch.set_session(fetch.make_session())
+    fetch.PAGE_CACHE_DIR = page_cache_dir
+
+    return results
+
+def make_fake_bbref_standings_page(standings_df):
+    '''
+    Render standings as a Basketball Reference season standings page, with
+    the two conference tables standings_sources.get_bbref_standings(...)
+    reads.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings
+
+    Returns: bytes
+    '''
+    names = {name: bbref_name for bbref_name, name in
+             standings_sources.BBREF_NAMES_MAP.items()}
+    tables = []
+    for conference, conference_df in standings_df.groupby('Conference'):
+        rows = []
+        for row in conference_df.sort_values('Rank').to_dict('records'):
+            wins, losses = row['W-L'].split('-')
+            team = names.get(row['Team'], row['Team'])
+            rows.append(
+                '<tr class="full_table">' +
+                f'<th data-stat="team_name"><a href="#">{team}</a>*</th>' +
+                f'<td data-stat="wins">{wins}</td>' +
+                f'<td data-stat="losses">{losses}</td>' +
+                f'<td data-stat="win_loss_pct">{row["PCT"]:.3f}</td>' +
+                f'<td data-stat="gb">{row["GB"] or "&mdash;"}</td>' +
+                '</tr>'
+            )
+        tables.append(
+            f'<table id="confs_standings_{conference[0]}"><thead><tr>' +
+            '<th>Team</th><th>W</th><th>L</th><th>W/L%</th><th>GB</th>' +
+            f'</tr></thead><tbody>{"".join(rows)}</tbody></table>'
+        )
+
+    return f'<html><body>{"".join(tables)}</body></html>'.encode('utf-8')
+
+def benchmark_hedged_standings(
+    fixtures_dir=fetch.FIXTURES_DIR, delay=0.05, slow_delay=2,
+    hedge_seconds=0.5
+):
+    '''
+    Time getting the standings from Fox Sports alone and from the hedged
+    sources when Fox Sports is healthy, slow, or has changed its markup,
+    against stand-in servers for both sites.
+
+    Inputs:
+    fixtures_dir (str): directory of saved pages, with the Fox Sports
+        standings
+    delay (float): seconds a healthy server takes to answer
+    slow_delay (float): seconds the slow Fox Sports takes to answer
+    hedge_seconds (float): seconds to wait before asking the backup
+
+    Returns: list of dicts of scenario, whether the fetch was hedged, seconds,
+        and whether valid standings came back
+    '''
+    fox_url = scrapes.STANDINGS_FS_URL
+    bbref_url = scrapes.STANDINGS_BBREF_URL
+    with open(fetch.get_fixture_path(fox_url, fixtures_dir), 'rb') as f:
+        fox_page = f.read()
+    with replaying(fixtures_dir):
+        bbref_page = make_fake_bbref_standings_page(
+            standings_sources.get_standings(fox_url)
+        )
+    sources = [
+        standings_sources.FoxSportsSource(fox_url),
+        standings_sources.BBRefSource(bbref_url),
+    ]
+
+    page_cache_dir = fetch.PAGE_CACHE_DIR
+    fetch.PAGE_CACHE_DIR = None
+    results = []
+    for scenario, fox_delay, fox_content in [
+        ('healthy', delay, fox_page),
+        ('slow', slow_delay, fox_page),
+        ('changed markup', delay, b'<html></html>'),
+    ]:
+        adapter = StubAdapter(
+            {fox_url: fox_content, bbref_url: bbref_page}, delay,
+            {fox_url: fox_delay}
+        )
+        fetch.set_session(fetch.make_session(adapter))
+        for is_hedged in [False, True]:
+            fetch.clear_memo()
+            start = time.perf_counter()
+            # the script prints source errors; keep them out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    standings_df = standings_sources.get_hedged_standings(
+                        sources if is_hedged else sources[:1], hedge_seconds
+                    )
+                    is_ok = standings_sources.validate_standings(standings_df) is None
+                except ValueError:
+                    is_ok = False
+            results.append({
+                'scenario': scenario,
+                'hedged': is_hedged,
+                'seconds': time.perf_counter() - start,
+                'ok': is_ok,
+            })
+            # wait out any source still answering before the next run
+            fetch.get_page(fox_url)
+
+    fetch.set_session(None)
+    fetch.clear_memo()
+    fetch.PAGE_CACHE_DIR = page_cache_dir
+
+    return results
+
+def make_fake_results(n_games, seed=0):
+    '''
+    Generate game results in the layout standings_engine reads, between
+    random pairs of teams.
+
+    Inputs:
+    n_games (int): number of games
+    seed (int): random seed
+
+    Returns: list of dicts
+    '''
+    rng = np.random.default_rng(seed)
+    teams = list(standings_engine.TEAMS)
+    results = []
+    for i in range(n_games):
+        home, away = rng.choice(len(teams), 2, replace=False)
+        home_points = int(rng.integers(90, 131))
+        results.append({
+            'Date': f'game{i}',
+            'Home': teams[home],
+            'Away': teams[away],
+            'Home Points': home_points,
+            # no ties in basketball
+            'Away Points': home_points + int(rng.choice([-1, 1]) * rng.integers(1, 20)),
+        })
+
+    return results
+
+def benchmark_standings_engine(n_games=1230, n_new_games=8, seed=0):
+    '''
+    Time working out the standings from a season's results file, then reading
+    one night's new games appended to it, and check the standings come out in
+    the layout get_standings(...) scrapes.
+
+    Inputs:
+    n_games (int): games already in the results file
+    n_new_games (int): games appended afterwards
+    seed (int): random seed
+
+    Returns: dict of seconds for the first read, the new games, and ranking,
+        and whether the columns match the scraped standings
+    '''
+    results = make_fake_results(n_games + n_new_games, seed)
+    engine = standings_engine.StandingsEngine()
+    with tempfile.TemporaryDirectory() as results_dir:
+        fp = os.path.join(results_dir, 'results.csv')
+        pd.DataFrame(results[:n_games]).to_csv(fp, index=False)
+        start = time.perf_counter()
+        engine.read_results(fp)
+        first_seconds = time.perf_counter() - start
+
+        pd.DataFrame(results[n_games:]).to_csv(
+            fp, mode='a', header=False, index=False
+        )
+        start = time.perf_counter()
+        n_added = engine.read_results(fp)
+        new_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    standings_df = engine.get_standings()
+    rank_seconds = time.perf_counter() - start
+
+    return {
+        'games': n_games,
+        'first_seconds': first_seconds,
+        'new_games': n_added,
+        'new_seconds': new_seconds,
+        'rank_seconds': rank_seconds,
+        'columns_match': list(standings_df.columns) == [
+            'Conference', 'Rank', 'Team', 'W-L', 'PCT', 'GB', 'Playoff Points'
+        ],
+    }
+
+def benchmark_picks_summary(bettor_counts=(1000, 10000, 100000), seed=0):
+    '''
+    Compare the count-matrix standings picks summary with the cross join it
+    replaced on pools of increasing size.
+
+    Inputs:
+    bettor_counts (iterable of int): pool sizes to run
+    seed (int): random seed
+
+    Returns: list of dicts of pool size, seconds and peak KB for each version,
+        and whether their summaries match
+    '''
+    results = []
+    for n_bettors in bettor_counts:
+        standings_df, picks_df = make_fake_standings_picks(n_bettors, seed)
+        expected, cross_join_seconds, cross_join_peak_kb = time_and_trace(
+            summarize_standings_picks_cross_join, standings_df, picks_df
+        )
+        summary, seconds, peak_kb = time_and_trace(
+            nba_sheets.summarize_standings_picks, standings_df, picks_df
+        )
+        results.append({
+            'bettors': n_bettors,
+            'cross_join_seconds': cross_join_seconds,
+            'cross_join_peak_kb': cross_join_peak_kb,
+            'seconds': seconds,
+            'peak_kb': peak_kb,
+            'matches': expected.astype(object).equals(summary.astype(object)),
+        })
+
+    return results
+
+def benchmark_leaderboard(n_bettors=20000, seed=0):
+    '''
+    Compare rescoring a whole pool with the leaderboard index's incremental
+    update when two teams swap places, and time a what-if query, checking the
+    index's leaderboard matches a full rescore.
+
+    Inputs:
+    n_bettors (int): number of bettors
+    seed (int): random seed
+
+    Returns: dict of seconds for a full rescore, building the index, the
+        incremental update, and a what-if query, entrants rescored, and whether
+        the leaderboards match
+    '''
+    standings_df, picks_df = make_fake_standings_picks(n_bettors, seed)
+    standings_df['Playoff Points'] = np.tile(
+        standings_engine.PLAYOFF_POINTS, 2
+    )
+    tiebreaker_picks_df = make_fake_tiebreaker_picks(picks_df, seed)
+    scored_tiebreaker_picks_df = scoring.score_tiebreaker_picks(
+        tiebreaker_picks_df, {1: 50, 2: 300}
+    )
+
+    index = leaderboard.LeaderboardIndex()
+    start = time.perf_counter()
+    index.set_picks(picks_df)
+    index.set_standings(standings_df)
+    index.set_tiebreakers(scored_tiebreaker_picks_df)
+    build_seconds = time.perf_counter() - start
+
+    # the 5 and 6 seeds in the West swap places
+    new_standings_df = standings_df.copy()
+    new_standings_df.iloc[[4, 5], new_standings_df.columns.get_loc('Team')] = (
+        new_standings_df['Team'].iloc[[5, 4]].to_numpy()
+    )
+    start = time.perf_counter()
+    n_rescored = index.set_standings(new_standings_df)
+    update_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = scoring.make_leaderboard(
+        scoring.score_standings_picks(new_standings_df, picks_df),
+        scored_tiebreaker_picks_df
+    )
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.what_if(new_standings_df['Team'].iloc[-1], 1, top=10)
+    what_if_seconds = time.perf_counter() - start
+
+    return {
+        'bettors': n_bettors,
+        'full_seconds': full_seconds,
+        'build_seconds': build_seconds,
+        'update_seconds': update_seconds,
+        'what_if_seconds': what_if_seconds,
+        'rescored': n_rescored,
+        'matches': index.get_leaderboard().equals(expected),
+    }
+
+def benchmark_formula_modes(bettor_counts=(100, 1000, 10000), seed=0):
+    '''
+    Compare writing the picks tabs with a formula per row against one
+    ARRAYFORMULA per column: the time to build the tabs' values and the bytes
+    sent to a fake workbook to create them.
+
+    Inputs:
+    bettor_counts (iterable of int): pool sizes to run
+    seed (int): random seed
+
+    Returns: list of dicts of pool size, mode, seconds, cells, and request
+        bytes
+    '''
+    results = []
+    for n_bettors in bettor_counts:
+        _, picks_df = make_fake_standings_picks(n_bettors, seed)
+        tiebreaker_picks_df = make_fake_tiebreaker_picks(picks_df, seed)
+        for mode, array_formulas in [('per row', False), ('array', True)]:
+            server = fake_gspread.FakeSheetsServer()
+            server.create_spreadsheet(FAKE_POOL['sheet_id'])
+            wb_session = sheets.WorkbookSession(
+                fake_gspread.open_fake_workbook(server, FAKE_POOL['sheet_id'])
+            )
+            wb_session.load()
+
+            start = time.perf_counter()
+            nba_sheets.write_standings_picks(
+                wb_session, 'Standings Picks', picks_df, 'Standings',
+                array_formulas=array_formulas
+            )
+            nba_sheets.write_tiebreakers_picks(
+                wb_session, 'Tiebreaker Picks', tiebreaker_picks_df,
+                'Tiebreakers', array_formulas=array_formulas
+            )
+            seconds = time.perf_counter() - start
+            n_cells = sum(wb_session.get_pending_cells().values())
+
+            server.reset_stats()
+            wb_session.commit()
+            results.append({
+                'bettors': n_bettors,
+                'mode': mode,
+                'seconds': seconds,
+                'cells': n_cells,
+                'request_bytes': server.stats['request_bytes'],
+            })
+
+    return results
+
+def make_fake_game_logs(n_players, n_games=82, seed=0):
+    '''
+    Generate game logs in the layout tiebreakers.parse_bbref_table(...)
+    returns for a roster whose players each miss a random fifth of the
+    team's games.
+
+    Inputs:
+    n_players (int): roster size
+    n_games (int): team games played so far
+    seed (int): random seed
+
+    Returns: dict of list of dicts (game log rows) by player id
+    '''
+    rng = np.random.default_rng(seed)
+    game_logs = {}
+    for i in range(n_players):
+        played = rng.random(n_games) > 0.2
+        game_logs[f'player{i}'] = [
+            {
+                'player_game_num_career': str(game) if played[game - 1] else '',
+                'team_game_num_season': str(game),
+                'team_name_abbr': 'GSW',
+            }
+            for game in range(1, n_games + 1)
+        ]
+
+    return game_logs
+
+def count_games_together_merge(game_logs, players):
+    '''
+    Count the games two players both played in the way the script did before
+    the appearances index: filter each game log as a dataframe, then merge
+    them on the team's game number.
+
+    Inputs:
+    game_logs (dict): from make_fake_game_logs(...)
+    players (tuple of str): the two player ids
+
+    Returns: int
+    '''
+    dfs = []
+    for player in players:
+        game_log = pd.DataFrame(game_logs[player])
+        dfs.append(game_log[
+            (game_log.player_game_num_career != '') &
+            (game_log.team_name_abbr == 'GSW')
+        ])
+
+    return len(dfs[0].merge(dfs[1], on='team_game_num_season', how='inner'))
+
+def benchmark_appearances(n_players=15, n_games=82, seed=0):
+    '''
+    Time a whole roster's games-together matrix by merging every pair's game
+    logs, against building the appearances index and popcounting its
+    bitsets, and time adding one new game to the index.
+
+    Inputs:
+    n_players (int): roster size
+    n_games (int): team games played so far
+    seed (int): random seed
+
+    Returns: dict of seconds for each way, seconds to add a game, and whether
+        the counts match
+    '''
+    game_logs = make_fake_game_logs(n_players, n_games, seed)
+    players = list(game_logs)
+
+    start = time.perf_counter()
+    merge_counts = {
+        (a, b): count_games_together_merge(game_logs, (a, b))
+        for a, b in itertools.combinations(players, 2)
+    }
+    merge_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = appearances.AppearanceIndex()
+    for player, rows in game_logs.items():
+        index.add_game_log(player, rows[:-1])
+    matrix = index.get_pair_matrix(players, 'GSW')
+    index_seconds = time.perf_counter() - start
+
+    # the latest game arrives
+    start = time.perf_counter()
+    for player, rows in game_logs.items():
+        index.add_game_log(player, rows)
+    matrix = index.get_pair_matrix(players, 'GSW')
+    update_seconds = time.perf_counter() - start
+
+    return {
+        'players': n_players,
+        'merge_seconds': merge_seconds,
+        'index_seconds': index_seconds,
+        'update_seconds': update_seconds,
+        'matches': all(
+            matrix.loc[a, b] == count for (a, b), count in merge_counts.items()
+        ),
+    }
+
+def benchmark_projection(
+    n_bettors=1000, n_sims=projection.N_SIMULATIONS, worker_counts=(1, None),
+    seed=0
+):
+    '''
+    Time the Monte Carlo projection on a fake pool midway through a season,
+    and check it gives the same projection however many workers run it.
+
+    Inputs:
+    n_bettors (int): number of bettors
+    n_sims (int): number of simulated seasons
+    worker_counts (iterable of int): worker processes to run with; None for
+        projection.MAX_WORKERS
+    seed (int): random seed
+
+    Returns: list of dicts of workers, seconds, simulations per second, and
+        whether the projection matches the first run's
+    '''
+    standings_df, picks_df = make_fake_standings_picks(n_bettors, seed)
+    rng = np.random.default_rng(seed)
+    wins = rng.integers(10, 32, len(standings_df))
+    standings_df['W-L'] = [f'{w}-{41 - w}' for w in wins]
+    standings_df['Playoff Points'] = np.where(standings_df['Rank'] <= 6, 2, 0)
+    picks_df['Name'] = picks_df['Email'].str.split('@').str[0]
+
+    results = []
+    expected = None
+    for max_workers in worker_counts:
+        max_workers = max_workers or projection.MAX_WORKERS
+        start = time.perf_counter()
+        seeds_df, entrants_df = projection.project(
+            standings_df, picks_df, n_sims, seed=seed, max_workers=max_workers
+        )
+        seconds = time.perf_counter() - start
+        if expected is None:
+            expected = (seeds_df, entrants_df)
+        results.append({
+            'workers': max_workers,
+            'seconds': seconds,
+            'simulations_per_second': n_sims / seconds,
+            'matches': (
+                seeds_df.equals(expected[0]) and entrants_df.equals(expected[1])
+            ),
+        })
+
+    return results
+
+def benchmark_import_times(n_runs=5):
+    '''
+    Time each CLI command's imports in a fresh interpreter, against importing
+    everything up front as nba_sheets.py used to (the all command's imports).
+
+    Inputs:
+    n_runs (int): interpreters started per command; the fastest is kept
+
+    Returns: dict of seconds by command, with --help for the parser alone
+    '''
+    import cli
+
+    script = (
+        'import time; start = time.perf_counter(); import cli; ' +
+        'command = {!r}; command and cli.import_command_modules(command); ' +
+        'print(time.perf_counter() - start)'
+    )
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, 'PYTHONPATH': repo_dir}
+
+    timings = {}
+    for command in ['--help'] + list(cli.COMMAND_MODULES):
+        runs = [
+            float(subprocess.run(
+                [sys.executable, '-c', script.format(
+                    None if command == '--help' else command
+                )],
+                capture_output=True, check=True, text=True, env=env,
+                cwd=tempfile.gettempdir()
+            ).stdout)
+            for _ in range(n_runs)
+        ]
+        timings[command] = min(runs)
+
+    return timings
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the NBA Sheets pipeline.')
+    parser.add_argument(
+        '--fixtures', metavar='DIR', default=fetch.FIXTURES_DIR,
+        help='directory of pages saved with cli.py --record'
+    )
+    parser.add_argument(
+        '--json', metavar='FILE',
+        help='also save the parser results to FILE, to compare across versions'
+    )
+    args = parser.parse_args()
+    # checks whose results didn't match or whose runs failed, to exit non-zero
+    failures = []
+
+    timings = benchmark_import_times()
+    for command, seconds in timings.items():
+        print(
+            f"Imports ({command}): {seconds * 1000:.0f} ms, " +
+            f"{1 - seconds / timings['all']:.0%} less than importing everything"
+        )
+
+    timings = benchmark_concurrent_fetch()
+    print(
+        f"Fetch: sequential {timings['sequential']:.2f}s, " +
+        f"concurrent {timings['concurrent']:.2f}s " +
+        f"({timings['sequential'] / timings['concurrent']:.1f}x)"
+    )
+
+    timings = benchmark_page_cache()
+    for run in ['cold', 'revalidated', 'fresh']:
+        stats = timings[f'{run}_stats']
+        print(
+            f"Page cache ({run}): {timings[run]:.2f}s, " +
+            f"{stats['misses']} downloaded, " +
+            f"{stats['revalidated']} not modified, " +
+            f"{stats['memo_hits'] + stats['fresh_hits']} reused"
+        )
+
+    result = benchmark_appearances()
+    print(
+        f"Games together ({result['players']} players, every pair): " +
+        f"merges {result['merge_seconds'] * 1000:,.1f} ms, " +
+        f"bitsets {result['index_seconds'] * 1000:,.1f} ms, " +
+        f"new game {result['update_seconds'] * 1000:,.2f} ms, " +
+        f"{'matches' if result['matches'] else 'DIFFERS'}"
+    )
+    if not result['matches']:
+        failures.append('Games together')
+
+    result = benchmark_standings_engine()
+    print(
+        f"Standings engine ({result['games']:,} games): " +
+        f"first read {result['first_seconds'] * 1000:,.1f} ms, " +
+        f"{result['new_games']} new games {result['new_seconds'] * 1000:,.2f} ms, " +
+        f"ranking {result['rank_seconds'] * 1000:,.1f} ms, " +
+        f"{'same layout' if result['columns_match'] else 'LAYOUT DIFFERS'}"
+    )
+    if not result['columns_match']:
+        failures.append('Standings engine')
+
+    for result in benchmark_picks_summary():
+        print(
+            f"Picks summary ({result['bettors']:,} bettors): " +
+            f"cross join {result['cross_join_seconds'] * 1000:,.0f} ms, " +
+            f"{result['cross_join_peak_kb'] / 1024:,.1f} MB peak; " +
+            f"count matrix {result['seconds'] * 1000:,.0f} ms, " +
+            f"{result['peak_kb'] / 1024:,.1f} MB peak, " +
+            f"{'matches' if result['matches'] else 'DIFFERS'}"
+        )
+        if not result['matches']:
+            failures.append(f"Picks summary ({result['bettors']:,} bettors)")
+
+    for result in benchmark_formula_modes():
+        print(
+            f"Formula mode ({result['bettors']:,} bettors, {result['mode']}): " +
+            f"{result['seconds'] * 1000:,.1f} ms to build, " +
+            f"{result['cells']:,} cells, " +
+            f"{result['request_bytes'] / 1024:,.0f} KB sent"
+        )
+
+    result = benchmark_leaderboard()
+    print(
+        f"Leaderboard ({result['bettors']:,} bettors): " +
+        f"full rescore {result['full_seconds'] * 1000:,.0f} ms, " +
+        f"index built {result['build_seconds'] * 1000:,.0f} ms, " +
+        f"two teams swap {result['update_seconds'] * 1000:,.1f} ms " +
+        f"({result['rescored']:,} entrants moved), " +
+        f"what-if {result['what_if_seconds'] * 1000:,.1f} ms, " +
+        f"{'matches' if result['matches'] else 'DIFFERS'}"
+    )
+    if not result['matches']:
+        failures.append('Leaderboard')
+
+    for result in benchmark_projection():
+        print(
+            f"Projection ({result['workers']} workers): " +
+            f"{result['seconds']:.2f}s, " +
+            f"{result['simulations_per_second']:,.0f} seasons/s, " +
+            f"{'matches' if result['matches'] else 'DIFFERS'}"
+        )
+        if not result['matches']:
+            failures.append(f"Projection ({result['workers']} workers)")
+
+    # the rest replay the saved pages, so they're skipped if any are missing
+    missing_urls = get_missing_fixtures(args.fixtures)
+    if missing_urls:
+        print(
+            f"Skipping the benchmarks on saved pages, {args.fixtures} has no " +
+            f"page for {', '.join(missing_urls)} (save them with " +
+            f"python cli.py --record {args.fixtures} tiebreakers)"
+        )
+    else:
+        parity = check_parser_parity(args.fixtures)
+        results = benchmark_parsers(args.fixtures)
+        for (name, backend), result in results.items():
+            match = 'matches' if parity[(name, backend)] else 'DIFFERS'
+            print(
+                f"Parser {name} ({backend}): " +
+                f"{result['seconds'] * 1000:.1f} ms, " +
+                f"{result['rows_per_second']:,.0f} rows/s, " +
+                f"{result['peak_kb']:,.0f} KB peak, {match}"
+            )
+            if not parity[(name, backend)]:
+                failures.append(f'Parser {name} ({backend})')
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump([
+                    {'case': name, 'backend': backend,
+                     'matches': parity[(name, backend)], **result}
+                    for (name, backend), result in results.items()
+                ], f, indent=2)
+
+        for result in benchmark_pools(args.fixtures):
+            print(
+                f"Pools ({result['pools']}): {result['seconds']:.2f}s, " +
+                f"{result['downloads']} pages downloaded, " +
+                f"{result['calls']} Sheets API calls, " +
+                f"{'ok' if result['ok'] else 'failures'}"
+            )
+            if not result['ok']:
+                failures.append(f"Pools ({result['pools']})")
+
+        for result in benchmark_retries(args.fixtures):
+            print(
+                f"Sheets retries ({result['scenario']}): {result['seconds']:.2f}s, " +
+                f"{result['calls']} Sheets API calls, {result['retries']} retried, " +
+                f"{result['throttled_seconds']:.1f}s throttled, " +
+                f"{'ok' if result['ok'] else 'failures'}"
+            )
+            if not result['ok']:
+                failures.append(f"Sheets retries ({result['scenario']})")
+
+        for result in benchmark_streaming(args.fixtures):
+            print(
+                f"Streaming ({result['case']}): " +
+                f"whole page {result['seconds'] * 1000:,.0f} ms, " +
+                f"{result['peak_kb']:,.0f} KB peak, " +
+                f"{result['downloaded_kb']:,.0f} KB read; " +
+                f"streamed {result['stream_seconds'] * 1000:,.0f} ms, " +
+                f"{result['stream_peak_kb']:,.0f} KB peak, " +
+                f"{result['stream_downloaded_kb']:,.0f} KB read, " +
+                f"{'matches' if result['matches'] else 'DIFFERS'}"
+            )
+            if not result['matches']:
+                failures.append(f"Streaming ({result['case']})")
+
+        for result in benchmark_hedged_standings(args.fixtures):
+            print(
+                f"Standings ({result['scenario']}, " +
+                f"{'hedged' if result['hedged'] else 'Fox Sports only'}): " +
+                f"{result['seconds']:.2f}s, " +
+                f"{'ok' if result['ok'] else 'failed'}"
+            )
+            # Fox Sports alone is expected to fail on its changed markup
+            if not result['ok'] and (
+                result['hedged'] or result['scenario'] != 'changed markup'
+            ):
+                failures.append(
+                    f"Standings ({result['scenario']}" +
+                    f"{', hedged' if result['hedged'] else ''})"
+                )
+
+        for i, result in enumerate(benchmark_pipeline(args.fixtures)):
+            print(
+                f"Pipeline run {i + 1} ({'ok' if result['ok'] else 'stage failures'}): " +
+                f"{result['calls']} Sheets API calls, " +
+                f"{result['request_bytes'] / 1024:.0f} KB sent, " +
+                f"{result['response_bytes'] / 1024:.0f} KB received, " +
+                f"{result['simulated_seconds']:.1f}s simulated API latency, " +
+                f"{result['calls_by_method']}"
+            )
+            if not result['ok']:
+                failures.append(f'Pipeline run {i + 1}')
+
+    if failures:
+        sys.exit(f"Failed checks: {', '.join(failures)}")
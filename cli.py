@@ -0,0 +1,306 @@
+'''
+CLI
+Command line entry point for the NBA Sheets script, with one command per part
+of the update. Run `python cli.py --help` for the commands; `python
+nba_sheets.py` runs the all command.
+
+Each command only imports the modules it needs, when it runs: checking the
+standings or tiebreakers never loads nba_sheets or gspread or reads
+sheet_info.json, and --help loads nothing heavy at all.
+'''
+
+import argparse
+import importlib
+import sys
+
+# modules each command imports, heaviest dependencies included, so
+# benchmarks.py can time exactly what a command pays for at startup
+COMMAND_MODULES = {
+    'standings': [
+        'pandas', 'parsers', 'scrapes', 'standings_engine', 'standings_sources'
+    ],
+    'tiebreakers': [
+        'pandas', 'parsers', 'scrapes', 'standings_engine', 'standings_sources',
+        'tiebreakers'
+    ],
+    'picks': ['nba_sheets', 'gspread', 'pandas', 'picks_store', 'sheets'],
+    'summary': [
+        'nba_sheets', 'gspread', 'pandas', 'parsers', 'picks_store', 'scrapes',
+        'sheets', 'standings_engine'
+    ],
+    'what-if': [
+        'nba_sheets', 'gspread', 'leaderboard', 'parsers', 'picks_store',
+        'scoring', 'scrapes', 'sheets', 'standings_engine', 'tiebreakers'
+    ],
+    'all': [
+        'nba_sheets', 'gspread', 'history', 'leaderboard', 'parsers',
+        'picks_store', 'projection', 'scoring', 'scrapes', 'sheets',
+        'standings_engine', 'tiebreakers'
+    ],
+    'dry-run': [
+        'nba_sheets', 'gspread', 'history', 'leaderboard', 'parsers',
+        'picks_store', 'projection', 'scoring', 'scrapes', 'sheets',
+        'standings_engine', 'tiebreakers'
+    ],
+}
+
+def import_command_modules(command):
+    '''
+    Import the modules a command needs.
+
+    Inputs:
+    command (str): one of COMMAND_MODULES
+
+    Returns: dict of module by name
+    '''
+    return {
+        name: importlib.import_module(name) for name in COMMAND_MODULES[command]
+    }
+
+def read_pool_picks(modules, rebuild_picks):
+    '''
+    Read every pool's picks through its picks store.
+
+    Inputs:
+    modules (dict): from import_command_modules(...)
+    rebuild_picks (bool): if True, re-read every response
+
+    Returns: list of tuples of pool (dict), standings picks, and tiebreaker
+        picks (pd.DataFrame)
+    '''
+    nba_sheets = modules['nba_sheets']
+    picks_store = modules['picks_store']
+
+    client = modules['gspread'].service_account(nba_sheets.SERVICE_KEY_FP)
+    modules['sheets'].limit_api_calls(client.http_client)
+    pool_picks = []
+    for pool in nba_sheets.get_pools(nba_sheets.load_sheet_info()):
+        ws = client.open_by_key(pool['sheet_id']).worksheet(
+            pool['responses_ws_name']
+        )
+        standings_picks_df, tiebreaker_picks_df = picks_store.read_picks(
+            ws, nba_sheets.parse_responses, nba_sheets.RESPONSE_ID_COLS,
+            rebuild=rebuild_picks,
+            store_dir=nba_sheets.get_pool_dir(picks_store.PICKS_STORE_DIR, pool)
+        )
+        pool_picks.append((pool, standings_picks_df, tiebreaker_picks_df))
+
+    return pool_picks
+
+def run_standings(args):
+    '''
+    Scrape and print the standings.
+    '''
+    scrapes = import_command_modules('standings')['scrapes']
+    scrape_fxn, *scrape_args = scrapes.get_standings_scrape()
+    standings_df = scrape_fxn(*scrape_args)
+    print(standings_df.to_string(index=False))
+
+def run_tiebreakers(args):
+    '''
+    Scrape and print the tiebreaker values.
+    '''
+    scrapes = import_command_modules('tiebreakers')['scrapes']
+    shared_data = scrapes.get_shared_data(scrapes.start_scrapes())
+    for n, (desc, value) in shared_data['tiebreakers'].items():
+        print(f'Tiebreaker #{n} ({desc}): {value}')
+
+def run_picks(args):
+    '''
+    Read every pool's form responses into its picks store and print how many
+    picks each pool has.
+    '''
+    modules = import_command_modules('picks')
+    for pool, standings_picks_df, tiebreaker_picks_df in read_pool_picks(
+        modules, args.rebuild_picks
+    ):
+        n_entrants = standings_picks_df['Email'].nunique()
+        print(
+            f"{pool['name'] or pool['sheet_id']}: {n_entrants} entrants, " +
+            f"{len(standings_picks_df)} standings picks, " +
+            f"{len(tiebreaker_picks_df)} tiebreaker picks"
+        )
+
+def run_summary(args):
+    '''
+    Print every pool's standings picks summary against the current standings.
+    '''
+    modules = import_command_modules('summary')
+    nba_sheets = modules['nba_sheets']
+    scrapes = modules['scrapes']
+    scrape_fxn, *scrape_args = scrapes.get_standings_scrape()
+    standings_df = scrape_fxn(*scrape_args)
+    for pool, standings_picks_df, _ in read_pool_picks(
+        modules, args.rebuild_picks
+    ):
+        summary_df = nba_sheets.summarize_standings_picks(
+            standings_df, standings_picks_df
+        )
+        print(pool['name'] or pool['sheet_id'])
+        print(summary_df.to_string(index=False))
+
+def run_what_if(args):
+    '''
+    Print every pool's leaderboard as it would be if a team finished at a
+    rank, the rest of its conference keeping their order.
+    '''
+    modules = import_command_modules('what-if')
+    nba_sheets = modules['nba_sheets']
+    scrapes = modules['scrapes']
+    shared_data = scrapes.get_shared_data(scrapes.start_scrapes())
+    standings_df = shared_data['standings_df']
+    if standings_df is None:
+        # get_shared_data(...) has already printed why
+        sys.exit("Can't work out the leaderboards without the standings")
+    if args.team not in set(standings_df['Team']):
+        sys.exit(f'{args.team} not in the standings')
+    tiebreaker_values = {
+        n: value for n, (_, value) in shared_data['tiebreakers'].items()
+    }
+
+    for pool, standings_picks_df, tiebreaker_picks_df in read_pool_picks(
+        modules, args.rebuild_picks
+    ):
+        index = nba_sheets.get_leaderboard_index(pool)
+        index.set_picks(standings_picks_df)
+        index.set_standings(standings_df)
+        index.set_tiebreakers(modules['scoring'].score_tiebreaker_picks(
+            tiebreaker_picks_df, tiebreaker_values
+        ))
+        leaderboard_df = index.what_if(args.team, args.rank, args.top)
+        print(pool['name'] or pool['sheet_id'])
+        print(leaderboard_df.to_string(index=False))
+
+def run_all(args, dry_run=False):
+    '''
+    Run the full update of every pool.
+    '''
+    command = 'dry-run' if dry_run else 'all'
+    nba_sheets = import_command_modules(command)['nba_sheets']
+    nba_sheets.main(
+        scoring_mode=args.scoring or nba_sheets.SCORING_MODE,
+        rebuild_picks=args.rebuild_picks,
+        n_simulations=args.simulations,
+        dry_run=dry_run
+    )
+
+def run_dry_run(args):
+    '''
+    Run the full update of every pool without writing to any workbook.
+    '''
+    run_all(args, dry_run=True)
+
+def make_parser():
+    '''
+    Build the argument parser. Defaults that live in nba_sheets are filled in
+    when a command runs, so building the parser imports nothing.
+
+    Returns: argparse.ArgumentParser
+    '''
+    parser = argparse.ArgumentParser(
+        description='Update the NBA standings pool Google Sheet.'
+    )
+    http_mode = parser.add_mutually_exclusive_group()
+    http_mode.add_argument(
+        '--record', metavar='DIR',
+        help='save every page downloaded into DIR'
+    )
+    http_mode.add_argument(
+        '--replay', metavar='DIR',
+        help='serve pages saved with --record from DIR instead of the network'
+    )
+    parser.add_argument(
+        '--results', metavar='FILE',
+        help='work the standings out from the game results in FILE instead ' +
+        'of scraping them'
+    )
+    parser.add_argument(
+        '--metrics-json', metavar='FILE',
+        help='write the run\'s timings and counters to FILE as JSON'
+    )
+    parser.add_argument(
+        '--metrics-prom', metavar='FILE',
+        help='write the run\'s timings and counters to FILE as a Prometheus ' +
+        'textfile'
+    )
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    commands.add_parser(
+        'standings', help='scrape and print the standings'
+    ).set_defaults(run=run_standings)
+    commands.add_parser(
+        'tiebreakers', help='scrape and print the tiebreaker values'
+    ).set_defaults(run=run_tiebreakers)
+
+    for name, run, help_text in [
+        ('picks', run_picks, 'read new form responses into the picks store'),
+        ('summary', run_summary, 'print the standings picks summary'),
+        ('what-if', run_what_if,
+         'print the leaderboard if a team finished at a given rank'),
+        ('all', run_all, 'update every tab of every pool (the default)'),
+        ('dry-run', run_dry_run, 'do everything but write to the sheets'),
+    ]:
+        command = commands.add_parser(name, help=help_text)
+        command.set_defaults(run=run)
+        command.add_argument(
+            '--rebuild-picks', action='store_true',
+            help='re-read every form response instead of only new ones'
+        )
+        if name == 'what-if':
+            command.add_argument('team', help='team, as in the standings')
+            command.add_argument(
+                'rank', type=int, help='rank the team finishes at in its conference'
+            )
+            command.add_argument(
+                '--top', metavar='N', type=int, default=10,
+                help='entrants to print from the top (default: 10)'
+            )
+        if name in {'all', 'dry-run'}:
+            command.add_argument(
+                '--scoring', choices=['values', 'formulas', 'array_formulas'],
+                default=None,
+                help='write scored picks as static values, spreadsheet ' +
+                'formulas per row, or one ARRAYFORMULA per column (default: ' +
+                'values)'
+            )
+            command.add_argument(
+                '--simulations', metavar='N', type=int, default=None,
+                help='seasons to simulate for the projection tabs (default: ' +
+                '100,000; 0 to skip them)'
+            )
+
+    return parser
+
+def main(argv=None):
+    '''
+    Parse the command line and run the command, the full update by default.
+
+    Inputs:
+    argv (list of str): arguments; by default, sys.argv[1:]
+    '''
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(argv + ['all'])
+
+    if args.record or args.replay:
+        import fetch
+
+        if args.record:
+            fetch.use_recording(args.record)
+        else:
+            fetch.use_replay(args.replay)
+    if args.results:
+        importlib.import_module('scrapes').RESULTS_FP = args.results
+    if args.metrics_json or args.metrics_prom:
+        import metrics
+
+        metrics.METRICS_JSON_FP = args.metrics_json
+        metrics.METRICS_PROM_FP = args.metrics_prom
+
+    args.run(args)
+
+if __name__ == '__main__':
+    main()
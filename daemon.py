@@ -0,0 +1,261 @@
+'''
+Daemon
+Keep the NBA Sheets script running between updates, so the sheets stay
+current through game nights without paying for a cold start on every update.
+
+The gspread client, the open workbooks, and the HTTP session are kept between
+polls. Pages are re-scraped often while games are being played and rarely
+otherwise; when the scraped standings and tiebreakers haven't changed since
+the last update, the pools' spreadsheets aren't touched at all. SIGINT and
+SIGTERM stop the daemon once the current poll has finished.
+
+Run with `python daemon.py`.
+'''
+
+import argparse
+import hashlib
+import signal
+import threading
+from datetime import datetime, timedelta
+
+import gspread
+import pytz
+
+import fetch
+import metrics
+import nba_sheets
+import scrapes
+
+TIMEZONE = pytz.timezone('US/Eastern')
+
+# first and last hour (Eastern time, past 24 for after midnight) that games are
+# played by weekday, Monday first
+GAME_WINDOWS = {
+    0: (19, 25), 1: (19, 25), 2: (19, 25), 3: (19, 25), 4: (19, 25),
+    5: (12, 25), 6: (12, 25),
+}
+
+ACTIVE_POLL_INTERVAL = 5 * 60 # seconds between polls during games
+MAX_ACTIVE_POLL_INTERVAL = 20 * 60 # backed off to when nothing is changing
+IDLE_POLL_INTERVAL = 2 * 60 * 60 # seconds between polls outside games
+FULL_UPDATE_INTERVAL = 24 * 60 * 60 # update even if nothing changed, for new
+                                    # responses, projections, and history
+PAGE_CACHE_TTL = 60 # seconds a page is reused without revalidating
+
+def get_game_windows(now):
+    '''
+    Get the game windows around a moment: yesterday's (which may run past
+    midnight) through a week from now.
+
+    Inputs:
+    now (datetime.datetime): timezone-aware moment
+
+    Returns: list of tuples of datetime.datetime (start and end)
+    '''
+    today = now.astimezone(TIMEZONE).date()
+    windows = []
+    for days in range(-1, 8):
+        day = today + timedelta(days=days)
+        start_hour, end_hour = GAME_WINDOWS[day.weekday()]
+        midnight = datetime(day.year, day.month, day.day)
+        # localize the wall-clock times themselves, so the windows keep their
+        # hours on the days the clocks change
+        windows.append((
+            TIMEZONE.localize(midnight + timedelta(hours=start_hour)),
+            TIMEZONE.localize(midnight + timedelta(hours=end_hour))
+        ))
+
+    return windows
+
+def is_game_window(now):
+    '''
+    Check whether games are likely being played.
+
+    Inputs:
+    now (datetime.datetime): timezone-aware moment
+
+    Returns: bool
+    '''
+    return any(start <= now < end for start, end in get_game_windows(now))
+
+def get_poll_interval(now, n_unchanged):
+    '''
+    Choose how long to wait before the next poll: ACTIVE_POLL_INTERVAL during
+    games, doubled for every poll in a row that found nothing new, and
+    IDLE_POLL_INTERVAL otherwise, cut short when the next game window opens.
+
+    Inputs:
+    now (datetime.datetime): timezone-aware moment
+    n_unchanged (int): polls in a row that found nothing new
+
+    Returns: float, seconds
+    '''
+    if is_game_window(now):
+        return min(
+            ACTIVE_POLL_INTERVAL * 2 ** min(n_unchanged, 16),
+            MAX_ACTIVE_POLL_INTERVAL
+        )
+
+    next_start = min(
+        start for start, _ in get_game_windows(now) if start > now
+    )
+
+    return min(IDLE_POLL_INTERVAL, (next_start - now).total_seconds())
+
+def get_fingerprint(shared_data):
+    '''
+    Summarize the scraped standings and tiebreakers, to tell whether they
+    changed since the last poll.
+
+    Inputs:
+    shared_data (dict): from scrapes.get_shared_data(...)
+
+    Returns: str
+    '''
+    standings_df = shared_data['standings_df']
+    standings = '' if standings_df is None else standings_df.to_csv(index=False)
+    tiebreakers = repr(sorted(shared_data['tiebreakers'].items()))
+
+    return hashlib.sha1((standings + tiebreakers).encode('utf-8')).hexdigest()
+
+def open_workbooks(pools):
+    '''
+    Open every pool's workbook with one service account client.
+
+    Inputs:
+    pools (list of dicts): from nba_sheets.get_pools(...)
+
+    Returns: dict of gspread.Spreadsheet by pool name
+    '''
+    client = gspread.service_account(nba_sheets.SERVICE_KEY_FP)
+
+    return {
+        pool['name']: client.open_by_key(pool['sheet_id']) for pool in pools
+    }
+
+def run(
+    pools=None, workbooks=None, scoring_mode=nba_sheets.SCORING_MODE,
+    n_simulations=None, stop_event=None, max_polls=None
+):
+    '''
+    Poll the source sites and update the pools whenever the standings or
+    tiebreakers change, until stopped.
+
+    Inputs:
+    pools (list of dicts): from nba_sheets.get_pools(...); by default, every
+        pool in sheet_info.json
+    workbooks (dict): workbook to update by pool name; by default, each pool
+        is opened with the service account in service_key.json, and reopened
+        after an update fails
+    scoring_mode (str): one of nba_sheets.SCORING_MODES
+    n_simulations (int): simulated seasons for the projection tabs; by
+        default, projection.N_SIMULATIONS; 0 to skip projecting
+    stop_event (threading.Event): set to stop after the current poll; by
+        default, set by SIGINT or SIGTERM
+    max_polls (int): stop after this many polls; None to poll until stopped
+
+    Returns: dict of the number of polls, updates, and polls skipped because
+        nothing changed
+    '''
+    if pools is None:
+        pools = nba_sheets.get_pools(nba_sheets.load_sheet_info())
+    is_own_workbooks = workbooks is None
+    if stop_event is None:
+        stop_event = threading.Event()
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            signal.signal(signum, lambda *_: stop_event.set())
+
+    fetch.PAGE_CACHE_TTL = PAGE_CACHE_TTL
+    stats = {'polls': 0, 'updates': 0, 'skipped': 0}
+    last_fingerprint = None
+    last_update = None
+    n_unchanged = 0
+    while not stop_event.is_set():
+        now = datetime.now(tz=pytz.utc)
+        fetch.clear_memo()
+        fetch.reset_cache_stats()
+        metrics.reset()
+        stats['polls'] += 1
+
+        shared_data = scrapes.get_shared_data(scrapes.start_scrapes())
+        fingerprint = get_fingerprint(shared_data)
+        is_due = (
+            last_update is None or
+            (now - last_update).total_seconds() >= FULL_UPDATE_INTERVAL
+        )
+        if fingerprint == last_fingerprint and not is_due:
+            n_unchanged += 1
+            stats['skipped'] += 1
+            print(f'{now:%Y-%m-%d %H:%M:%S %Z}: no changes, sheets not updated')
+        else:
+            try:
+                if workbooks is None:
+                    workbooks = open_workbooks(pools)
+                nba_sheets.update_pools(
+                    pools, workbooks, scoring_mode, n_simulations=n_simulations,
+                    shared_data=shared_data
+                )
+                last_fingerprint = fingerprint
+                last_update = now
+                n_unchanged = 0
+                stats['updates'] += 1
+            except Exception as e:
+                print(f'Daemon update error: {e}')
+                # try again at the active rate, with fresh connections
+                n_unchanged = 0
+                if is_own_workbooks:
+                    workbooks = None
+
+        if max_polls is not None and stats['polls'] >= max_polls:
+            break
+        stop_event.wait(get_poll_interval(datetime.now(tz=pytz.utc), n_unchanged))
+
+    print(
+        f"Daemon stopped after {stats['polls']} polls: " +
+        f"{stats['updates']} updates, {stats['skipped']} skipped"
+    )
+
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Keep the NBA standings pool Google Sheets up to date.'
+    )
+    parser.add_argument(
+        '--replay', metavar='DIR',
+        help='serve pages saved with cli.py --record from DIR'
+    )
+    parser.add_argument(
+        '--scoring', choices=nba_sheets.SCORING_MODES,
+        default=nba_sheets.SCORING_MODE,
+        help='write scored picks as static values, spreadsheet formulas per ' +
+        'row, or one ARRAYFORMULA per column'
+    )
+    parser.add_argument(
+        '--simulations', metavar='N', type=int,
+        help='seasons to simulate for the projection tabs (default: 100,000; ' +
+        '0 to skip them)'
+    )
+    parser.add_argument(
+        '--results', metavar='FILE',
+        help='work the standings out from the game results in FILE, reading ' +
+        'only new games each poll'
+    )
+    parser.add_argument(
+        '--metrics-json', metavar='FILE',
+        help='write each update\'s timings and counters to FILE as JSON'
+    )
+    parser.add_argument(
+        '--metrics-prom', metavar='FILE',
+        help='write each update\'s timings and counters to FILE as a ' +
+        'Prometheus textfile'
+    )
+    args = parser.parse_args()
+
+    if args.replay:
+        fetch.use_replay(args.replay)
+    scrapes.RESULTS_FP = args.results
+    metrics.METRICS_JSON_FP = args.metrics_json
+    metrics.METRICS_PROM_FP = args.metrics_prom
+
+    run(scoring_mode=args.scoring, n_simulations=args.simulations)
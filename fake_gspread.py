@@ -0,0 +1,635 @@
+'''
+Fake gspread
+An in-memory stand-in for the Google Sheets API, for running and measuring
+the NBA Sheets script without a real spreadsheet or service account.
+
+FakeSheetsServer answers the Sheets REST calls gspread makes (spreadsheet
+metadata, batchUpdate, and values get/update/batchGet/batchUpdate/append/
+clear). FakeHTTPClient plugs it in underneath gspread itself, so worksheets,
+worksheet, add_worksheet, update, col_values, get, get_all_records, and
+everything in sheets.py run unmodified against it. The server counts calls
+and payload bytes and can add simulated latency per call. It can also enforce
+a per-minute request quota and fail chosen calls with quota or server errors,
+to exercise retries.
+
+Formulas are stored but not evaluated, and dates aren't recognised in
+user-entered values.
+'''
+
+import copy
+import json
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import unquote, urlencode
+
+import gspread
+import requests
+from gspread.http_client import HTTPClient
+from gspread.urls import SPREADSHEETS_API_V4_BASE_URL
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 26
+
+RANGE_RE = re.compile(r'^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$')
+
+class FakeSheetsServer:
+    '''
+    In-memory Sheets API holding any number of spreadsheets.
+
+    Inputs:
+    latency (float): seconds of simulated latency per API call
+    sleep (bool): if True, actually wait out the simulated latency; otherwise
+        only add it to the stats
+    quota_per_minute (int): requests answered in any 60 seconds before the
+        rest get 429s, like the real quota; None for no quota
+    '''
+    def __init__(self, latency=0, sleep=False, quota_per_minute=None):
+        self.latency = latency
+        self.sleep = sleep
+        self.quota_per_minute = quota_per_minute
+        self.spreadsheets = {}
+        self.lock = threading.Lock()
+        self.call_times = deque()
+        self.injected_errors = deque()
+        self.reset_stats()
+
+    def inject_errors(self, *codes):
+        '''
+        Fail the next requests with these HTTP status codes, one per request,
+        e.g. inject_errors(429, 503).
+
+        Inputs:
+        codes (int): status codes, in order
+        '''
+        with self.lock:
+            self.injected_errors.extend(codes)
+
+    def check_quota(self):
+        '''
+        Raise the error the next request should fail with, if any: an injected
+        error, or a 429 once the quota for the last minute is used up.
+        '''
+        if self.injected_errors:
+            code = self.injected_errors.popleft()
+            raise FakeAPIError(code, f'Injected error {code}')
+
+        if self.quota_per_minute is None:
+            return
+        now = time.monotonic()
+        while self.call_times and now - self.call_times[0] >= 60:
+            self.call_times.popleft()
+        if len(self.call_times) >= self.quota_per_minute:
+            raise FakeAPIError(
+                429, 'Quota exceeded for quota metric \'Requests\' and limit ' +
+                '\'Requests per minute per user\''
+            )
+        self.call_times.append(now)
+
+    def reset_stats(self):
+        '''
+        Zero the call, byte, and latency counters.
+        '''
+        self.stats = {
+            'calls': 0,
+            'calls_by_method': {},
+            'request_bytes': 0,
+            'response_bytes': 0,
+            'simulated_seconds': 0,
+        }
+
+    def create_spreadsheet(self, spreadsheet_id, title='Fake Spreadsheet'):
+        '''
+        Create an empty spreadsheet with one worksheet, Sheet1.
+
+        Inputs:
+        spreadsheet_id (str): key to open the spreadsheet by
+        title (str): spreadsheet title
+        '''
+        self.spreadsheets[spreadsheet_id] = {
+            'title': title,
+            'sheets': [],
+            'next_sheet_id': 0,
+        }
+        self.add_sheet(spreadsheet_id, {'title': 'Sheet1'})
+
+    def add_sheet(self, spreadsheet_id, properties):
+        '''
+        Add a worksheet.
+
+        Inputs:
+        spreadsheet_id (str): key of the spreadsheet
+        properties (dict): Sheets API SheetProperties; only title is required
+
+        Returns: dict, the new worksheet's full properties
+        '''
+        spreadsheet = self.spreadsheets[spreadsheet_id]
+        if any(
+            sheet['properties']['title'] == properties['title']
+            for sheet in spreadsheet['sheets']
+        ):
+            raise FakeAPIError(
+                400,
+                f"A sheet with the name \"{properties['title']}\" already exists."
+            )
+
+        grid_properties = properties.get('gridProperties', {})
+        sheet_id = properties.get('sheetId', spreadsheet['next_sheet_id'])
+        spreadsheet['next_sheet_id'] = max(spreadsheet['next_sheet_id'], sheet_id) + 1
+        properties = {
+            'sheetId': sheet_id,
+            'title': properties['title'],
+            'index': properties.get('index', len(spreadsheet['sheets'])),
+            'sheetType': 'GRID',
+            'gridProperties': {
+                'rowCount': grid_properties.get('rowCount', DEFAULT_ROWS),
+                'columnCount': grid_properties.get('columnCount', DEFAULT_COLS),
+            },
+        }
+        spreadsheet['sheets'].append({'properties': properties, 'cells': {}})
+
+        return properties
+
+    def get_sheet(self, spreadsheet_id, title=None, sheet_id=None):
+        '''
+        Find a worksheet by title or id.
+
+        Returns: dict with properties and cells
+        '''
+        for sheet in self.spreadsheets[spreadsheet_id]['sheets']:
+            properties = sheet['properties']
+            if title is not None and properties['title'] == title:
+                return sheet
+            if sheet_id is not None and properties['sheetId'] == sheet_id:
+                return sheet
+
+        raise FakeAPIError(400, f'Unable to parse range: {title}')
+
+    def handle(self, method, endpoint, params=None, body=None):
+        '''
+        Answer one Sheets API request, counting it and its payload.
+
+        Inputs:
+        method (str): HTTP method
+        endpoint (str): full request URL
+        params (dict): query parameters
+        body (dict): JSON request body
+
+        Returns: tuple of int (status code) and dict (JSON response)
+        '''
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        path = endpoint[len(SPREADSHEETS_API_V4_BASE_URL) + 1:]
+
+        with self.lock:
+            # batch updates are all-or-nothing, like the real API
+            is_batch_update = path.endswith(':batchUpdate')
+            if is_batch_update:
+                spreadsheets = copy.deepcopy(self.spreadsheets)
+            try:
+                self.check_quota()
+                api_method, response = self.route(method.lower(), path, params, body)
+                status = 200
+            except FakeAPIError as e:
+                if is_batch_update:
+                    self.spreadsheets = spreadsheets
+                api_method, status = 'error', e.code
+                response = {'error': {
+                    'code': e.code, 'message': e.message, 'status': e.status
+                }}
+
+            self.stats['calls'] += 1
+            calls_by_method = self.stats['calls_by_method']
+            calls_by_method[api_method] = calls_by_method.get(api_method, 0) + 1
+            self.stats['request_bytes'] += (
+                len(endpoint) + len(urlencode(params, doseq=True)) +
+                (len(json.dumps(body)) if body is not None else 0)
+            )
+            self.stats['response_bytes'] += len(json.dumps(response))
+            self.stats['simulated_seconds'] += self.latency
+
+        if self.sleep and self.latency:
+            time.sleep(self.latency)
+
+        return status, response
+
+    def route(self, method, path, params, body):
+        '''
+        Dispatch a request path to the matching API method.
+
+        Returns: tuple of str (API method name) and dict (JSON response)
+        '''
+        spreadsheet_id, _, rest = path.partition('/')
+        spreadsheet_id, _, action = spreadsheet_id.partition(':')
+        if spreadsheet_id not in self.spreadsheets:
+            raise FakeAPIError(404, 'Requested entity was not found.')
+
+        if not rest and not action and method == 'get':
+            return 'spreadsheets.get', self.get_metadata(spreadsheet_id)
+        if action == 'batchUpdate' and method == 'post':
+            return 'spreadsheets.batchUpdate', self.batch_update(spreadsheet_id, body)
+        if rest == 'values:batchGet' and method == 'get':
+            return 'values.batchGet', {
+                'spreadsheetId': spreadsheet_id,
+                'valueRanges': [
+                    self.get_values(spreadsheet_id, range_name, params)
+                    for range_name in params['ranges']
+                ],
+            }
+        if rest == 'values:batchUpdate' and method == 'post':
+            responses = [
+                self.update_values(
+                    spreadsheet_id, data['range'], data['values'],
+                    body['valueInputOption'], data.get('majorDimension')
+                )
+                for data in body['data']
+            ]
+            return 'values.batchUpdate', {
+                'spreadsheetId': spreadsheet_id,
+                'totalUpdatedCells': sum(x['updatedCells'] for x in responses),
+                'responses': responses,
+            }
+        if rest.startswith('values/'):
+            # the range is URL-quoted, so any bare colon starts the action
+            quoted_range_name, _, action = rest[len('values/'):].partition(':')
+            range_name = unquote(quoted_range_name)
+            if action == '' and method == 'get':
+                return 'values.get', self.get_values(spreadsheet_id, range_name, params)
+            if action == '' and method == 'put':
+                return 'values.update', self.update_values(
+                    spreadsheet_id, range_name, body['values'],
+                    params['valueInputOption'], body.get('majorDimension')
+                )
+            if action == 'append' and method == 'post':
+                return 'values.append', self.append_values(
+                    spreadsheet_id, range_name, body['values'],
+                    params['valueInputOption']
+                )
+            if action == 'clear' and method == 'post':
+                return 'values.clear', self.clear_values(spreadsheet_id, range_name)
+
+        raise FakeAPIError(404, f'Fake Sheets API has no route for {method} {path}')
+
+    def get_metadata(self, spreadsheet_id):
+        '''
+        Answer spreadsheets.get.
+
+        Returns: dict
+        '''
+        spreadsheet = self.spreadsheets[spreadsheet_id]
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'properties': {'title': spreadsheet['title'], 'locale': 'en_US'},
+            'sheets': [
+                {'properties': json.loads(json.dumps(sheet['properties']))}
+                for sheet in spreadsheet['sheets']
+            ],
+        }
+
+    def batch_update(self, spreadsheet_id, body):
+        '''
+        Answer spreadsheets.batchUpdate for addSheet, updateSheetProperties,
+        and deleteSheet requests.
+
+        Returns: dict
+        '''
+        replies = []
+        for request in body['requests']:
+            if 'addSheet' in request:
+                properties = self.add_sheet(
+                    spreadsheet_id, request['addSheet']['properties']
+                )
+                replies.append({'addSheet': {'properties': properties}})
+            elif 'updateSheetProperties' in request:
+                properties = request['updateSheetProperties']['properties']
+                sheet = self.get_sheet(spreadsheet_id, sheet_id=properties['sheetId'])
+                if 'title' in properties:
+                    sheet['properties']['title'] = properties['title']
+                sheet['properties']['gridProperties'].update(
+                    properties.get('gridProperties', {})
+                )
+                replies.append({})
+            elif 'deleteSheet' in request:
+                sheet = self.get_sheet(
+                    spreadsheet_id, sheet_id=request['deleteSheet']['sheetId']
+                )
+                self.spreadsheets[spreadsheet_id]['sheets'].remove(sheet)
+                replies.append({})
+            else:
+                raise FakeAPIError(400, f'Fake Sheets API does not support {list(request)}')
+
+        return {'spreadsheetId': spreadsheet_id, 'replies': replies}
+
+    def parse_range(self, spreadsheet_id, range_name):
+        '''
+        Resolve an A1 range like 'Sheet'!A1:C3, 'Sheet'!A:A, or 'Sheet'.
+
+        Returns: tuple of the worksheet, 0-based first row and column, and
+            0-based last row and column (None for a bare anchor cell)
+        '''
+        if range_name.startswith("'"):
+            end = range_name.index("'!") if "'!" in range_name else len(range_name) - 1
+            title = range_name[1:end].replace("''", "'")
+            a1 = range_name[end + 2:]
+        else:
+            title, _, a1 = range_name.partition('!')
+
+        sheet = self.get_sheet(spreadsheet_id, title=title)
+        grid_properties = sheet['properties']['gridProperties']
+        max_row = grid_properties['rowCount'] - 1
+        max_col = grid_properties['columnCount'] - 1
+
+        if not a1:
+            return sheet, 0, 0, max_row, max_col
+
+        match = RANGE_RE.match(a1)
+        if not match:
+            raise FakeAPIError(400, f'Unable to parse range: {range_name}')
+        start_col, start_row, end_col, end_row = match.groups()
+
+        first_row = int(start_row) - 1 if start_row else 0
+        first_col = a1_to_rowcol(f'{start_col}1')[1] - 1 if start_col else 0
+        if ':' not in a1:
+            return sheet, first_row, first_col, None, None
+
+        last_row = int(end_row) - 1 if end_row else max_row
+        last_col = a1_to_rowcol(f'{end_col}1')[1] - 1 if end_col else max_col
+
+        return sheet, first_row, first_col, last_row, last_col
+
+    def get_values(self, spreadsheet_id, range_name, params):
+        '''
+        Answer values.get for one range.
+
+        Returns: dict (ValueRange)
+        '''
+        sheet, first_row, first_col, last_row, last_col = self.parse_range(
+            spreadsheet_id, range_name
+        )
+        if last_row is None:
+            last_row, last_col = first_row, first_col
+        render_option = params.get('valueRenderOption', 'FORMATTED_VALUE')
+        major_dimension = params.get('majorDimension', 'ROWS')
+
+        cells = sheet['cells']
+        values = [
+            [
+                render_value(cells.get((i, j), ''), render_option)
+                for j in range(first_col, last_col + 1)
+            ]
+            for i in range(first_row, last_row + 1)
+        ]
+        if major_dimension == 'COLUMNS':
+            values = [list(col) for col in zip(*values)]
+        values = trim_values(values)
+
+        response = {
+            'range': (
+                f"'{sheet['properties']['title']}'!" +
+                rowcol_to_a1(first_row + 1, first_col + 1) + ':' +
+                rowcol_to_a1(last_row + 1, last_col + 1)
+            ),
+            'majorDimension': major_dimension,
+        }
+        if values:
+            response['values'] = values
+
+        return response
+
+    def update_values(
+        self, spreadsheet_id, range_name, values, value_input_option,
+        major_dimension=None
+    ):
+        '''
+        Answer values.update for one range, refusing writes outside the grid
+        like the real API.
+
+        Returns: dict (UpdateValuesResponse)
+        '''
+        sheet, first_row, first_col, _, _ = self.parse_range(
+            spreadsheet_id, range_name
+        )
+        if major_dimension == 'COLUMNS':
+            values = [list(row) for row in zip(*values)]
+
+        n_rows = len(values)
+        n_cols = max((len(row) for row in values), default=0)
+        grid_properties = sheet['properties']['gridProperties']
+        if (first_row + n_rows > grid_properties['rowCount'] or
+                first_col + n_cols > grid_properties['columnCount']):
+            raise FakeAPIError(
+                400,
+                f'Range ({range_name}) exceeds grid limits. ' +
+                f"Max rows: {grid_properties['rowCount']}, " +
+                f"max columns: {grid_properties['columnCount']}"
+            )
+
+        n_cells = 0
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                value = parse_input_value(value, value_input_option)
+                if value == '':
+                    sheet['cells'].pop((first_row + i, first_col + j), None)
+                else:
+                    sheet['cells'][(first_row + i, first_col + j)] = value
+                n_cells += 1
+
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': range_name,
+            'updatedRows': n_rows,
+            'updatedColumns': n_cols,
+            'updatedCells': n_cells,
+        }
+
+    def append_values(self, spreadsheet_id, range_name, values, value_input_option):
+        '''
+        Answer values.append, adding rows below the last non-empty row and
+        growing the grid if needed.
+
+        Returns: dict (AppendValuesResponse)
+        '''
+        sheet, _, first_col, _, _ = self.parse_range(spreadsheet_id, range_name)
+        first_row = max((i for i, _ in sheet['cells']), default=-1) + 1
+        grid_properties = sheet['properties']['gridProperties']
+        grid_properties['rowCount'] = max(
+            grid_properties['rowCount'], first_row + len(values)
+        )
+
+        title = sheet['properties']['title']
+        updates = self.update_values(
+            spreadsheet_id,
+            f"'{title}'!" + rowcol_to_a1(first_row + 1, first_col + 1),
+            values,
+            value_input_option
+        )
+
+        return {'spreadsheetId': spreadsheet_id, 'updates': updates}
+
+    def clear_values(self, spreadsheet_id, range_name):
+        '''
+        Answer values.clear.
+
+        Returns: dict
+        '''
+        sheet, first_row, first_col, last_row, last_col = self.parse_range(
+            spreadsheet_id, range_name
+        )
+        if last_row is None:
+            last_row, last_col = first_row, first_col
+        for i, j in list(sheet['cells']):
+            if first_row <= i <= last_row and first_col <= j <= last_col:
+                del sheet['cells'][(i, j)]
+
+        return {'spreadsheetId': spreadsheet_id, 'clearedRange': range_name}
+
+class FakeAPIError(Exception):
+    '''
+    Error the fake API answers with instead of a result.
+
+    Inputs:
+    code (int): HTTP status code
+    message (str): error message
+    '''
+    STATUSES = {
+        400: 'INVALID_ARGUMENT',
+        404: 'NOT_FOUND',
+        429: 'RESOURCE_EXHAUSTED',
+        500: 'INTERNAL',
+        503: 'UNAVAILABLE',
+    }
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = self.STATUSES.get(code, 'UNKNOWN')
+
+class FakeHTTPClient(HTTPClient):
+    '''
+    gspread HTTP client that sends every request to a FakeSheetsServer.
+
+    Inputs:
+    server (FakeSheetsServer): fake API to answer requests
+    '''
+    def __init__(self, server):
+        self.server = server
+        self.session = None
+        self.timeout = None
+
+    def login(self):
+        pass
+
+    def request(
+        self, method, endpoint, params=None, data=None, json=None, files=None,
+        headers=None
+    ):
+        status, body = self.server.handle(method, endpoint, params, json)
+
+        response = requests.Response()
+        response.status_code = status
+        response.url = endpoint
+        response._content = json_dumps(body)
+        response.headers['Content-Type'] = 'application/json'
+
+        if not response.ok:
+            raise gspread.exceptions.APIError(response)
+
+        return response
+
+def json_dumps(body):
+    '''
+    Encode a JSON response body.
+
+    Returns: bytes
+    '''
+    return json.dumps(body).encode('utf-8')
+
+def open_fake_workbook(server, spreadsheet_id):
+    '''
+    Open a spreadsheet on a fake server through gspread, the same way the
+    script opens the real one.
+
+    Inputs:
+    server (FakeSheetsServer): fake API
+    spreadsheet_id (str): key of the spreadsheet
+
+    Returns: gspread.Spreadsheet
+    '''
+    client = gspread.Client(
+        None, http_client=lambda auth, session: FakeHTTPClient(server)
+    )
+    return client.open_by_key(spreadsheet_id)
+
+def parse_input_value(value, value_input_option):
+    '''
+    Store a value as the Sheets API would: user-entered strings are parsed as
+    numbers, booleans, or formulas, and a leading apostrophe forces text.
+
+    Inputs:
+    value: value sent in the request
+    value_input_option (str): RAW or USER_ENTERED
+
+    Returns: value to store
+    '''
+    if value is None:
+        return ''
+    if value_input_option != 'USER_ENTERED' or not isinstance(value, str):
+        return value
+
+    if value.startswith("'"):
+        return value[1:]
+    if value.upper() in {'TRUE', 'FALSE'}:
+        return value.upper() == 'TRUE'
+    try:
+        number = float(value.replace(',', ''))
+    except ValueError:
+        return value
+    if number != number or number in {float('inf'), float('-inf')}:
+        return value
+
+    return int(number) if number.is_integer() and '.' not in value else number
+
+def render_value(value, render_option):
+    '''
+    Render a stored value as the Sheets API would. Formulas aren't evaluated,
+    so they are returned as written for every render option.
+
+    Inputs:
+    value: stored value
+    render_option (str): FORMATTED_VALUE, UNFORMATTED_VALUE, or FORMULA
+
+    Returns: value
+    '''
+    if render_option != 'FORMATTED_VALUE':
+        return value
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return f'{value:g}'
+
+    return value
+
+def trim_values(values):
+    '''
+    Drop trailing empty cells from each row and trailing empty rows, as the
+    Sheets API does.
+
+    Inputs:
+    values (list of lists): rows of values
+
+    Returns: list of lists
+    '''
+    trimmed = []
+    for row in values:
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        trimmed.append(row)
+    while trimmed and not trimmed[-1]:
+        trimmed.pop()
+
+    return trimmed
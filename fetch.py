@@ -0,0 +1,704 @@
+'''
+Fetch
+Shared HTTP layer for the NBA Sheets scrapers.
+
+All downloads go through one pooled keep-alive session, with a cap on the
+number of requests in flight to any one host so that concurrent scrapes stay
+polite to Basketball Reference.
+
+For offline runs, pages can be recorded into a fixtures directory as they are
+downloaded and later replayed from it without touching the network.
+
+Pages are cached at three levels: each URL is fetched at most once per run,
+bodies are kept on disk and reused without a request while younger than a TTL,
+and older bodies are revalidated with ETag/Last-Modified. Scraper results are
+cached on disk against the body they were parsed from, so an unchanged page
+is neither downloaded nor parsed again.
+'''
+
+import functools
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+import metrics
+
+MAX_REQUESTS_PER_HOST = 3
+POOL_MAXSIZE = 10
+MAX_WORKERS = 8
+
+FIXTURES_DIR = 'fixtures'
+
+PAGE_CACHE_DIR = '.page_cache' # None to turn off the on-disk cache
+PAGE_CACHE_TTL = 60 * 60 # seconds a cached page is used without revalidating
+STREAM_CHUNK_SIZE = 16 * 1024 # bytes read at a time when streaming a page
+
+_session = None
+_session_lock = threading.Lock()
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+# page a cache_parsed scraper is parsing on this thread, so its own request for
+# the page isn't counted as a second use
+_parsing = threading.local()
+
+CACHE_STAT_NAMES = [
+    'memo_hits', # page already fetched this run
+    'fresh_hits', # page on disk and younger than the TTL
+    'revalidated', # server answered 304 Not Modified
+    'misses', # full download
+    'parse_hits',
+    'parse_misses',
+    'bytes_downloaded',
+    'bytes_saved',
+    'seconds_saved', # estimated from the original download time
+]
+_cache_stats = dict.fromkeys(CACHE_STAT_NAMES, 0)
+_cache_stats_lock = threading.Lock()
+
+def make_session(adapter=None):
+    '''
+    Create a requests session with a connection pool large enough to keep one
+    keep-alive connection per concurrent request.
+
+    Inputs:
+    adapter (requests.adapters.BaseAdapter): transport to mount for http and
+        https; by default, a pooled HTTPAdapter
+
+    Returns: requests.Session
+    '''
+    if adapter is None:
+        adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE,
+                              pool_maxsize=POOL_MAXSIZE)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+def get_fixture_path(url, fixtures_dir=FIXTURES_DIR):
+    '''
+    Get where a page is saved in a fixtures directory, named after its URL,
+    e.g. www.basketball-reference.com/players/e/edwaran01.html is saved as
+    www.basketball-reference.com__players__e__edwaran01.html.
+
+    Inputs:
+    url (str): web address of the page
+    fixtures_dir (str): directory of saved pages
+
+    Returns: str
+    '''
+    parsed_url = urlparse(url)
+    name = '__'.join(
+        [parsed_url.netloc] + [part for part in parsed_url.path.split('/') if part]
+    )
+    if parsed_url.query:
+        name += '__' + hashlib.sha1(parsed_url.query.encode('utf-8')).hexdigest()[:8]
+    if not name.endswith('.html'):
+        name += '.html'
+
+    return os.path.join(fixtures_dir, name)
+
+class RecordingAdapter(HTTPAdapter):
+    '''
+    Transport that downloads pages as usual and saves every successful
+    response body into a fixtures directory.
+
+    Inputs:
+    fixtures_dir (str): directory to save pages in
+    '''
+    def __init__(self, fixtures_dir=FIXTURES_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures_dir = fixtures_dir
+
+    def send(self, request, **kwargs):
+        r = super().send(request, **kwargs)
+        if r.status_code == 200:
+            write_atomic(get_fixture_path(request.url, self.fixtures_dir), r.content)
+
+        return r
+
+class ReplayAdapter(BaseAdapter):
+    '''
+    Transport that answers every request from pages saved by a
+    RecordingAdapter, and with a 404 for pages that weren't saved.
+
+    Inputs:
+    fixtures_dir (str): directory of saved pages
+    '''
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        super().__init__()
+        self.fixtures_dir = fixtures_dir
+
+    def send(self, request, **kwargs):
+        r = requests.Response()
+        r.url = request.url
+        r.request = request
+        try:
+            with open(get_fixture_path(request.url, self.fixtures_dir), 'rb') as f:
+                # a file-like body, so streamed requests read it in chunks
+                r.raw = io.BytesIO(f.read())
+            r.status_code = 200
+        except OSError:
+            r._content = b''
+            r.status_code = 404
+            r.reason = 'Not Recorded'
+
+        return r
+
+    def close(self):
+        pass
+
+def use_recording(fixtures_dir=FIXTURES_DIR):
+    '''
+    Save every page downloaded from now on into a fixtures directory. The
+    on-disk page cache is bypassed so every page is actually downloaded.
+
+    Inputs:
+    fixtures_dir (str): directory to save pages in
+    '''
+    global PAGE_CACHE_DIR
+    PAGE_CACHE_DIR = None
+    clear_memo()
+    set_session(make_session(RecordingAdapter(
+        fixtures_dir, pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE
+    )))
+
+def use_replay(fixtures_dir=FIXTURES_DIR):
+    '''
+    Serve every page from now on from a fixtures directory instead of the
+    network. The on-disk page cache is bypassed so replayed pages are never
+    mixed with live ones.
+
+    Inputs:
+    fixtures_dir (str): directory of saved pages
+    '''
+    global PAGE_CACHE_DIR
+    set_session(make_session(ReplayAdapter(fixtures_dir)))
+    PAGE_CACHE_DIR = None
+    clear_memo()
+
+def get_session():
+    '''
+    Get the shared session, creating it on first use.
+
+    Returns: requests.Session
+    '''
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+def set_session(session):
+    '''
+    Replace the shared session (e.g. with one mounted on a stubbed transport).
+
+    Inputs:
+    session (requests.Session): session to use for every subsequent download
+    '''
+    global _session
+    with _session_lock:
+        _session = session
+
+def get_host_semaphore(host):
+    '''
+    Get the semaphore capping in-flight requests to a host.
+
+    Inputs:
+    host (str): network location, e.g. www.basketball-reference.com
+
+    Returns: threading.BoundedSemaphore
+    '''
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(
+                MAX_REQUESTS_PER_HOST
+            )
+        return _host_semaphores[host]
+
+def count_cache_stat(name, n=1):
+    '''
+    Increment a page cache counter.
+
+    Inputs:
+    name (str): one of CACHE_STAT_NAMES
+    n (numeric): amount to add
+    '''
+    with _cache_stats_lock:
+        _cache_stats[name] += n
+    if not name.startswith(('bytes_', 'seconds_')):
+        metrics.count('page_cache_total', n, event=name)
+
+def get_cache_stats():
+    '''
+    Get a snapshot of the page cache counters.
+
+    Returns: dict
+    '''
+    with _cache_stats_lock:
+        return dict(_cache_stats)
+
+def reset_cache_stats():
+    '''
+    Zero the page cache counters.
+    '''
+    with _cache_stats_lock:
+        for name in CACHE_STAT_NAMES:
+            _cache_stats[name] = 0
+
+def clear_memo():
+    '''
+    Forget the pages fetched so far this run, so the next request for each
+    goes back to the disk cache and the server.
+    '''
+    with _memo_lock:
+        _memo.clear()
+
+def get_cache_path(kind, key, ext):
+    '''
+    Get the on-disk location for a cache entry.
+
+    Inputs:
+    kind (str): cache subdirectory, e.g. pages or parsed
+    key (str): anything uniquely identifying the entry
+    ext (str): file extension
+
+    Returns: str
+    '''
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(PAGE_CACHE_DIR, kind, f'{digest}.{ext}')
+
+def write_atomic(fp, data):
+    '''
+    Write bytes to a file without ever leaving a partial file in place.
+
+    Inputs:
+    fp (str): destination path
+    data (bytes): contents
+    '''
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    tmp_fp = f'{fp}.{threading.get_ident()}.tmp'
+    with open(tmp_fp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_fp, fp)
+
+def read_cached_page(url):
+    '''
+    Read a page's metadata and body from the disk cache.
+
+    Inputs:
+    url (str): web address of the page
+
+    Returns: tuple of dict (metadata) and bytes (body), or (None, None) if the
+        page isn't cached
+    '''
+    if PAGE_CACHE_DIR is None:
+        return None, None
+
+    meta_fp = get_cache_path('pages', url, 'json')
+    body_fp = get_cache_path('pages', url, 'html')
+    try:
+        with open(meta_fp, 'r') as f:
+            meta = json.load(f)
+        with open(body_fp, 'rb') as f:
+            content = f.read()
+    except (OSError, ValueError):
+        return None, None
+
+    return meta, content
+
+def write_cached_page(url, meta, content=None):
+    '''
+    Write a page's metadata and, if given, body to the disk cache.
+
+    Inputs:
+    url (str): web address of the page
+    meta (dict): validators, content hash, and fetch time
+    content (bytes): page body; omitted when only the metadata changed
+    '''
+    if PAGE_CACHE_DIR is None:
+        return
+
+    if content is not None:
+        write_atomic(get_cache_path('pages', url, 'html'), content)
+    write_atomic(
+        get_cache_path('pages', url, 'json'), json.dumps(meta).encode('utf-8')
+    )
+
+def make_cached_response(url, content, content_hash):
+    '''
+    Wrap a cached body in a response object.
+
+    Inputs:
+    url (str): web address of the page
+    content (bytes): page body
+    content_hash (str): sha1 of the body
+
+    Returns: requests.Response
+    '''
+    r = requests.Response()
+    r.status_code = 200
+    r.url = url
+    r._content = content
+    r.from_cache = True
+    r.content_hash = content_hash
+
+    return r
+
+def download_page(url, ttl):
+    '''
+    Get a page from the disk cache if it is fresh, revalidate it if it is
+    stale, and download it otherwise.
+
+    Inputs:
+    url (str): web address of the page
+    ttl (numeric): seconds a cached page is used without revalidating
+
+    Returns: requests.Response
+    '''
+    meta, content = read_cached_page(url)
+
+    if meta and time.time() - meta['fetched_at'] < ttl:
+        count_cache_stat('fresh_hits')
+        count_cache_stat('bytes_saved', len(content))
+        count_cache_stat('seconds_saved', meta['elapsed'])
+        return make_cached_response(url, content, meta['content_hash'])
+
+    headers = {}
+    if meta and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta and meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    session = get_session()
+    host = urlparse(url).netloc
+    with get_host_semaphore(host):
+        start = time.perf_counter()
+        r = session.get(url, headers=headers)
+        metrics.count(
+            'http_request_seconds_total', time.perf_counter() - start, host=host
+        )
+    metrics.count('http_requests_total', host=host, status=r.status_code)
+    metrics.count('http_response_bytes_total', len(r.content), host=host)
+
+    if r.status_code == 304 and meta:
+        count_cache_stat('revalidated')
+        count_cache_stat('bytes_saved', len(content))
+        meta['fetched_at'] = time.time()
+        write_cached_page(url, meta)
+        return make_cached_response(url, content, meta['content_hash'])
+
+    r.raise_for_status()
+    count_cache_stat('misses')
+    count_cache_stat('bytes_downloaded', len(r.content))
+
+    r.from_cache = False
+    r.content_hash = hashlib.sha1(r.content).hexdigest()
+    meta = {
+        'url': url,
+        'etag': r.headers.get('ETag'),
+        'last_modified': r.headers.get('Last-Modified'),
+        'content_hash': r.content_hash,
+        'fetched_at': time.time(),
+        'elapsed': r.elapsed.total_seconds() if r.elapsed else 0,
+    }
+    write_cached_page(url, meta, r.content)
+
+    return r
+
+def get_page(url, ttl=None):
+    '''
+    Download a page with the shared session, at most once per run.
+
+    Concurrent requests for the same URL wait on the first one rather than
+    issuing their own.
+
+    Inputs:
+    url (str): web address of the page
+    ttl (numeric): seconds a cached page is used without revalidating; 0 to
+        always revalidate; by default, PAGE_CACHE_TTL
+
+    Returns: requests.Response with from_cache and content_hash attributes
+    '''
+    if ttl is None:
+        ttl = PAGE_CACHE_TTL
+
+    with _memo_lock:
+        future = _memo.get(url)
+        is_owner = future is None
+        if is_owner:
+            future = _memo[url] = Future()
+
+    if not is_owner:
+        r = future.result()
+        if getattr(_parsing, 'url', None) != url:
+            count_cache_stat('memo_hits')
+            count_cache_stat('bytes_saved', len(r.content))
+        return r
+
+    try:
+        future.set_result(download_page(url, ttl))
+    except Exception as e:
+        # let a later call retry instead of replaying the failure
+        with _memo_lock:
+            del _memo[url]
+        future.set_exception(e)
+
+    return future.result()
+
+def get_stream_encoding(r):
+    '''
+    Get the encoding of a page body to decode it as it streams: the charset
+    the server sent, or UTF-8 (rather than requests' ISO-8859-1 default for
+    HTML without one).
+
+    Inputs:
+    r (requests.Response): response for the page
+
+    Returns: str
+    '''
+    if 'charset' in r.headers.get('Content-Type', ''):
+        return r.encoding
+
+    return 'utf-8'
+
+def iter_chunks(content, chunk_size):
+    '''
+    Split a page body already in memory into chunks, as if it were streaming.
+
+    Inputs:
+    content (bytes): page body
+    chunk_size (int): bytes per chunk
+
+    Returns: generator of bytes
+    '''
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+def stream_page(url, consume, chunk_size=STREAM_CHUNK_SIZE):
+    '''
+    Feed a page's body to a consumer chunk by chunk as it downloads, so the
+    consumer can stop reading (and the download stops) before the body ends,
+    without the whole body ever being held in memory.
+
+    A page already downloaded this run, or fresh in the disk cache, is fed
+    from memory instead. Streamed pages aren't added to either, since they
+    may not have been read to the end.
+
+    Inputs:
+    url (str): web address of the page
+    consume (function): takes an iterator of bytes chunks and the body's
+        encoding, and returns a result
+    chunk_size (int): bytes per chunk
+
+    Returns: the result of consume
+    '''
+    with _memo_lock:
+        future = _memo.get(url)
+    if future is not None:
+        r = future.result()
+        count_cache_stat('memo_hits')
+        count_cache_stat('bytes_saved', len(r.content))
+        return consume(iter_chunks(r.content, chunk_size), get_stream_encoding(r))
+
+    meta, content = read_cached_page(url)
+    if meta and time.time() - meta['fetched_at'] < PAGE_CACHE_TTL:
+        count_cache_stat('fresh_hits')
+        count_cache_stat('bytes_saved', len(content))
+        count_cache_stat('seconds_saved', meta['elapsed'])
+        return consume(iter_chunks(content, chunk_size), 'utf-8')
+
+    session = get_session()
+    host = urlparse(url).netloc
+    n_bytes = 0
+
+    def read_chunks(r):
+        nonlocal n_bytes
+        for chunk in r.iter_content(chunk_size):
+            n_bytes += len(chunk)
+            yield chunk
+
+    with get_host_semaphore(host):
+        start = time.perf_counter()
+        r = session.get(url, stream=True)
+        try:
+            metrics.count('http_requests_total', host=host, status=r.status_code)
+            r.raise_for_status()
+            count_cache_stat('misses')
+            result = consume(read_chunks(r), get_stream_encoding(r))
+        finally:
+            r.close()
+            metrics.count(
+                'http_request_seconds_total', time.perf_counter() - start,
+                host=host
+            )
+    metrics.count('http_response_bytes_total', n_bytes, host=host)
+    count_cache_stat('bytes_downloaded', n_bytes)
+
+    return result
+
+def get_parse_key(fxn, url, args, kwargs):
+    '''
+    Build the parse cache key for a scraper call from its URL and explicit
+    arguments. Functions among the arguments (e.g. casts) are keyed by where
+    they're defined.
+
+    Inputs:
+    fxn (function): scraper
+    url (str): web address the scraper parses
+    args (tuple): the scraper's other positional arguments
+    kwargs (dict): the scraper's keyword arguments
+
+    Returns: str, or None if an argument has no stable name (e.g. a lambda)
+    '''
+    def name_arg(arg):
+        qualname = getattr(arg, '__qualname__', '<')
+        if callable(arg) and '<' not in qualname:
+            return f'{arg.__module__}.{qualname}'
+        if isinstance(arg, (set, frozenset)):
+            return sorted(arg)
+        raise TypeError(f'No stable cache key for {arg!r}')
+
+    try:
+        return json.dumps(
+            [fxn.__module__, fxn.__qualname__, url, args, sorted(kwargs.items())],
+            default=name_arg
+        )
+    except (TypeError, ValueError):
+        return None
+
+def dump_parsed(content_hash, result):
+    '''
+    Serialise a scraper's result for the parse cache as JSON, so reading the
+    cache back never runs code. DataFrames are stored by row with their dtypes.
+
+    Inputs:
+    content_hash (str): hash of the page body the result was parsed from
+    result: JSON-serialisable value or pd.DataFrame
+
+    Returns: bytes; raises TypeError if the result can't be stored
+    '''
+    entry = {'content_hash': content_hash}
+    if type(result).__name__ == 'DataFrame':
+        entry['dataframe'] = {
+            **result.to_dict(orient='split'),
+            'dtypes': result.dtypes.astype(str).tolist(),
+        }
+    else:
+        entry['value'] = result
+
+    return json.dumps(entry).encode('utf-8')
+
+def load_parsed(data):
+    '''
+    Read back a result written by dump_parsed(...).
+
+    Inputs:
+    data (bytes): contents of the cache entry
+
+    Returns: tuple of str (content hash) and the result
+    '''
+    entry = json.loads(data)
+    if 'dataframe' not in entry:
+        return entry['content_hash'], entry['value']
+
+    import pandas as pd
+
+    frame = entry['dataframe']
+    df = pd.DataFrame(
+        frame['data'], index=frame['index'], columns=frame['columns']
+    ).astype(dict(zip(frame['columns'], frame['dtypes'])))
+
+    return entry['content_hash'], df
+
+def cache_parsed(fxn):
+    '''
+    Decorate a scraper whose first argument is a URL so its result is cached on
+    disk against the page body it was parsed from. When the page hasn't
+    changed, the stored result is returned without parsing. Results are
+    stored as JSON and keyed on the URL and the scraper's arguments; calls
+    with an argument that can't be keyed (e.g. a lambda) aren't cached.
+
+    Inputs:
+    fxn (function): scraper that calls get_page on its url argument
+
+    Returns: function
+    '''
+    def timed_fxn(url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fxn(url, *args, **kwargs)
+        finally:
+            metrics.count(
+                'parse_seconds_total', time.perf_counter() - start,
+                scraper=fxn.__name__
+            )
+            metrics.count('parses_total', scraper=fxn.__name__)
+
+    @functools.wraps(fxn)
+    def wrapper(url, *args, **kwargs):
+        key = get_parse_key(fxn, url, args, kwargs)
+        if PAGE_CACHE_DIR is None or key is None:
+            return timed_fxn(url, *args, **kwargs)
+
+        r = get_page(url)
+        fp = get_cache_path('parsed', key, 'json')
+
+        try:
+            with open(fp, 'rb') as f:
+                content_hash, result = load_parsed(f.read())
+            if content_hash == r.content_hash:
+                count_cache_stat('parse_hits')
+                return result
+        except (OSError, KeyError, TypeError, ValueError):
+            pass
+
+        count_cache_stat('parse_misses')
+        _parsing.url = url
+        try:
+            result = timed_fxn(url, *args, **kwargs)
+        finally:
+            _parsing.url = None
+        try:
+            write_atomic(fp, dump_parsed(r.content_hash, result))
+        except (OSError, TypeError, ValueError):
+            pass
+
+        return result
+
+    return wrapper
+
+def run_concurrently(tasks, max_workers=MAX_WORKERS):
+    '''
+    Start each task on a thread pool without waiting for any to finish.
+
+    Inputs:
+    tasks (dict): maps a task name to a tuple of a function followed by its
+        positional arguments
+    max_workers (int): maximum number of tasks to run at once
+
+    Returns: dict mapping each task name to a concurrent.futures.Future; calling
+        .result() re-raises any exception from the task
+    '''
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {
+        name: executor.submit(fxn, *args)
+        for name, (fxn, *args) in tasks.items()
+    }
+    executor.shutdown(wait=False)
+
+    return futures
@@ -14,10 +14,15 @@ service_key_dict = {
                     "client_x509_cert_url": os.environ['GKEY_CLIENT_X509_CERT_URL'],
                    }
 
-spreadsheet_dict = {
-                    'sheet_id': os.environ['SHEET_ID'],
-                    'responses_ws_name': os.environ['RESPONSE_WS_NAME']
-                   }
+# POOLS holds a JSON list of pools (name, sheet_id, responses_ws_name) to
+# update several spreadsheets in one run
+if os.environ.get('POOLS'):
+    spreadsheet_dict = {'pools': json.loads(os.environ['POOLS'])}
+else:
+    spreadsheet_dict = {
+                        'sheet_id': os.environ['SHEET_ID'],
+                        'responses_ws_name': os.environ['RESPONSE_WS_NAME']
+                       }
 
 with open('service_key.json', 'w') as f:
     json.dump(service_key_dict, f)
@@ -0,0 +1,327 @@
+'''
+History
+Nightly snapshots of the standings, tiebreaker values, and entrant scores,
+kept locally so season-long trends never need the source sites again.
+
+Each dataset is partitioned by date, one file per day in the picks store's
+format (Parquet, or pickles with a warning if pyarrow isn't installed), with
+compact dtypes: categories for names and small ints and float32s for numbers.
+Each file's extension records its format, so snapshots saved in either format
+are read back the same way. A later run on the same day replaces that day's
+snapshot.
+'''
+
+import glob
+import os
+from datetime import date
+
+import pandas as pd
+
+import picks_store
+
+HISTORY_DIR = '.history' # None to keep no history
+
+DATASETS = ['standings', 'tiebreakers', 'scores']
+
+COMPACT_DTYPES = {
+    'standings': {
+        'Conference': 'category', 'Rank': 'int8', 'Team': 'category',
+        'Wins': 'int16', 'Losses': 'int16', 'PCT': 'float32', 'GB': 'float32',
+        'Playoff Points': 'int8',
+    },
+    'tiebreakers': {
+        'Tiebreaker #': 'int8', 'Tiebreaker Description': 'category',
+        'Tiebreaker Value': 'float32',
+    },
+    'scores': {
+        'Place': 'int32', 'Name': 'category', 'Picks Source': 'category',
+        'Rank Points': 'float32', 'Playoff Points': 'float32',
+        'Total Points': 'float32',
+    },
+}
+
+def get_partition_path(dataset, day, history_dir, store_format=None):
+    '''
+    Get where one day's snapshot of a dataset is saved.
+
+    Inputs:
+    dataset (str): one of DATASETS
+    day (datetime.date): date of the snapshot
+    history_dir (str): directory of the history
+    store_format (str): format of the snapshot; by default,
+        picks_store.STORE_FORMAT
+
+    Returns: str
+    '''
+    store_format = store_format or picks_store.STORE_FORMAT
+
+    return os.path.join(
+        history_dir, dataset, f'date={day.isoformat()}', f'part.{store_format}'
+    )
+
+def find_partition(dataset, day, history_dir):
+    '''
+    Find one day's snapshot of a dataset in a format that can be read here.
+
+    Inputs:
+    dataset (str): one of DATASETS
+    day (datetime.date): date of the snapshot
+    history_dir (str): directory of the history
+
+    Returns: tuple of str (path) and str (format), or (None, None)
+    '''
+    for store_format in picks_store.READABLE_FORMATS:
+        fp = get_partition_path(dataset, day, history_dir, store_format)
+        if os.path.exists(fp):
+            return fp, store_format
+
+    return None, None
+
+def compact(dataset, df):
+    '''
+    Cast a snapshot to the dataset's compact dtypes. Columns without a
+    compact dtype (e.g. tiebreaker differences) are stored as float32.
+
+    Inputs:
+    dataset (str): one of DATASETS
+    df (pd.DataFrame): snapshot
+
+    Returns: pd.DataFrame
+    '''
+    dtypes = {
+        col: COMPACT_DTYPES[dataset].get(col, 'float32') for col in df.columns
+    }
+
+    return df.astype(dtypes)
+
+def make_standings_snapshot(standings_df):
+    '''
+    Prepare the standings for the history, splitting W-L into numbers.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings from get_standings(...)
+
+    Returns: pd.DataFrame
+    '''
+    df = standings_df.reset_index(drop=True)
+    wins_losses = df['W-L'].str.extract(r'^(\d+)-(\d+)$').astype(int)
+    df['Wins'], df['Losses'] = wins_losses[0], wins_losses[1]
+
+    return df.drop('W-L', axis=1)
+
+def make_tiebreakers_snapshot(tiebreakers):
+    '''
+    Prepare the tiebreaker values for the history.
+
+    Inputs:
+    tiebreakers (dict): tuple of description and value of each tiebreaker by
+        number; None for values that couldn't be scraped
+
+    Returns: pd.DataFrame
+    '''
+    return pd.DataFrame(
+        [
+            {'Tiebreaker #': n, 'Tiebreaker Description': desc,
+             'Tiebreaker Value': float('nan') if value is None else value}
+            for n, (desc, value) in tiebreakers.items()
+        ],
+        columns=list(COMPACT_DTYPES['tiebreakers'])
+    )
+
+def make_scores_snapshot(leaderboard_df):
+    '''
+    Prepare the leaderboard for the history, with blank cells as NaN.
+
+    Inputs:
+    leaderboard_df (pd.DataFrame): from scoring.make_leaderboard(...)
+
+    Returns: pd.DataFrame
+    '''
+    df = leaderboard_df.reset_index(drop=True)
+    number_cols = [col for col in df.columns if col not in {'Name', 'Picks Source'}]
+    df[number_cols] = df[number_cols].apply(pd.to_numeric, errors='coerce')
+
+    return df
+
+def append_snapshot(
+    day, standings_df=None, tiebreakers=None, leaderboard_df=None,
+    history_dir=None
+):
+    '''
+    Save one run's standings, tiebreaker values, and entrant scores as the
+    day's snapshot, skipping any that weren't produced this run.
+
+    Inputs:
+    day (datetime.date): date of the run
+    standings_df (pd.DataFrame): standings from get_standings(...)
+    tiebreakers (dict): tuple of description and value of each tiebreaker by
+        number
+    leaderboard_df (pd.DataFrame): from scoring.make_leaderboard(...)
+    history_dir (str): directory of the history; by default, HISTORY_DIR
+
+    Returns: list of str, the datasets saved
+    '''
+    history_dir = history_dir or HISTORY_DIR
+    if history_dir is None:
+        return []
+
+    snapshots = {}
+    if standings_df is not None:
+        snapshots['standings'] = make_standings_snapshot(standings_df)
+    if tiebreakers is not None:
+        snapshots['tiebreakers'] = make_tiebreakers_snapshot(tiebreakers)
+    if leaderboard_df is not None:
+        snapshots['scores'] = make_scores_snapshot(leaderboard_df)
+
+    for dataset, df in snapshots.items():
+        picks_store.write_frame(
+            compact(dataset, df), get_partition_path(dataset, day, history_dir)
+        )
+        # drop the day's snapshot saved in another format, if any
+        for store_format in picks_store.READABLE_FORMATS:
+            if store_format != picks_store.STORE_FORMAT:
+                fp = get_partition_path(dataset, day, history_dir, store_format)
+                if os.path.exists(fp):
+                    os.remove(fp)
+
+    return list(snapshots)
+
+def list_dates(dataset, history_dir=None):
+    '''
+    List the dates with a snapshot of a dataset.
+
+    Inputs:
+    dataset (str): one of DATASETS
+    history_dir (str): directory of the history; by default, HISTORY_DIR
+
+    Returns: list of datetime.date, oldest first
+    '''
+    history_dir = history_dir or HISTORY_DIR
+    if history_dir is None:
+        return []
+
+    fps = [
+        fp for store_format in picks_store.READABLE_FORMATS
+        for fp in glob.glob(os.path.join(
+            history_dir, dataset, 'date=*', f'part.{store_format}'
+        ))
+    ]
+
+    return sorted({
+        date.fromisoformat(os.path.basename(os.path.dirname(fp))[len('date='):])
+        for fp in fps
+    })
+
+def read_history(
+    dataset, start=None, end=None, columns=None, history_dir=None
+):
+    '''
+    Read a dataset's snapshots between two dates, memory-mapping each day's
+    file, into one dataframe with a Date column.
+
+    Inputs:
+    dataset (str): one of DATASETS
+    start (datetime.date): first date to include; by default, the first
+    end (datetime.date): last date to include; by default, the latest
+    columns (list of str): columns to keep; by default, all
+    history_dir (str): directory of the history; by default, HISTORY_DIR
+
+    Returns: pd.DataFrame
+    '''
+    history_dir = history_dir or HISTORY_DIR
+    days = [
+        day for day in list_dates(dataset, history_dir)
+        if (start is None or day >= start) and (end is None or day <= end)
+    ]
+
+    dfs = []
+    for day in days:
+        fp, store_format = find_partition(dataset, day, history_dir)
+        df = picks_store.read_frame(
+            fp, memory_map=True, store_format=store_format
+        )
+        if columns is not None:
+            df = df.loc[:, [col for col in columns if col in df.columns]]
+        dfs.append(df.assign(Date=pd.Timestamp(day)))
+
+    if not dfs:
+        return pd.DataFrame(columns=['Date'] + list(columns or []))
+
+    df = pd.concat(dfs, ignore_index=True)
+    # categories differ day to day, so concat falls back to object columns
+    category_cols = [
+        col for col, dtype in COMPACT_DTYPES[dataset].items()
+        if dtype == 'category' and col in df.columns
+    ]
+
+    return df.astype({col: 'category' for col in category_cols})
+
+def get_team_history(team, start=None, end=None, history_dir=None):
+    '''
+    Get a team's rank and record on every date.
+
+    Inputs:
+    team (str): full team name, e.g. Golden State Warriors
+    start/end (datetime.date): dates to include
+    history_dir (str): directory of the history; by default, HISTORY_DIR
+
+    Returns: pd.DataFrame
+    '''
+    df = read_history('standings', start, end, history_dir=history_dir)
+    if df.empty:
+        return df
+
+    return (
+        df.loc[df['Team'] == team, ['Date', 'Rank', 'Wins', 'Losses', 'PCT', 'GB']]
+        .reset_index(drop=True)
+    )
+
+def get_entrant_history(name, start=None, end=None, history_dir=None):
+    '''
+    Get an entrant's points and place on every date.
+
+    Inputs:
+    name (str): entrant's name
+    start/end (datetime.date): dates to include
+    history_dir (str): directory of the history; by default, HISTORY_DIR
+
+    Returns: pd.DataFrame
+    '''
+    df = read_history('scores', start, end, history_dir=history_dir)
+    if df.empty:
+        return df
+
+    return (
+        df.loc[
+            df['Name'] == name,
+            ['Date', 'Place', 'Rank Points', 'Playoff Points', 'Total Points']
+        ]
+        .reset_index(drop=True)
+    )
+
+def get_trend_table(dataset, row_col, value_col, history_dir=None):
+    '''
+    Pivot a dataset into one row per team or entrant and one column per date,
+    for a season-long trend tab.
+
+    Inputs:
+    dataset (str): one of DATASETS
+    row_col (str): column to make rows of, e.g. Team
+    value_col (str): column to fill the table with, e.g. Rank
+    history_dir (str): directory of the history; by default, HISTORY_DIR
+
+    Returns: pd.DataFrame, dates as YYYY-MM-DD column names
+    '''
+    df = read_history(
+        dataset, columns=[row_col, value_col], history_dir=history_dir
+    )
+    if df.empty:
+        return pd.DataFrame(columns=[row_col])
+
+    table = df.pivot_table(
+        index=row_col, columns='Date', values=value_col, aggfunc='first',
+        observed=True
+    )
+    table.columns = [day.strftime('%Y-%m-%d') for day in table.columns]
+
+    return table.reset_index()
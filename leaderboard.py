@@ -0,0 +1,385 @@
+'''
+Leaderboard
+Pool leaderboard kept up to date as the standings change, rescoring only the
+entrants whose picks a change touches.
+
+An inverted index maps each team to the standings picks of that team, keyed
+by Team alone as scoring.score_standings_picks(...) looks them up, so when the
+standings move only those picks are rescored and only the entrants whose
+totals changed are moved in the sorted leaderboard. The same
+index answers "what if this team finished in that place" queries by applying
+the hypothetical standings, reading the leaderboard, and putting the real
+standings back.
+'''
+
+import bisect
+
+import numpy as np
+import pandas as pd
+
+import scoring
+import standings_engine
+
+ENTRANT_COLS = ['Email', 'Name', 'Picks Source']
+
+# share of entrants moving at which the leaderboard is sorted again from
+# scratch instead of moving each entrant into place
+RESORT_FRACTION = 0.05
+
+class LeaderboardIndex:
+    '''
+    Standings picks indexed by Team, with each entrant's points
+    and the leaderboard sorted the way scoring.make_leaderboard(...) sorts it.
+    '''
+    def __init__(self):
+        self.picks_df = None
+        self.entrants_df = pd.DataFrame(columns=ENTRANT_COLS)
+        self.rows_by_team = {} # team -> positions of its picks
+        self.row_entrants = np.zeros(0, dtype=int)
+        self.picks_rank = np.zeros(0)
+        self.standings = {} # team -> (rank, playoff points)
+        self.conferences = {} # team -> conference, for what-if queries
+        self.tiebreakers_df = None
+        self.differences = np.zeros((0, 0))
+        self.tiebreaker_cols = []
+        self.reset_points()
+
+    def reset_points(self):
+        '''
+        Forget the scores of every pick, as if no team were in the standings.
+        '''
+        n_rows = len(self.row_entrants)
+        n_entrants = len(self.entrants_df)
+        self.standings_rank = np.full(n_rows, np.nan)
+        self.rank_points = np.full(n_rows, np.nan)
+        self.playoff_points = np.full(n_rows, np.nan)
+        self.rank_points_sums = np.zeros(n_entrants)
+        self.playoff_points_sums = np.zeros(n_entrants)
+        self.n_scored = np.zeros(n_entrants, dtype=int) # picks with a score
+        self.keys = self.get_sort_keys(range(n_entrants))
+        self.order = sorted(self.keys)
+
+    def set_picks(self, standings_picks_df):
+        '''
+        Index a pool's standings picks, unless they're the picks already
+        indexed, and score them against the current standings.
+
+        Inputs:
+        standings_picks_df (pd.DataFrame): standings picks, from
+            parse_picks_ws(...) or picks_store.read_picks(...)
+
+        Returns: bool, True if the picks were indexed again
+        '''
+        if self.picks_df is not None and self.picks_df.equals(standings_picks_df):
+            return False
+
+        self.picks_df = standings_picks_df.reset_index(drop=True)
+        # entrants in the order they first appear, as make_leaderboard groups;
+        # -1 for picks without an entrant (missing Email, Name, or Picks
+        # Source), which newer pandas numbers NaN
+        entrant_ids = self.picks_df.groupby(
+            ENTRANT_COLS, sort=False
+        ).ngroup().fillna(-1).to_numpy(dtype=int)
+        self.entrants_df = (
+            self.picks_df.loc[entrant_ids >= 0, ENTRANT_COLS]
+            .drop_duplicates()
+            .reset_index(drop=True)
+        )
+        self.row_entrants = entrant_ids
+        self.picks_rank = self.picks_df['Picks Rank'].to_numpy(dtype=float)
+        self.rows_by_team = self.picks_df.groupby('Team', sort=False).indices
+        self.differences = self.get_differences(self.tiebreakers_df)
+
+        standings, self.standings = self.standings, {}
+        self.reset_points()
+        self.apply_standings(standings)
+
+        return True
+
+    def get_differences(self, scored_tiebreaker_picks_df):
+        '''
+        Line up each entrant's tiebreaker differences with the index's
+        entrants, setting tiebreaker_cols to their leaderboard columns.
+
+        Inputs:
+        scored_tiebreaker_picks_df (pd.DataFrame): from
+            scoring.score_tiebreaker_picks(...), or None
+
+        Returns: np.ndarray, entrants x tiebreakers
+        '''
+        if scored_tiebreaker_picks_df is None:
+            self.tiebreaker_cols = []
+            return np.zeros((len(self.entrants_df), 0))
+
+        differences_df = (
+            scored_tiebreaker_picks_df
+            .groupby(ENTRANT_COLS + ['Tiebreaker #'])
+            ['Difference']
+            .first()
+            .unstack('Tiebreaker #')
+        )
+        self.tiebreaker_cols = [
+            f'Tiebreaker #{n} Difference' for n in differences_df.columns
+        ]
+        differences_df = differences_df.reindex(
+            pd.MultiIndex.from_frame(self.entrants_df)
+        )
+
+        return differences_df.to_numpy(dtype=float)
+
+    def set_tiebreakers(self, scored_tiebreaker_picks_df):
+        '''
+        Set every entrant's tiebreaker differences, sorting the leaderboard
+        again if any changed.
+
+        Inputs:
+        scored_tiebreaker_picks_df (pd.DataFrame): from
+            scoring.score_tiebreaker_picks(...)
+
+        Returns: bool, True if any difference changed
+        '''
+        tiebreaker_cols = self.tiebreaker_cols
+        differences = self.get_differences(scored_tiebreaker_picks_df)
+        self.tiebreakers_df = scored_tiebreaker_picks_df
+        if (
+            tiebreaker_cols == self.tiebreaker_cols and
+            np.array_equal(differences, self.differences, equal_nan=True)
+        ):
+            return False
+
+        self.differences = differences
+        self.keys = self.get_sort_keys(range(len(self.entrants_df)))
+        self.order = sorted(self.keys)
+
+        return True
+
+    def set_standings(self, standings_df):
+        '''
+        Rescore the picks of every team whose rank or playoff points changed.
+
+        Inputs:
+        standings_df (pd.DataFrame): standings from get_standings(...)
+
+        Returns: int, entrants whose points changed
+        '''
+        # a team listed twice is scored by its first row, as in
+        # scoring.score_standings_picks(...)
+        standings_df = standings_df.drop_duplicates('Team')
+        standings = {
+            team: (float(rank), float(playoff_points))
+            for team, rank, playoff_points in standings_df[
+                ['Team', 'Rank', 'Playoff Points']
+            ].itertuples(index=False)
+        }
+        self.conferences = dict(
+            zip(standings_df['Team'], standings_df['Conference'])
+        )
+
+        return self.apply_standings(standings)
+
+    def apply_standings(self, standings):
+        '''
+        Rescore the picks of every team whose place in the standings changed
+        and move the entrants whose points changed.
+
+        Inputs:
+        standings (dict): rank and playoff points by team
+
+        Returns: int, entrants whose points changed
+        '''
+        changed = [
+            key for key in self.rows_by_team
+            if standings.get(key) != self.standings.get(key)
+        ]
+        self.standings = standings
+        if not changed:
+            return 0
+
+        rows = np.concatenate([self.rows_by_team[key] for key in changed])
+        old_rank_points = self.rank_points[rows]
+        old_playoff_points = self.playoff_points[rows]
+        for key in changed:
+            rank, playoff_points = standings.get(key, (np.nan, np.nan))
+            self.standings_rank[self.rows_by_team[key]] = rank
+            self.playoff_points[self.rows_by_team[key]] = playoff_points
+        self.rank_points[rows] = scoring.get_rank_points(
+            self.picks_rank[rows], self.standings_rank[rows]
+        )
+
+        # add each changed pick's difference to its entrant's sums, skipping
+        # picks without an entrant (missing Email, Name, or Picks Source)
+        is_entrant = self.row_entrants[rows] >= 0
+        entrants = self.row_entrants[rows][is_entrant]
+        n_entrants = len(self.entrants_df)
+        get_deltas = lambda old, new: np.bincount(
+            entrants,
+            weights=(np.nan_to_num(new) - np.nan_to_num(old))[is_entrant],
+            minlength=n_entrants
+        )
+        rank_deltas = get_deltas(old_rank_points, self.rank_points[rows])
+        playoff_deltas = get_deltas(old_playoff_points, self.playoff_points[rows])
+        scored_deltas = get_deltas(
+            np.isnan(old_rank_points).astype(float),
+            np.isnan(self.rank_points[rows]).astype(float)
+        ).astype(int)
+        self.rank_points_sums += rank_deltas
+        self.playoff_points_sums += playoff_deltas
+        self.n_scored -= scored_deltas
+
+        moved = np.flatnonzero(
+            (rank_deltas + playoff_deltas != 0) | (scored_deltas != 0)
+        )
+        self.move_entrants(moved)
+
+        return len(moved)
+
+    def move_entrants(self, entrants):
+        '''
+        Move entrants whose totals changed to their new places.
+
+        Inputs:
+        entrants (array-like of int): positions of the entrants
+        '''
+        new_keys = self.get_sort_keys(entrants)
+        if len(entrants) > RESORT_FRACTION * len(self.keys):
+            for i, key in zip(entrants, new_keys):
+                self.keys[i] = key
+            self.order = sorted(self.keys)
+            return
+
+        for i, key in zip(entrants, new_keys):
+            del self.order[bisect.bisect_left(self.order, self.keys[i])]
+            self.keys[i] = key
+            bisect.insort(self.order, key)
+
+    def get_total_points(self, entrants):
+        '''
+        Get entrants' Rank Points, Playoff Points, and Total Points.
+
+        Inputs:
+        entrants (array-like of int): positions of the entrants
+
+        Returns: np.ndarray, entrants x 3, NaN for an entrant none of whose
+            picks is scored
+        '''
+        entrants = np.asarray(entrants, dtype=int)
+        points = np.column_stack([
+            self.rank_points_sums[entrants],
+            self.playoff_points_sums[entrants],
+            self.rank_points_sums[entrants] + self.playoff_points_sums[entrants],
+        ])
+        points[self.n_scored[entrants] == 0] = np.nan
+
+        return points
+
+    def get_sort_keys(self, entrants):
+        '''
+        Get the keys entrants are sorted by: most Total Points, then smallest
+        tiebreaker differences, missing values last, then first entered.
+
+        Inputs:
+        entrants (array-like of int): positions of the entrants
+
+        Returns: list of tuples
+        '''
+        entrants = np.asarray(entrants, dtype=int)
+        values = np.column_stack([
+            -self.get_total_points(entrants)[:, 2],
+            self.differences[entrants],
+        ])
+        is_missing = np.isnan(values)
+        values = np.where(is_missing, 0.0, values)
+
+        key_cols = []
+        for j in range(values.shape[1]):
+            key_cols += [is_missing[:, j].tolist(), values[:, j].tolist()]
+
+        return list(zip(*key_cols, entrants.tolist()))
+
+    def get_scored_picks(self):
+        '''
+        Get the standings picks with their scores, as
+        scoring.score_standings_picks(...) returns them.
+
+        Returns: pd.DataFrame
+        '''
+        scored_df = self.picks_df.copy(deep=True)
+        scored_df['Standings Rank'] = self.standings_rank
+        scored_df['Rank Points'] = self.rank_points
+        scored_df['Playoff Points'] = self.playoff_points
+        scored_df['Total Points'] = self.rank_points + self.playoff_points
+
+        return scored_df
+
+    def get_leaderboard(self, top=None):
+        '''
+        Get the leaderboard, as scoring.make_leaderboard(...) returns it.
+
+        Inputs:
+        top (int): number of entrants to include from the top; by default,
+            every entrant
+
+        Returns: pd.DataFrame
+        '''
+        order = self.order[:top]
+        entrants = [key[-1] for key in order]
+
+        # each entrant takes the place of the first entrant they're tied with
+        places = []
+        for position, key in enumerate(order, 1):
+            is_tied = position > 1 and key[:-1] == order[position - 2][:-1]
+            places.append(places[-1] if is_tied else position)
+
+        leaderboard_df = self.entrants_df.iloc[entrants].reset_index(drop=True)
+        points = self.get_total_points(entrants)
+        leaderboard_df['Rank Points'] = points[:, 0]
+        leaderboard_df['Playoff Points'] = points[:, 1]
+        leaderboard_df['Total Points'] = points[:, 2]
+        for j, col in enumerate(self.tiebreaker_cols):
+            leaderboard_df[col] = self.differences[entrants, j]
+        leaderboard_df['Place'] = np.array(places, dtype='int64')
+
+        return leaderboard_df[scoring.LEADERBOARD_COLS + self.tiebreaker_cols]
+
+    def what_if(self, team, rank, top=None):
+        '''
+        Get the leaderboard as it would be if a team finished at a rank, the
+        rest of its conference keeping their order, then put the current
+        standings back.
+
+        Inputs:
+        team (str): the team
+        rank (int): the rank it finishes at
+        top (int): number of entrants to include from the top; by default,
+            every entrant
+
+        Returns: pd.DataFrame
+        '''
+        if team not in self.standings:
+            raise KeyError(f'{team} not in the standings')
+        conference = self.conferences[team]
+        teams = [
+            other_team for _, other_team in sorted(
+                (standing[0], other_team)
+                for other_team, standing in self.standings.items()
+                if other_team != team and
+                self.conferences[other_team] == conference
+            )
+        ]
+        if not 1 <= rank <= len(teams) + 1:
+            raise ValueError(f'{conference} ranks run from 1 to {len(teams) + 1}')
+        teams.insert(rank - 1, team)
+
+        standings = dict(self.standings)
+        for new_rank, new_team in enumerate(teams, 1):
+            standings[new_team] = (
+                float(new_rank),
+                float(standings_engine.PLAYOFF_POINTS[new_rank - 1])
+            )
+
+        current = self.standings
+        self.apply_standings(standings)
+        try:
+            return self.get_leaderboard(top)
+        finally:
+            self.apply_standings(current)
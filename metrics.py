@@ -0,0 +1,229 @@
+'''
+Metrics
+Timers and counters for every run, written as JSON and as a Prometheus
+textfile so latency and call-volume regressions show up in monitoring.
+
+Every metric has a fixed name and type from METRICS and any number of labels
+(stage, pool, host, ...). Stage timers and run gauges hold the latest run's
+values; counters add up until reset(), which each run does first. Files are
+only written when METRICS_JSON_FP or METRICS_PROM_FP is set.
+'''
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+METRICS_JSON_FP = None # None to not write JSON metrics
+METRICS_PROM_FP = None # None to not write a Prometheus textfile
+
+PREFIX = 'nba_sheets_'
+
+# metric name (without PREFIX) -> Prometheus type and help text
+METRICS = {
+    'stage_seconds': ('gauge', 'Seconds each stage took on the latest run'),
+    'stage_success': ('gauge', '1 if the stage succeeded on the latest run'),
+    'run_seconds': ('gauge', 'Seconds the latest run took'),
+    'run_timestamp_seconds': ('gauge', 'Unix time the latest run finished'),
+    'pools_failed': ('gauge', 'Pools that failed on the latest run'),
+    'http_requests_total': ('counter', 'HTTP requests to the source sites'),
+    'http_request_seconds_total': (
+        'counter', 'Seconds spent on HTTP requests to the source sites'
+    ),
+    'http_response_bytes_total': (
+        'counter', 'Bytes downloaded from the source sites'
+    ),
+    'page_cache_total': ('counter', 'Page cache events by kind'),
+    'standings_source_total': (
+        'counter', 'Standings sources asked, hedged, failed, and used'
+    ),
+    'parse_seconds_total': ('counter', 'Seconds spent parsing pages'),
+    'parses_total': ('counter', 'Pages parsed'),
+    'sheets_api_calls_total': ('counter', 'Google Sheets API calls'),
+    'sheets_api_seconds_total': (
+        'counter', 'Seconds spent on Google Sheets API calls'
+    ),
+    'sheets_api_retries_total': (
+        'counter', 'Google Sheets API calls retried after an error'
+    ),
+    'sheets_api_throttle_seconds_total': (
+        'counter', 'Seconds Google Sheets API calls waited for the request budget'
+    ),
+    'sheets_api_request_bytes_total': (
+        'counter', 'Bytes sent to the Google Sheets API'
+    ),
+    'sheets_api_response_bytes_total': (
+        'counter', 'Bytes received from the Google Sheets API'
+    ),
+}
+
+_values = {}
+_lock = threading.Lock()
+
+def get_key(name, labels):
+    '''
+    Get the registry key of a metric and its labels.
+
+    Inputs:
+    name (str): one of METRICS
+    labels (dict): label values by label name
+
+    Returns: tuple
+    '''
+    if name not in METRICS:
+        raise KeyError(f'Unknown metric: {name}')
+
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def count(name, n=1, **labels):
+    '''
+    Add to a counter.
+
+    Inputs:
+    name (str): one of METRICS
+    n (numeric): amount to add
+    labels: label values
+    '''
+    key = get_key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0) + n
+
+def set_value(name, value, **labels):
+    '''
+    Set a gauge.
+
+    Inputs:
+    name (str): one of METRICS
+    value (numeric): new value
+    labels: label values
+    '''
+    key = get_key(name, labels)
+    with _lock:
+        _values[key] = value
+
+@contextlib.contextmanager
+def timer(stage, **labels):
+    '''
+    Time a stage for the duration of a with block, recording whether it
+    raised.
+
+    Inputs:
+    stage (str): name of the stage
+    labels: other label values, e.g. pool
+    '''
+    start = time.perf_counter()
+    success = 0
+    try:
+        yield
+        success = 1
+    finally:
+        set_value(
+            'stage_seconds', time.perf_counter() - start, stage=stage, **labels
+        )
+        set_value('stage_success', success, stage=stage, **labels)
+
+def record_stages(update_timestamps, stage_durations, **labels):
+    '''
+    Record the stages a run already timed for its Last Updated tab.
+
+    Inputs:
+    update_timestamps (dict): when each stage succeeded; None if it failed
+    stage_durations (dict): seconds each stage took
+    labels: other label values, e.g. pool
+    '''
+    for stage, timestamp in update_timestamps.items():
+        set_value('stage_success', int(timestamp is not None), stage=stage, **labels)
+        if stage in stage_durations:
+            set_value(
+                'stage_seconds', stage_durations[stage], stage=stage, **labels
+            )
+
+def reset():
+    '''
+    Forget every metric, at the start of a run.
+    '''
+    with _lock:
+        _values.clear()
+
+def get_metrics():
+    '''
+    List every metric's current value.
+
+    Returns: list of dicts of name (with PREFIX), labels, and value, sorted by
+        name and labels
+    '''
+    with _lock:
+        values = sorted(_values.items())
+
+    return [
+        {'name': PREFIX + name, 'labels': dict(labels), 'value': value}
+        for (name, labels), value in values
+    ]
+
+def to_json():
+    '''
+    Render every metric as JSON.
+
+    Returns: str
+    '''
+    return json.dumps(
+        {'generated_at': time.time(), 'metrics': get_metrics()}, indent=2
+    )
+
+def escape_label_value(value):
+    '''
+    Escape a label value for the Prometheus text format.
+
+    Inputs:
+    value (str): label value
+
+    Returns: str
+    '''
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def to_prometheus():
+    '''
+    Render every metric in the Prometheus text exposition format, for the node
+    exporter's textfile collector.
+
+    Returns: str
+    '''
+    lines = []
+    last_name = None
+    for metric in get_metrics():
+        if metric['name'] != last_name:
+            metric_type, help_text = METRICS[metric['name'][len(PREFIX):]]
+            lines.append(f"# HELP {metric['name']} {help_text}")
+            lines.append(f"# TYPE {metric['name']} {metric_type}")
+            last_name = metric['name']
+        labels = ','.join(
+            f'{k}="{escape_label_value(v)}"' for k, v in metric['labels'].items()
+        )
+        lines.append(
+            f"{metric['name']}{{{labels}}} {metric['value']}" if labels else
+            f"{metric['name']} {metric['value']}"
+        )
+
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(json_fp=None, prom_fp=None):
+    '''
+    Write every metric to the configured files, atomically so a collector
+    never reads half a file.
+
+    Inputs:
+    json_fp (str): JSON destination; by default, METRICS_JSON_FP
+    prom_fp (str): Prometheus textfile destination; by default,
+        METRICS_PROM_FP
+    '''
+    import fetch
+
+    json_fp = json_fp or METRICS_JSON_FP
+    prom_fp = prom_fp or METRICS_PROM_FP
+    if json_fp is not None:
+        fetch.write_atomic(os.path.abspath(json_fp), to_json().encode('utf-8'))
+    if prom_fp is not None:
+        fetch.write_atomic(
+            os.path.abspath(prom_fp), to_prometheus().encode('utf-8')
+        )
@@ -9,57 +9,59 @@ Last updated: 13 November 2021
 '''
 
 import json
-import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
 
-from bs4 import BeautifulSoup
-import gspread
-import pandas as pd
 import pytz
-import requests
+
+import fetch
+import metrics
+import scrapes
+
+# pandas, numpy, the parsers, and gspread and the modules built on them are
+# only imported by the functions that use them, so each command only pays for
+# what it runs (see cli.COMMAND_MODULES)
 
 SERVICE_KEY_FP = 'service_key.json'
-with open('sheet_info.json', 'r') as f:
-    SHEET_INFO = json.load(f)
+SHEET_INFO_FP = 'sheet_info.json'
+_sheet_info = None
 
 REF_LINK = 'https://github.com/fogarty-ben/nba-sheets/'
 
-STANDINGS_FS_URL = 'https://www.foxsports.com/nba/standings'
-STEPH_CURRY_GAME_LOG_URL = 'https://www.basketball-reference.com/players/c/curryst01/gamelog/2026'
-SETH_CURRY_GAME_LOG_URL = 'https://www.basketball-reference.com/players/c/curryse01/gamelog/2026'
-ANTHONY_EDWARDS_URL = 'https://www.basketball-reference.com/players/e/edwaran01.html'
-
-NAMES_MAP = {'Lakers': 'Los Angeles Lakers',
-             'Clippers': 'LA Clippers',
-             'Nuggets': 'Denver Nuggets',
-             'Thunder': 'Oklahoma City Thunder',
-             'Rockets': 'Houston Rockets',
-             'Jazz': 'Utah Jazz',
-             'Mavericks': 'Dallas Mavericks',
-             'Trail Blazers': 'Portland Trail Blazers',
-             'Grizzlies': 'Memphis Grizzlies',
-             'Suns': 'Phoenix Suns',
-             'Spurs': 'San Antonio Spurs',
-             'Kings': 'Sacramento Kings',
-             'Pelicans': 'New Orleans Pelicans',
-             'Timberwolves': 'Minnesota Timberwolves',
-             'Warriors': 'Golden State Warriors',
-             'Bucks': 'Milwaukee Bucks',
-             'Raptors': 'Toronto Raptors',
-             'Celtics': 'Boston Celtics',
-             'Heat': 'Miami Heat',
-             'Pacers': 'Indiana Pacers',
-             '76ers': 'Philadelphia 76ers',
-             'Magic': 'Orlando Magic',
-             'Nets': 'Brooklyn Nets',
-             'Wizards': 'Washington Wizards',
-             'Hornets': 'Charlotte Hornets',
-             'Bulls': 'Chicago Bulls',
-             'Knicks': 'New York Knicks',
-             'Pistons': 'Detroit Pistons',
-             'Hawks': 'Atlanta Hawks',
-             'Cavaliers': 'Cleveland Cavaliers'
-            }
+# 'values' scores picks in Python and writes static values; 'formulas' writes
+# per-row spreadsheet formulas that look up the Standings and Tiebreakers tabs;
+# 'array_formulas' fills each scored column with one ARRAYFORMULA, so only the
+# picks themselves are sent
+SCORING_MODES = ['values', 'formulas', 'array_formulas']
+SCORING_MODE = 'values'
+
+# season-long trend tabs built from the local history: tab name -> dataset,
+# row column, and value column
+HISTORY_TABS = {
+    'Rank History': ('standings', 'Team', 'Rank'),
+    'Points History': ('scores', 'Name', 'Total Points'),
+}
+
+# pools updated at once when sheet_info.json lists several
+POOL_MAX_WORKERS = 4
+
+# response columns (after renaming with COLS_MAP) kept on every pick
+RESPONSE_ID_COLS = ['Email', 'Name', 'Picks Source']
+
+# rank given to teams a bettor didn't pick in the standings picks summary
+UNRANKED_PICK = 9
+
+# each pool's leaderboard index by sheet id, kept for the life of the process
+# so a daemon only rescores the picks of teams that moved since its last poll
+_leaderboard_indexes = {}
+_leaderboard_indexes_lock = threading.Lock()
+
+UPDATE_LOG_COLS = [
+    'Sheet', 'Last Updated', 'Last Run Status', 'Last Run Duration (s)', 'Last Run'
+]
 
 COLS_MAP = {
     'Timestamp': 'timestamp',
@@ -88,87 +90,7 @@ COLS_MAP = {
     "Bettor or media?": "Picks Source"
 }
 
-def get_conference_standings(standings_tbl):
-    '''
-    Parse an HTML conference standings table from the Fox Sports website.
-
-    Inputs:
-    standings_tbl (bs4.element.Tag): HTML conference standings table
-    
-    Returns: pandas dataframe
-    '''
-    # find column locations
-    i = 0
-    cols = {'W-L', 'PCT', 'GB'}
-    col_locs = {'Rank': 0,
-                'Team': 1}
-    for col in standings_tbl.find_all('th'):
-        colspan = col.get('colspan', 1)
-        i += int(colspan)
-        content = col.text.strip()
-        if content in cols:
-            col_locs[content] = i - 1 # correct to 0-based indexing
-
-    # extract standings
-    data = []
-    for i, row in enumerate(standings_tbl.find_all('tr')):
-        if i == 0: # skip header row
-            continue
-        
-        entry = {}
-        cells = row.find_all('td')
-        for stat, loc in col_locs.items():
-            entry[stat] = cells[loc].text.strip().rstrip('XYZ')
-        
-        data.append(entry)
-    df = pd.DataFrame(data)
-
-    missing_cols = {'W-L', 'PCT', 'GB'} - set(df.columns)
-    for col in missing_cols:
-        df[col] = 0
-        logging.error(f"Standings: couldn't find {col} column")
-
-
-    df['GB'] = df.GB.where(df.GB != '-', 0)
-    df['PCT'] = df.PCT.where(df.PCT != '-', 0)
-    df['Team'] = df.Team.str.strip().map(NAMES_MAP)
-
-    df = df.astype({'GB': float,
-                    'PCT': float,
-                    'Rank': int})
-
-
-    return df
-
-def get_standings(url):
-    '''
-    Pull standings from the Fox Sports website.
-
-    url (str): web address of the Fox Sports NBA standings page
-
-    Returns: two pandas dataframes
-    '''
-    r = requests.get(url)
-    r.raise_for_status()
-
-    soup = BeautifulSoup(r.content, 'html.parser')
-    eastern_html, western_html = soup.find_all('table', class_='data-table')
-
-    eastern_df = get_conference_standings(eastern_html)
-    western_df = get_conference_standings(western_html)
-
-    # will need to update playoff points after play-in
-    western_df['Playoff Points'] = [8] * 6 + [4] * 2 + [0] * 7
-    eastern_df['Playoff Points'] = [8] * 6 + [4] * 2 + [0] * 7
-
-    western_df['Conference'] = "Western"
-    eastern_df['Conference'] = "Eastern"
-
-    standings_df = pd.concat([western_df, eastern_df], axis=0)
-    standings_df = standings_df[['Conference', 'Rank', 'Team', 'W-L', 'PCT', 'GB', 'Playoff Points']]
-
-    return standings_df
-
+@fetch.cache_parsed
 def parse_bbref_player_pg(url, row_id, stat_id, fxn=str):
     '''
     Retrieve season totals from player Basketball Reference pages.
@@ -183,11 +105,11 @@ def parse_bbref_player_pg(url, row_id, stat_id, fxn=str):
 
     Returns: fxn (by default str)
     '''
-    r = requests.get(url)
-    r.raise_for_status()
+    import parsers
 
-    soup = BeautifulSoup(r.content, 'html.parser')
-    data_table = soup.find('table', id='totals_stats')
+    r = fetch.get_page(url)
+
+    data_table = parsers.find_table(r.content, table_id='totals_stats')
 
     season_val = (
         data_table
@@ -200,6 +122,7 @@ def parse_bbref_player_pg(url, row_id, stat_id, fxn=str):
 
     return fxn(season_val)
 
+@fetch.cache_parsed
 def parse_bbref_player_season_game_log(url, stat_ids, fxns=None):
     '''
     Retrieve every regular season game played from a player's Basketball
@@ -212,14 +135,14 @@ def parse_bbref_player_season_game_log(url, stat_ids, fxns=None):
 
     Returns: fxn (by default str)
     '''
+    import parsers
+
     if not fxns:
         fxns = [str] * len(stat_ids)
 
-    r = requests.get(url)
-    r.raise_for_status()
+    r = fetch.get_page(url)
 
-    soup = BeautifulSoup(r.content, 'html.parser')
-    data_table = soup.find('table', id='player_game_log_reg')
+    data_table = parsers.find_table(r.content, table_id='player_game_log_reg')
 
     try:
         data_rows = (
@@ -244,6 +167,7 @@ def parse_bbref_player_season_game_log(url, stat_ids, fxns=None):
 
     return parsed_rows
 
+@fetch.cache_parsed
 def parse_bbref_mvp_tracker(url, player, fxn=str):
     '''
     Retrieve a player's current standing in the Basketball Reference MVP
@@ -258,11 +182,11 @@ def parse_bbref_mvp_tracker(url, player, fxn=str):
 
     Returns: fxn (by default string)
     '''
-    r = requests.get(url)
-    r.raise_for_status()
+    import parsers
 
-    soup = BeautifulSoup(r.content, 'html.parser')
-    data_table = soup.find('table', id='players')
+    r = fetch.get_page(url)
+
+    data_table = parsers.find_table(r.content, table_id='players')
     table_body = data_table.find('tbody')
 
 
@@ -318,17 +242,35 @@ def parse_picks_ws(ws):
 
     Returns: tuple of pd.DataFrame (picks) and pd.DataFrame (tiebreakers)
     '''
+    import pandas as pd
+
     df = pd.DataFrame.from_records(ws.get_all_records())
+
+    return parse_responses(df)
+
+def parse_responses(df, id_cols=RESPONSE_ID_COLS):
+    '''
+    Split form responses into each participant's standings picks and
+    tiebreaker picks.
+
+    Inputs:
+    df (pd.DataFrame): one row per response, with the form's column names
+    id_cols (list of str): columns (after renaming with COLS_MAP) identifying
+        each response, kept on every pick
+
+    Returns: tuple of pd.DataFrame (picks) and pd.DataFrame (tiebreakers)
+    '''
+    id_cols = list(id_cols)
     df = df.rename(COLS_MAP, axis=1)
 
     is_picks_col = lambda x: (
-        x in {'Email', 'Name', 'Picks Source'} or x.startswith('Western_') or x.startswith('Eastern_')
+        x in id_cols or x.startswith('Western_') or x.startswith('Eastern_')
     )
     picks_col_mask = list(map(is_picks_col, df.columns))
     picks_df = df.loc[:, picks_col_mask]
 
     picks_df = picks_df.melt(
-        id_vars=['Email', 'Name', 'Picks Source'], var_name='Pick', value_name='Team'
+        id_vars=id_cols, var_name='Pick', value_name='Team'
     )
     picks_df[['Conference', 'Picks Rank']] = (
         picks_df['Pick'].str.split('_', n=1, expand=True)
@@ -337,13 +279,13 @@ def parse_picks_ws(ws):
     picks_df = picks_df.drop('Pick', axis=1)
 
     is_tiebreakers_col = lambda x: (
-        x in {'Email', 'Name', 'Picks Source'} or x.startswith('Tiebreaker_')
+        x in id_cols or x.startswith('Tiebreaker_')
     )
     tiebreakers_mask = list(map(is_tiebreakers_col, df.columns))
     tiebreakers_df = df.loc[:, tiebreakers_mask]
 
     tiebreakers_df = tiebreakers_df.melt(
-        id_vars=['Email', 'Name', 'Picks Source'], var_name='Pick', value_name='Pick Value'
+        id_vars=id_cols, var_name='Pick', value_name='Pick Value'
     )
 
     tiebreakers_df[['Tiebreaker #']] = (
@@ -353,59 +295,119 @@ def parse_picks_ws(ws):
 
     return picks_df, tiebreakers_df
 
+def count_pick_ranks(teams_df, picks_df):
+    """
+    Count how many times each team was picked at each rank, with bettors who
+    didn't pick a team counted once at UNRANKED_PICK.
+
+    Inputs:
+    teams_df (pd.DataFrame): Conference and Team of each team, one row each
+    picks_df (pd.DataFrame): standings picks
+
+    Returns: np.ndarray of int, teams x ranks (column i counts rank i)
+    """
+    import numpy as np
+    import pandas as pd
+
+    n_teams = len(teams_df)
+
+    # look up the few distinct conference/team pairs rather than every pick
+    conference_codes, conferences = pd.factorize(picks_df['Conference'])
+    team_codes, teams = pd.factorize(picks_df['Team'])
+    pair_team_ids = np.full(len(conferences) * len(teams), -1)
+    pair_codes = pd.MultiIndex.from_product([conferences, teams]).get_indexer(
+        pd.MultiIndex.from_frame(teams_df)
+    )
+    pair_team_ids[pair_codes[pair_codes >= 0]] = np.flatnonzero(pair_codes >= 0)
+
+    team_ids = np.where(
+        (conference_codes >= 0) & (team_codes >= 0),
+        pair_team_ids[conference_codes * len(teams) + team_codes],
+        -1
+    )
+    is_team = team_ids >= 0 # picks of teams not in the standings are ignored
+    team_ids = team_ids[is_team]
+    ranks = picks_df['Picks Rank'].to_numpy(dtype=int)[is_team]
+    n_ranks = max(UNRANKED_PICK, ranks.max(initial=0)) + 1
+
+    counts = np.bincount(
+        team_ids * n_ranks + ranks, minlength=n_teams * n_ranks
+    ).reshape(n_teams, n_ranks)
+
+    # each bettor who picked a team (at any rank) isn't also unranked for it
+    bettor_ids, bettors = pd.factorize(picks_df['Email'])
+    n_bettors = len(bettors)
+    bettor_ids = bettor_ids[is_team]
+    has_bettor = bettor_ids >= 0
+    picked_pairs = np.unique(
+        bettor_ids[has_bettor] * n_teams + team_ids[has_bettor]
+    )
+    n_pickers = np.bincount(picked_pairs % n_teams, minlength=n_teams)
+    counts[:, UNRANKED_PICK] += n_bettors - n_pickers
+
+    return counts
+
+def get_nth_ranks(counts, positions):
+    """
+    Find the rank at a position in each team's sorted list of ranks.
+
+    Inputs:
+    counts (np.ndarray): teams x ranks counts from count_pick_ranks(...)
+    positions (np.ndarray): 0-based position for each team
+
+    Returns: np.ndarray of int
+    """
+    import numpy as np
+
+    return (counts.cumsum(axis=1) <= positions[:, np.newaxis]).sum(axis=1)
+
 def summarize_standings_picks(standings_df, standings_picks_df):
     """
     Summarize the highest, lowest, most common, and percent ranked of picks by
     team.
 
+    Every statistic is read from a teams x ranks matrix of pick counts, so the
+    cost grows with the number of picks rather than teams x bettors.
+
     Inputs:
     standings_df (pd.DataFrame): standings
     standings_picks_df (pd.DataFrame): standings picks
 
     Returns: pd.DataFrame
     """
+    import numpy as np
+
     standings_picks_df = standings_picks_df.loc[
         standings_picks_df['Picks Source'] == "Bettor", :
     ]
-
-    standings_df = standings_df.loc[:, ['Conference', 'Team']].drop_duplicates()
-    standings_df['__key__'] = 1
-    bettors_df = standings_picks_df.loc[:, ['Email']].drop_duplicates()
-    bettors_df['__key__'] = 1
-
-    scaffold_df = (
+    teams_df = (
         standings_df
-        .merge(bettors_df, on='__key__', how='inner')
-        .drop('__key__', axis=1)
-        .merge(
-            standings_picks_df, on=['Conference', 'Team', 'Email'], how='left'
-        )
-        .loc[:, ['Conference', 'Team', 'Picks Rank']]
+        .loc[:, ['Conference', 'Team']]
+        .drop_duplicates()
+        .sort_values(['Conference', 'Team'])
+        .reset_index(drop=True)
     )
-    scaffold_df['Picks Rank'] = scaffold_df['Picks Rank'].fillna(9)
-
-    summary_df = (
-        scaffold_df
-        .groupby(['Conference', 'Team'])
-        ['Picks Rank']
-        .agg([
-            'min',
-            'max',
-            'median',
-            lambda x: pd.Series.mode(x).min(),
-            lambda x: (x != 9).sum() / x.count()]
-        )
-        .reset_index()
+    if standings_picks_df['Email'].isna().all():
+        teams_df = teams_df.iloc[:0] # no bettors, so nothing to summarize
+
+    counts = count_pick_ranks(teams_df, standings_picks_df)
+    n_ranks = counts.shape[1]
+    n_picks = counts.sum(axis=1)
+    is_picked = counts > 0
+
+    summary_df = teams_df.copy()
+    summary_df['Highest Rank'] = is_picked.argmax(axis=1).astype(float)
+    summary_df['Lowest Rank'] = (
+        n_ranks - 1 - is_picked[:, ::-1].argmax(axis=1)
+    ).astype(float)
+    summary_df['Median Rank'] = (
+        get_nth_ranks(counts, (n_picks - 1) // 2) +
+        get_nth_ranks(counts, n_picks // 2)
+    ) / 2
+    summary_df['Most Common Rank'] = counts.argmax(axis=1).astype(float)
+    summary_df['# Ranked'] = (
+        (n_picks - counts[:, UNRANKED_PICK]) / np.maximum(n_picks, 1)
     )
-    summary_df.columns = [
-        'Conference',
-        'Team',
-        'Highest Rank',
-        'Lowest Rank',
-        'Median Rank',
-        'Most Common Rank',
-        '# Ranked'
-    ]
 
     for col in ["Highest Rank", "Lowest Rank", "Median Rank", "Most Common Rank"]:
         not_ranked_mask = summary_df[col] > 8
@@ -413,81 +415,170 @@ def summarize_standings_picks(standings_df, standings_picks_df):
 
     return summary_df
 
-def get_existing_ws_names(wb):
-    """
-    List the names of existing worksheets in a workbook.
-
-    Inputs:
-    wb (gspread.models.Spreadsheet): workbook
-
-    Returns: set
-    """
-    return set(map(lambda x: x.title, wb.worksheets()))
-
-def write_generic(wb, ws_name, df):
+def write_generic(wb_session, ws_name, df):
     """
     Write a dataframe to a Google Sheet without modifications.
 
     Inputs:
-    wb (spread.models.Spreadsheet): Google Sheet to update
+    wb_session (sheets.WorkbookSession): Google Sheet to update
     ws_name (str): name of the sheet to write in
     df (pd.DataFrame): data to write
     """
     n_rows, n_cols = df.shape
     n_rows += 1 # adjust for header
-    if not ws_name in get_existing_ws_names(wb):
-        wb.add_worksheet(title=ws_name, rows=n_rows, cols=n_cols)
-        
-    ws = wb.worksheet(ws_name)
+    wb_session.ensure_worksheet(ws_name, rows=n_rows, cols=n_cols)
 
     col_names = [df.columns.values.tolist()]
     values = df.values.tolist()
     data = col_names + values
-    ws.update(data)
+    wb_session.queue_update(ws_name, data)
 
 def write_tiebreakers(
-    wb, ws_name, tb_1_text, tb_1_value, tb_2_text, tb_2_value
+    wb_session, ws_name, tb_1_text, tb_1_value, tb_2_text, tb_2_value
 ):
     """
     Write tiebreakers to the Google Sheet.
 
     Inputs:
-    wb (spread.models.Spreadsheet): Google Sheet to update
+    wb_session (sheets.WorkbookSession): Google Sheet to update
     ws_name (str): name of the sheet to write to
     tb_1_text (str): text description of the first tiebreaker
     tb_1_value (numeric): value of the first tiebreaker
     tb_2_text (str): text description of the second tiebreaker
     tb_2_value (numeric): value of the second tiebreaker
     """
-    if not ws_name in get_existing_ws_names(wb):
-        wb.add_worksheet(ws_name, rows=3, cols=3)
-    
-    ws = wb.worksheet(ws_name)
+    wb_session.ensure_worksheet(ws_name, rows=3, cols=3)
 
     data = [
         ['Tiebreaker #', 'Tiebreaker Description', 'Tiebreaker Value'],
         [1, tb_1_text, tb_1_value],
         [2, tb_2_text, tb_2_value]
     ]
-    ws.update(data)
+    wb_session.queue_update(ws_name, data)
+
+def get_column_range(col_id, n_rows):
+    '''
+    Get the A1 range of a column's data rows, below the header.
+
+    Inputs:
+    col_id (int): column number, starting at 1
+    n_rows (int): number of data rows
+
+    Returns: str, e.g. D2:D101
+    '''
+    import gspread
+
+    return (
+        gspread.utils.rowcol_to_a1(2, col_id) + ':' +
+        gspread.utils.rowcol_to_a1(n_rows + 1, col_id)
+    )
+
+def write_array_formulas(wb_session, ws_name, df, formulas):
+    '''
+    Write a dataframe to a Google Sheet followed by derived columns, each
+    filled by a single ARRAYFORMULA in the cell under its header, so only the
+    dataframe's own values are sent however many rows it has.
+
+    Inputs:
+    wb_session (sheets.WorkbookSession): Google Sheet to update
+    ws_name (str): name of the sheet to write to
+    df (pd.DataFrame): values to write
+    formulas (dict): array expression of each derived column by name, in
+        column order
+    '''
+    import gspread
+
+    n_rows, n_cols = df.shape
+    wb_session.ensure_worksheet(
+        ws_name, rows=n_rows + 1, cols=n_cols + len(formulas)
+    )
+
+    data = [df.columns.values.tolist() + list(formulas)] + df.values.tolist()
+    if n_rows:
+        data[1] = data[1] + [
+            f'=ARRAYFORMULA({formula})' for formula in formulas.values()
+        ]
+
+    # anything already under the arrays (per-row formulas or static values
+    # from the other scoring modes) would stop them from filling their
+    # columns, so the derived columns are cleared when switching modes; a tab
+    # already holding the arrays (grids are read as formulas, so row 2 shows
+    # them) only needs the rows a larger pool left below the new last row
+    current_values = wb_session.get_values(ws_name)
+    n_derived = len(formulas)
+    current_arrays = (
+        current_values[1][n_cols:n_cols + n_derived]
+        if len(current_values) > 1 else []
+    )
+    is_array_tab = len(current_arrays) == n_derived and all(
+        isinstance(value, str) and value.startswith('=ARRAYFORMULA(')
+        for value in current_arrays
+    )
+    if not is_array_tab:
+        for i in range(2, min(len(data), len(current_values))):
+            if any(
+                value not in ('', None)
+                for value in current_values[i][n_cols:n_cols + n_derived]
+            ):
+                data[i] = data[i] + [''] * n_derived
+    for i in range(len(data), len(current_values)):
+        if any(value not in ('', None) for value in current_values[i]):
+            data.extend([] for _ in range(i + 1 - len(data)))
+            data[i] = [''] * (n_cols + n_derived)
+
+    wb_session.queue_update(
+        ws_name,
+        data,
+        value_input_option=gspread.utils.ValueInputOption.user_entered
+    )
 
 def write_standings_picks(
-    wb, standings_picks_ws_name, standings_picks_df, standings_ws_name
+    wb_session, standings_picks_ws_name, standings_picks_df, standings_ws_name,
+    array_formulas=False
 ):
     """
     Write standings picks to the Google Sheet.
 
     Inputs:
-    wb (spread.models.Spreadsheet): Google Sheet to update
+    wb_session (sheets.WorkbookSession): Google Sheet to update
     ws_name (str): name of the sheet to write to
     standings_picks_df (pd.DataFrame): standings picks data
     standings_ws_name (str): name of the sheet containing NBA standigns
+    array_formulas (bool): if True, fill each scored column with one
+        ARRAYFORMULA instead of a formula per row
     """
+    import gspread
+
+    import scoring
+
+    if array_formulas:
+        n_rows, n_cols = standings_picks_df.shape
+        get_range = lambda col_id: get_column_range(col_id, n_rows)
+        team_range = get_range(standings_picks_df.columns.get_loc('Team') + 1)
+        picks_rank_range = get_range(
+            standings_picks_df.columns.get_loc('Picks Rank') + 1
+        )
+        # SWITCH doesn't spread over an array, so rank points are looked up
+        # by distance, 0 for any distance not in the table
+        distances = '; '.join(map(str, range(len(scoring.RANK_POINTS))))
+        rank_points = '; '.join(map(str, scoring.RANK_POINTS))
+        write_array_formulas(
+            wb_session,
+            standings_picks_ws_name,
+            standings_picks_df,
+            {
+                'Standings Rank': f"XLOOKUP({team_range}, {standings_ws_name}!C$2:C$31, {standings_ws_name}!B$2:B$31)",
+                'Rank Points': f"XLOOKUP(ABS({picks_rank_range} - {get_range(n_cols + 1)}), {{{distances}}}, {{{rank_points}}}, 0)",
+                'Playoff Points': f"XLOOKUP({team_range}, {standings_ws_name}!C$2:C$31, {standings_ws_name}!G$2:G$31)",
+                'Total Points': f"{get_range(n_cols + 2)} + {get_range(n_cols + 3)}",
+            }
+        )
+        return
+
     n_rows, n_cols = standings_picks_df.shape
-    if not standings_picks_ws_name in get_existing_ws_names(wb):
-        wb.add_worksheet(title=standings_picks_ws_name, rows=n_rows + 1, cols=n_cols + 4)
-        
-    ws = wb.worksheet(standings_picks_ws_name)
+    wb_session.ensure_worksheet(
+        standings_picks_ws_name, rows=n_rows + 1, cols=n_cols + 4
+    )
 
     write_df = standings_picks_df.copy(deep=True)
 
@@ -519,25 +610,53 @@ def write_standings_picks(
     col_names = [write_df.columns.values.tolist()]
     values = write_df.values.tolist()
     data = col_names + values
-    ws.update(data, value_input_option=gspread.utils.ValueInputOption.user_entered)
+    wb_session.queue_update(
+        standings_picks_ws_name,
+        data,
+        value_input_option=gspread.utils.ValueInputOption.user_entered
+    )
 
 def write_tiebreakers_picks(
-    wb, tiebreaker_picks_ws_name, tiebreaker_picks_df, tiebreakers_ws_name
+    wb_session, tiebreaker_picks_ws_name, tiebreaker_picks_df, tiebreakers_ws_name,
+    array_formulas=False
 ):
     """
     Write tiebreakers picks to the Google Sheet.
 
     Inputs:
-    wb (spread.models.Spreadsheet): Google Sheet to update
+    wb_session (sheets.WorkbookSession): Google Sheet to update
     ws_name (str): name of the sheet to write to
     standings_picks_df (pd.DataFrame): tiebreakers picks data
     standings_ws_name (str): name of the sheet containing tiebreaker values
+    array_formulas (bool): if True, fill each scored column with one
+        ARRAYFORMULA instead of a formula per row
     """
+    import gspread
+
+    if array_formulas:
+        n_rows, n_cols = tiebreaker_picks_df.shape
+        get_range = lambda col_id: get_column_range(col_id, n_rows)
+        tiebreaker_no_range = get_range(
+            tiebreaker_picks_df.columns.get_loc('Tiebreaker #') + 1
+        )
+        pick_value_range = get_range(
+            tiebreaker_picks_df.columns.get_loc('Pick Value') + 1
+        )
+        write_array_formulas(
+            wb_session,
+            tiebreaker_picks_ws_name,
+            tiebreaker_picks_df,
+            {
+                'Actual Value': f"XLOOKUP({tiebreaker_no_range}, {tiebreakers_ws_name}!A$2:A$3, {tiebreakers_ws_name}!C$2:C$3)",
+                'Difference': f"ABS({pick_value_range} - {get_range(n_cols + 1)})",
+            }
+        )
+        return
+
     n_rows, n_cols = tiebreaker_picks_df.shape
-    if not tiebreaker_picks_ws_name in get_existing_ws_names(wb):
-        wb.add_worksheet(title=tiebreaker_picks_ws_name, rows=n_rows + 1, cols=n_cols + 2)
-        
-    ws = wb.worksheet(tiebreaker_picks_ws_name)
+    wb_session.ensure_worksheet(
+        tiebreaker_picks_ws_name, rows=n_rows + 1, cols=n_cols + 2
+    )
 
     write_df = tiebreaker_picks_df.copy(deep=True)
 
@@ -557,126 +676,238 @@ def write_tiebreakers_picks(
     col_names = [write_df.columns.values.tolist()]
     values = write_df.values.tolist()
     data = col_names + values
-    ws.update(data, value_input_option=gspread.utils.ValueInputOption.user_entered)
+    wb_session.queue_update(
+        tiebreaker_picks_ws_name,
+        data,
+        value_input_option=gspread.utils.ValueInputOption.user_entered
+    )
 
-def write_update_timestamps(wb, ws_name, update_timestamps):
+def format_timestamp(timestamp):
     """
-    Write the timestamp for when each sheet was last updated.
+    Format a timestamp for the Google Sheet.
 
     Inputs:
-    wb (spread.models.Spreadsheet): Google Sheet to update
+    timestamp (datetime.datetime): timezone-aware timestamp
+
+    Returns: str
+    """
+    return timestamp.strftime('%Y-%m-%d %H:%M:%S %Z')
+
+def write_update_timestamps(
+    wb_session, ws_name, update_timestamps, stage_durations=None
+):
+    """
+    Write the timestamp for when each sheet was last updated, along with the
+    status and duration of each stage on the latest run.
+
+    The existing tab is read once and merged in memory, so stages that failed
+    keep their last successful timestamp and rows for stages the script no
+    longer runs are kept as they are.
+
+    Inputs:
+    wb_session (sheets.WorkbookSession): Google Sheet to update
     ws_name (str): name of the sheet to write to
-    update_timestamps (dict): key-value pairs for when each sheet was updated
+    update_timestamps (dict): key-value pairs for when each sheet was updated;
+        None if the stage failed on this run
+    stage_durations (dict): key-value pairs for how many seconds each stage
+        took on this run
     """
-    is_first_write = False
-    if not ws_name in get_existing_ws_names(wb):
-        wb.add_worksheet(title=ws_name, rows=len(update_timestamps), cols=2)
-        is_first_write = True
-        
-    ws = wb.worksheet(ws_name)
-
-    data = []
-    if is_first_write:
-        for desc, timestamp in update_timestamps.items():
-            timestamp_str = 'Never'
-            if timestamp:
-                timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S %Z')
-            data.append([desc, timestamp_str])
-    else:
-        descs = ws.col_values(1)
-        for i, desc in enumerate(descs):
-            if desc in update_timestamps:
-                timestamp = update_timestamps[desc]
-                timestamp_str = ''
-                if timestamp:
-                    timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S %Z')
-                data.append([desc, timestamp_str])
-            else:
-                data.append([desc, ws.get(f"B{i}")])
-                print(f'Update timestamp unexpected desc: {desc}')
-
-    ws.update(data)
+    if stage_durations is None:
+        stage_durations = {}
+    n_cols = len(UPDATE_LOG_COLS)
+
+    rows = {}
+    if ws_name in wb_session.worksheet_names():
+        for row in wb_session.get_values(ws_name):
+            if not row or row[0] in {'', UPDATE_LOG_COLS[0]}:
+                continue
+            rows[row[0]] = (row + [''] * n_cols)[:n_cols]
+
+    run_timestamp_str = format_timestamp(datetime.now(tz=pytz.utc))
+    for desc, timestamp in update_timestamps.items():
+        last_updated = rows.get(desc, [desc, 'Never'])[1]
+        status = 'Error'
+        if timestamp:
+            last_updated = format_timestamp(timestamp)
+            status = 'OK'
+
+        duration = stage_durations.get(desc, '')
+        if duration != '':
+            duration = round(duration, 2)
+
+        rows[desc] = [desc, last_updated, status, duration, run_timestamp_str]
+
+    data = [UPDATE_LOG_COLS] + list(rows.values())
+    wb_session.ensure_worksheet(ws_name, rows=len(data), cols=n_cols)
+    wb_session.queue_update(ws_name, data)
+
+def simulate_seasons(shared, n_simulations=None):
+    '''
+    Simulate the rest of the season from the shared standings, once for every
+    pool's projection tabs.
 
-if __name__ == '__main__':
-    try:
-        sheet_id = SHEET_INFO['sheet_id']
-        wb = gspread.service_account(SERVICE_KEY_FP).open_by_key(sheet_id)
-    except Exception as e:
-        print(f'Workbook connection error: {e}')
-        raise e
+    Inputs:
+    shared (concurrent.futures.Future): result of scrapes.get_shared_data(...)
+    n_simulations (int): simulated seasons; by default,
+        projection.N_SIMULATIONS
 
-    update_timestamps = {}
+    Returns: dict, from projection.simulate_seasons(...)
+    '''
+    import projection
 
-    try:
-        standings_df = get_standings(STANDINGS_FS_URL)
-        write_generic(
-            wb,
-            'Standings',
-            standings_df,
-        )
-        update_timestamps['Standings'] = datetime.now(tz=pytz.utc)
-    except Exception as e:
-        print(f'Standings error: {e}')
-        standings = None
-        update_timestamps['Standings'] = None
+    standings_df = shared.result()['standings_df']
+    if standings_df is None:
+        raise ValueError('no standings to simulate from')
 
-    try:
-        tiebreaker_1_text = "Steph Curry + Seth Curry GSW games played"
-        game_log_stat_ids = [
-            'player_game_num_career', 'team_game_num_season', 'team_name_abbr'
-        ]
-        steph_curry_game_log = pd.DataFrame(
-            parse_bbref_player_season_game_log(
-                STEPH_CURRY_GAME_LOG_URL, game_log_stat_ids
-            )
-        )
-        seth_curry_game_log = pd.DataFrame(
-            parse_bbref_player_season_game_log(
-                SETH_CURRY_GAME_LOG_URL, game_log_stat_ids
-            )
-        )
-        for game_log in [steph_curry_game_log, seth_curry_game_log]:
-            game_log.drop(
-                (
-                    game_log
-                    [
-                        (game_log.player_game_num_career.isna()) |
-                        (game_log.player_game_num_career == '') |
-                        (game_log.team_name_abbr != 'GSW')
-                    ]
-                    .index
-                ),
-                axis=0,
-                inplace=True
+    return projection.simulate_seasons(standings_df, n_simulations)
+
+def load_sheet_info(fp=SHEET_INFO_FP):
+    '''
+    Read sheet_info.json the first time it's needed.
+
+    Inputs:
+    fp (str): path of sheet_info.json
+
+    Returns: dict
+    '''
+    global _sheet_info
+    if _sheet_info is None:
+        with open(fp, 'r') as f:
+            _sheet_info = json.load(f)
+
+    return _sheet_info
+
+def get_pools(sheet_info):
+    '''
+    List the pools to update from sheet_info.json, which holds either one
+    pool's sheet_id and responses_ws_name or a list of them under pools, each
+    with its own name.
+
+    Inputs:
+    sheet_info (dict): contents of sheet_info.json
+
+    Returns: list of dicts of name (None for a lone unnamed pool), sheet_id,
+        and responses_ws_name
+    '''
+    pools = sheet_info.get('pools', [sheet_info])
+
+    return [
+        {
+            'name': pool.get('name'),
+            'sheet_id': pool['sheet_id'],
+            'responses_ws_name': pool['responses_ws_name'],
+        }
+        for pool in pools
+    ]
+
+def get_pool_dir(base_dir, pool):
+    '''
+    Get a pool's own directory under the picks store or history, so pools
+    never mix responses or scores. A lone unnamed pool uses the base directory.
+
+    Inputs:
+    base_dir (str): picks store or history directory; None if turned off
+    pool (dict): from get_pools(...)
+
+    Returns: str, or None if base_dir is None
+    '''
+    if base_dir is None or pool['name'] is None:
+        return base_dir
+
+    return os.path.join(base_dir, pool['name'])
+
+def get_leaderboard_index(pool):
+    '''
+    Get a pool's leaderboard index.
+
+    Inputs:
+    pool (dict): from get_pools(...)
+
+    Returns: leaderboard.LeaderboardIndex
+    '''
+    import leaderboard
+
+    with _leaderboard_indexes_lock:
+        if pool['sheet_id'] not in _leaderboard_indexes:
+            _leaderboard_indexes[pool['sheet_id']] = (
+                leaderboard.LeaderboardIndex()
             )
-        joint_game_log = steph_curry_game_log.merge(
-            seth_curry_game_log, on='team_game_num_season', how='inner'
-        )
-        tiebreaker_1_value =  len(joint_game_log)
-        update_timestamps['Tiebreaker #1'] = datetime.now(tz=pytz.utc)
-    except Exception as e:
-        print(f'Tiebreaker 1 error: {e}')
-        tiebreaker_1_value = None
-        update_timestamps['Tiebreaker #1'] = None
+        return _leaderboard_indexes[pool['sheet_id']]
 
+def update_pool(
+    pool, shared, wb=None, scoring_mode=SCORING_MODE, rebuild_picks=False,
+    simulation=None, dry_run=False
+):
+    '''
+    Score one pool's picks and update its Google Sheet with the shared
+    standings and tiebreakers.
+
+    Inputs:
+    pool (dict): from get_pools(...)
+    shared (concurrent.futures.Future): result of
+        scrapes.get_shared_data(...), only waited on once the workbook is
+        connected
+    wb (gspread.Spreadsheet): workbook to update; by default, the pool's sheet
+        opened with the service account in service_key.json
+    scoring_mode (str): one of SCORING_MODES
+    rebuild_picks (bool): if True, re-read every response instead of only
+        those submitted since the last run
+    simulation (concurrent.futures.Future): result of simulate_seasons(...),
+        shared by every pool; None to skip projecting
+    dry_run (bool): if True, do everything but write to the workbook or save
+        to the history, and print how many cells each tab would be sent
+
+    Returns: dict of when each sheet was updated (None if its stage failed)
+    '''
+    import gspread
+
+    import history
+    import picks_store
+    import projection
+    import scoring
+    import sheets
+
+    prefix = f"{pool['name']}: " if pool['name'] else ''
+    label = pool['name'] or 'default'
+    picks_store_dir = get_pool_dir(picks_store.PICKS_STORE_DIR, pool)
+    history_dir = get_pool_dir(history.HISTORY_DIR, pool)
+    leaderboard_index = get_leaderboard_index(pool)
+
+    with metrics.timer('Connect', pool=label):
+        if wb is None:
+            client = gspread.service_account(SERVICE_KEY_FP)
+            # counted inside the limit, so every retry is counted
+            sheets.count_api_calls(client.http_client, pool=label)
+            sheets.limit_api_calls(client.http_client)
+            wb = client.open_by_key(pool['sheet_id'])
+        sheets.count_api_calls(wb.client, pool=label)
+        sheets.limit_api_calls(wb.client)
+        wb_session = sheets.WorkbookSession(wb, incremental=True)
+        wb_session.load()
+
+    shared = shared.result()
+    standings_df = shared['standings_df']
+    tiebreaker_1_text, tiebreaker_1_value = shared['tiebreakers'][1]
+    tiebreaker_2_text, tiebreaker_2_value = shared['tiebreakers'][2]
+    update_timestamps = dict(shared['update_timestamps'])
+    stage_durations = dict(shared['stage_durations'])
+
+    stage_start = time.perf_counter()
     try:
-        tiebreaker_2_text = "Anthony Edwards missed 3PA"
-        kat_3pa = parse_bbref_player_pg(
-            ANTHONY_EDWARDS_URL, 'totals_stats.2026', 'fg3a', int
-        )
-        kat_3pm = parse_bbref_player_pg(
-            ANTHONY_EDWARDS_URL, 'totals_stats.2026', 'fg3', int
-        )
-        tiebreaker_2_value = kat_3pa - kat_3pm
-        update_timestamps['Tiebreaker #2'] = datetime.now(tz=pytz.utc)
+        if standings_df is not None:
+            write_generic(
+                wb_session,
+                'Standings',
+                standings_df,
+            )
     except Exception as e:
-        print(f'Tiebreaker 2 error: {e}')
-        tiebreaker_2_value = None
-        update_timestamps['Tiebreaker #2'] = None
+        print(f'{prefix}Standings write error: {e}')
+        update_timestamps['Standings'] = None
+    stage_durations['Standings'] += time.perf_counter() - stage_start
 
     try:
         write_tiebreakers(
-            wb,
+            wb_session,
             'Tiebreakers',
             tiebreaker_1_text,
             tiebreaker_1_value,
@@ -684,57 +915,179 @@ if __name__ == '__main__':
             tiebreaker_2_value
         )
     except Exception as e:
-        print(f'Tiebreaker write error: {e}')
+        print(f'{prefix}Tiebreaker write error: {e}')
         update_timestamps['Tiebreaker #1'] = None
         update_timestamps['Tiebreaker #2'] = None
 
-    try:
-        responses_ws_name = SHEET_INFO['responses_ws_name']
-        ws = wb.worksheet(responses_ws_name)
-        standings_picks_df, tiebreaker_picks_df = parse_picks_ws(ws)
-    except Exception as e:
-        raise e
-        print(f'Response parsing error: {e}')
-        picks_df, tiebreaks_df = None, None
+    responses_ws_name = pool['responses_ws_name']
+    ws = wb_session.worksheet(responses_ws_name)
+    with metrics.timer('Responses', pool=label):
+        standings_picks_df, tiebreaker_picks_df = picks_store.read_picks(
+            ws, parse_responses, RESPONSE_ID_COLS, rebuild=rebuild_picks,
+            store_dir=picks_store_dir
+        )
+    read_stats = picks_store.get_read_stats()
+    print(
+        f"{prefix}Responses: {read_stats['responses_read']} read " +
+        f"({'full read' if read_stats['full_read'] else 'new only'}), " +
+        f"{read_stats['responses_stored']} stored"
+    )
 
-    try:
+    stage_start = time.perf_counter()
+    scored_standings_picks_df = None
+    if standings_df is not None:
+        # only picks of teams whose place changed are rescored
+        leaderboard_index.set_picks(standings_picks_df)
+        leaderboard_index.set_standings(standings_df)
+        scored_standings_picks_df = leaderboard_index.get_scored_picks()
+
+    # without fresh standings, fall back to formulas that look up the
+    # standings last written to the sheet
+    if scoring_mode == 'values' and scored_standings_picks_df is not None:
+        write_generic(
+            wb_session,
+            'Standings Picks',
+            scoring.to_sheet_values(scored_standings_picks_df)
+        )
+    else:
         write_standings_picks(
-            wb, 'Standings Picks', standings_picks_df, 'Standings'
+            wb_session, 'Standings Picks', standings_picks_df, 'Standings',
+            array_formulas=scoring_mode == 'array_formulas'
         )
-        update_timestamps['Standings Picks'] = datetime.now(tz=pytz.utc)
-    except Exception as e:
-        raise e
-        print(f'Standings picks write error: {e}')
-        update_timestamps['Standings Picks'] = None
+    update_timestamps['Standings Picks'] = datetime.now(tz=pytz.utc)
+    stage_durations['Standings Picks'] = time.perf_counter() - stage_start
 
+    stage_start = time.perf_counter()
     try:
-        write_tiebreakers_picks(
-            wb, 'Tiebreaker Picks', tiebreaker_picks_df, 'Tiebreakers'
+        scored_tiebreaker_picks_df = scoring.score_tiebreaker_picks(
+            tiebreaker_picks_df, {1: tiebreaker_1_value, 2: tiebreaker_2_value}
         )
+        if scoring_mode == 'values':
+            write_generic(
+                wb_session,
+                'Tiebreaker Picks',
+                scoring.to_sheet_values(scored_tiebreaker_picks_df)
+            )
+        else:
+            write_tiebreakers_picks(
+                wb_session, 'Tiebreaker Picks', tiebreaker_picks_df, 'Tiebreakers',
+                array_formulas=scoring_mode == 'array_formulas'
+            )
         update_timestamps['Tiebreaker Picks'] = datetime.now(tz=pytz.utc)
     except Exception as e:
-        print(f'Tiebreaker picks write error: {e}')
+        print(f'{prefix}Tiebreaker picks write error: {e}')
+        scored_tiebreaker_picks_df = None
         update_timestamps['Tiebreaker Picks'] = None
+    stage_durations['Tiebreaker Picks'] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    try:
+        if scored_standings_picks_df is None or scored_tiebreaker_picks_df is None:
+            raise ValueError('No scored picks to rank')
+        leaderboard_index.set_tiebreakers(scored_tiebreaker_picks_df)
+        leaderboard_df = leaderboard_index.get_leaderboard()
+        write_generic(
+            wb_session, 'Leaderboard', scoring.to_sheet_values(leaderboard_df)
+        )
+        update_timestamps['Leaderboard'] = datetime.now(tz=pytz.utc)
+    except Exception as e:
+        print(f'{prefix}Leaderboard error: {e}')
+        leaderboard_df = None
+        update_timestamps['Leaderboard'] = None
+    stage_durations['Leaderboard'] = time.perf_counter() - stage_start
+
+    if simulation is not None:
+        stage_start = time.perf_counter()
+        try:
+            seeds_df = projection.get_seed_projection(simulation.result())
+            entrants_df = projection.get_pool_projection(
+                simulation.result(), standings_picks_df
+            )
+            write_generic(
+                wb_session, 'Seed Projections', scoring.to_sheet_values(seeds_df)
+            )
+            write_generic(
+                wb_session, 'Pool Projections',
+                scoring.to_sheet_values(entrants_df)
+            )
+            update_timestamps['Projections'] = datetime.now(tz=pytz.utc)
+        except Exception as e:
+            print(f'{prefix}Projections error: {e}')
+            update_timestamps['Projections'] = None
+        stage_durations['Projections'] = time.perf_counter() - stage_start
 
+    stage_start = time.perf_counter()
+    try:
+        if not dry_run:
+            history.append_snapshot(
+                datetime.now(tz=pytz.utc).date(),
+                standings_df,
+                {
+                    1: (tiebreaker_1_text, tiebreaker_1_value),
+                    2: (tiebreaker_2_text, tiebreaker_2_value),
+                },
+                leaderboard_df,
+                history_dir
+            )
+        if history_dir is not None:
+            for ws_name, (dataset, row_col, value_col) in HISTORY_TABS.items():
+                trend_df = history.get_trend_table(
+                    dataset, row_col, value_col, history_dir
+                )
+                write_generic(
+                    wb_session, ws_name, scoring.to_sheet_values(trend_df)
+                )
+        update_timestamps['History'] = datetime.now(tz=pytz.utc)
+    except Exception as e:
+        print(f'{prefix}History error: {e}')
+        update_timestamps['History'] = None
+    stage_durations['History'] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
     try:
         standings_picks_summary_df = summarize_standings_picks(
             standings_df, standings_picks_df
         )
         write_generic(
-            wb, "Standings Picks Summary", standings_picks_summary_df
+            wb_session, "Standings Picks Summary", standings_picks_summary_df
         )
         update_timestamps['Standings Picks Summary'] = datetime.now(tz=pytz.utc)
     except Exception as e:
-        print(f'Standing Picks Summary error: {e}')
+        print(f'{prefix}Standing Picks Summary error: {e}')
         update_timestamps['Standings Picks Summary'] = None
+    stage_durations['Standings Picks Summary'] = time.perf_counter() - stage_start
 
     try:
-        write_update_timestamps(wb, 'Last Updated', update_timestamps)
+        write_update_timestamps(
+            wb_session, 'Last Updated', update_timestamps, stage_durations
+        )
         update_timestamps_written = True
     except Exception as e:
-        print(f'Update timestamps write error: {e}')
+        print(f'{prefix}Update timestamps write error: {e}')
         update_timestamps_written = False
 
+    if dry_run:
+        metrics.record_stages(update_timestamps, stage_durations, pool=label)
+        for ws_name, n_cells in wb_session.get_pending_cells().items():
+            print(f'{prefix}Dry run: {n_cells} cells for {ws_name} not written')
+        return update_timestamps
+
+    try:
+        with metrics.timer('Commit', pool=label):
+            wb_session.commit()
+        commit_stats = wb_session.last_commit_stats
+        print(
+            f"{prefix}Workbook: {commit_stats['cells_written']} cells written in " +
+            f"{commit_stats['ranges_written']} ranges, " +
+            f"{commit_stats['cells_skipped']} unchanged cells skipped"
+        )
+    except Exception as e:
+        print(f'{prefix}Workbook write error: {e}')
+        # every tab is written in the same batch, so none were updated
+        update_timestamps = dict.fromkeys(update_timestamps)
+        update_timestamps_written = False
+    metrics.record_stages(update_timestamps, stage_durations, pool=label)
+
     assert (
             update_timestamps['Standings'] is not None and
             update_timestamps['Tiebreaker #1'] is not None and
@@ -742,13 +1095,178 @@ if __name__ == '__main__':
             update_timestamps['Standings Picks'] is not None and
             update_timestamps['Tiebreaker Picks'] is not None and
             update_timestamps['Standings Picks Summary'] is not None and
+            update_timestamps['Leaderboard'] is not None and
             update_timestamps_written
         ), (
-            f"Standings: {update_timestamps['Standings'] is not None}, " +
+            f"{prefix}Standings: {update_timestamps['Standings'] is not None}, " +
             f"Tiebraker 1: {update_timestamps['Tiebreaker #1'] is not None}, " +
             f"Tiebreaker 2: {update_timestamps['Tiebreaker #2'] is not None}, " +
             f"Standings Picks: {update_timestamps['Standings Picks'] is not None}, " +
             f"Tiebreaker Picks: {update_timestamps['Tiebreaker Picks'] is not None}, " +
             f"Standing Picks Summary: {update_timestamps['Standings Picks Summary'] is not None}, " +
+            f"Leaderboard: {update_timestamps['Leaderboard'] is not None}, " +
             f"Update Timestamps: {update_timestamps_written}"
         )
+
+    return update_timestamps
+
+def time_pool_update(pool, shared, wb, *args):
+    '''
+    Update one pool, catching any error so the other pools carry on.
+
+    Inputs:
+    pool (dict): from get_pools(...)
+    shared (concurrent.futures.Future): result of scrapes.get_shared_data(...)
+    wb (gspread.Spreadsheet): workbook to update; None to open the pool's sheet
+    args: scoring_mode, rebuild_picks, simulation, and dry_run for
+        update_pool(...)
+
+    Returns: tuple of dict (from update_pool(...), None if the pool failed) and
+        float (seconds taken)
+    '''
+    start = time.perf_counter()
+    try:
+        update_timestamps = update_pool(pool, shared, wb, *args)
+    except Exception as e:
+        print(f"{pool['name'] or pool['sheet_id']}: pool update error: {e}")
+        update_timestamps = None
+
+    return update_timestamps, time.perf_counter() - start
+
+def update_pools(
+    pools, workbooks=None, scoring_mode=SCORING_MODE, rebuild_picks=False,
+    n_simulations=None, max_workers=POOL_MAX_WORKERS,
+    shared_data=None, dry_run=False
+):
+    '''
+    Scrape the standings and tiebreakers once, then score the picks and update
+    every pool's Google Sheet concurrently. A pool that fails doesn't stop the
+    others.
+
+    Inputs:
+    pools (list of dicts): from get_pools(...)
+    workbooks (dict): workbook to update by pool name, for pools not opened
+        with the service account
+    scoring_mode (str): one of SCORING_MODES
+    rebuild_picks (bool): if True, re-read every response instead of only
+        those submitted since the last run
+    n_simulations (int): simulated seasons for the projection tabs, simulated
+        once for every pool; by default, projection.N_SIMULATIONS; 0 to skip
+        projecting
+    max_workers (int): maximum number of pools to update at once
+    shared_data (dict): from scrapes.get_shared_data(...), if the pages were
+        already scraped; by default, they're scraped while the workbooks
+        connect
+    dry_run (bool): if True, do everything but write to the workbooks
+
+    Returns: dict of when each sheet was updated by pool name (None for pools
+        that failed)
+    '''
+    if workbooks is None:
+        workbooks = {}
+    start = time.perf_counter()
+
+    if shared_data is None:
+        metrics.reset()
+        # start every download before connecting to Google so they overlap
+        shared = fetch.run_concurrently({
+            'shared': (scrapes.get_shared_data, scrapes.start_scrapes())
+        })
+    else:
+        shared = {'shared': Future()}
+        shared['shared'].set_result(shared_data)
+
+    simulation = None
+    if n_simulations != 0:
+        # runs while the pools read their picks, and is waited on by each
+        simulation = fetch.run_concurrently({
+            'simulation': (simulate_seasons, shared['shared'], n_simulations)
+        })['simulation']
+
+    updates = fetch.run_concurrently(
+        {
+            i: (
+                time_pool_update, pool, shared['shared'],
+                workbooks.get(pool['name']), scoring_mode, rebuild_picks,
+                simulation, dry_run
+            )
+            for i, pool in enumerate(pools)
+        },
+        max_workers
+    )
+    pool_results = {}
+    for i, pool in enumerate(pools):
+        update_timestamps, seconds = updates[i].result()
+        pool_results[pool['name']] = update_timestamps
+        print(
+            f"Pool {pool['name'] or pool['sheet_id']}: " +
+            f"{'ok' if update_timestamps is not None else 'failed'} " +
+            f"in {seconds:.1f}s"
+        )
+
+    cache_stats = fetch.get_cache_stats()
+    print(
+        f"Page cache: {cache_stats['misses']} downloaded, " +
+        f"{cache_stats['memo_hits'] + cache_stats['fresh_hits']} reused, " +
+        f"{cache_stats['revalidated']} not modified, " +
+        f"{cache_stats['parse_hits']} parses skipped, " +
+        f"{cache_stats['bytes_saved'] / 1024:.0f} KB saved"
+    )
+
+    failed_pools = [
+        str(name) for name, update_timestamps in pool_results.items()
+        if update_timestamps is None
+    ]
+    metrics.set_value('run_seconds', time.perf_counter() - start)
+    metrics.set_value('run_timestamp_seconds', time.time())
+    metrics.set_value('pools_failed', len(failed_pools))
+    try:
+        metrics.write_metrics()
+    except Exception as e:
+        print(f'Metrics write error: {e}')
+    assert not failed_pools, f"Failed pools: {', '.join(failed_pools)}"
+
+    return pool_results
+
+def main(
+    wb=None, scoring_mode=SCORING_MODE, rebuild_picks=False,
+    n_simulations=None, dry_run=False
+):
+    '''
+    Scrape the standings and tiebreakers, score the picks, and update every
+    pool's Google Sheet.
+
+    Inputs:
+    wb (gspread.Spreadsheet): workbook to update, as the only pool; by
+        default, every pool in sheet_info.json opened with the service account
+        in service_key.json
+    scoring_mode (str): one of SCORING_MODES
+    rebuild_picks (bool): if True, re-read every response instead of only
+        those submitted since the last run
+    n_simulations (int): simulated seasons for the projection tabs; by
+        default, projection.N_SIMULATIONS; 0 to skip projecting
+    dry_run (bool): if True, do everything but write to the workbooks
+
+    Returns: dict of when each sheet was updated by pool name (None for pools
+        that failed)
+    '''
+    pools = get_pools(load_sheet_info())
+    workbooks = None
+    if wb is not None:
+        pools = pools[:1]
+        workbooks = {pools[0]['name']: wb}
+
+    return update_pools(
+        pools, workbooks, scoring_mode, rebuild_picks, n_simulations,
+        dry_run=dry_run
+    )
+
+if __name__ == '__main__':
+    import sys
+
+    import cli
+
+    # the commands import this module by name; give them this copy rather
+    # than loading it a second time
+    sys.modules.setdefault('nba_sheets', sys.modules[__name__])
+    cli.main()
@@ -0,0 +1,302 @@
+'''
+Parsers
+Pluggable backends for pulling a single table out of a large HTML page.
+
+Every backend returns BeautifulSoup tags for just the matching tables, so the
+scrapers read rows the same way regardless of backend. The html.parser
+backend builds a tree of the whole page (the original behaviour); the others
+locate the table first and only hand that fragment to BeautifulSoup.
+
+stream_table_rows(...) skips trees altogether: it tokenizes a page as its
+chunks arrive, keeps only the cells of one table's body rows, and stops
+reading once that table closes.
+'''
+
+import codecs
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import UnicodeDammit
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+def decode_html(content):
+    '''
+    Decode a page body the same way BeautifulSoup does.
+
+    Inputs:
+    content (bytes or str): page body
+
+    Returns: str
+    '''
+    if isinstance(content, str):
+        return content
+    return UnicodeDammit(content, is_html=True).unicode_markup
+
+def make_fragments_soup(fragments):
+    '''
+    Parse the outer HTML of each table into BeautifulSoup tags.
+
+    Inputs:
+    fragments (list of str): HTML of each table
+
+    Returns: list of bs4.element.Tag
+    '''
+    return [
+        BeautifulSoup(fragment, 'html.parser').find('table')
+        for fragment in fragments
+    ]
+
+def get_bs4_filters(table_id, table_class):
+    '''
+    Build BeautifulSoup attribute filters, leaving out unset ones (a None
+    filter would only match tables without that attribute).
+
+    Inputs:
+    table_id (str): id attribute of the table
+    table_class (str): one of the table's classes
+
+    Returns: dict
+    '''
+    filters = {}
+    if table_id is not None:
+        filters['id'] = table_id
+    if table_class is not None:
+        filters['class_'] = table_class
+
+    return filters
+
+def find_tables_html_parser(content, table_id, table_class):
+    '''
+    Find tables by building a full BeautifulSoup tree of the page.
+    '''
+    filters = get_bs4_filters(table_id, table_class)
+    soup = BeautifulSoup(content, 'html.parser')
+    return soup.find_all('table', **filters)
+
+def find_tables_strainer(content, table_id, table_class):
+    '''
+    Find tables with BeautifulSoup, only building tree nodes inside them.
+    '''
+    filters = get_bs4_filters(table_id, table_class)
+    strainer = SoupStrainer('table', **filters)
+    soup = BeautifulSoup(content, 'html.parser', parse_only=strainer)
+    return soup.find_all('table', **filters)
+
+def find_tables_lxml(content, table_id, table_class):
+    '''
+    Find tables with lxml's C parser and re-parse only those tables with
+    BeautifulSoup.
+    '''
+    conditions = []
+    if table_id is not None:
+        conditions.append(f'@id="{table_id}"')
+    if table_class is not None:
+        conditions.append(
+            f'contains(concat(" ", normalize-space(@class), " "), " {table_class} ")'
+        )
+    xpath = '//table'
+    if conditions:
+        xpath += '[' + ' and '.join(conditions) + ']'
+
+    root = lxml.html.document_fromstring(decode_html(content))
+    fragments = [
+        lxml.html.tostring(table, encoding='unicode', with_tail=False)
+        for table in root.xpath(xpath)
+    ]
+
+    return make_fragments_soup(fragments)
+
+def find_tables_selectolax(content, table_id, table_class):
+    '''
+    Find tables with selectolax's C parser and re-parse only those tables with
+    BeautifulSoup.
+    '''
+    selector = 'table'
+    if table_id is not None:
+        selector += f'[id="{table_id}"]'
+    if table_class is not None:
+        selector += f'.{table_class}'
+
+    tree = LexborHTMLParser(decode_html(content))
+    fragments = [table.html for table in tree.css(selector)]
+
+    return make_fragments_soup(fragments)
+
+BACKENDS = {
+    'html.parser': find_tables_html_parser,
+    'strainer': find_tables_strainer,
+    'lxml': find_tables_lxml,
+    'selectolax': find_tables_selectolax,
+}
+
+def is_backend_available(backend):
+    '''
+    Check whether a backend's optional dependency is installed.
+
+    Inputs:
+    backend (str): key of BACKENDS
+
+    Returns: bool
+    '''
+    if backend == 'lxml':
+        return lxml is not None
+    if backend == 'selectolax':
+        return LexborHTMLParser is not None
+    return backend in BACKENDS
+
+PARSER_BACKEND = 'lxml' if is_backend_available('lxml') else 'strainer'
+
+def find_tables(content, table_id=None, table_class=None, backend=None):
+    '''
+    Find every table in a page matching an id and/or class.
+
+    Inputs:
+    content (bytes or str): page body
+    table_id (str): id attribute of the table
+    table_class (str): one of the table's classes
+    backend (str): key of BACKENDS; by default, PARSER_BACKEND
+
+    Returns: list of bs4.element.Tag
+    '''
+    backend = backend or PARSER_BACKEND
+    if not is_backend_available(backend):
+        raise ValueError(f'Parser backend {backend} is not available')
+
+    return BACKENDS[backend](content, table_id, table_class)
+
+def find_table(content, table_id=None, table_class=None, backend=None):
+    '''
+    Find the first table in a page matching an id and/or class.
+
+    Inputs:
+    content (bytes or str): page body
+    table_id (str): id attribute of the table
+    table_class (str): one of the table's classes
+    backend (str): key of BACKENDS; by default, PARSER_BACKEND
+
+    Returns: bs4.element.Tag, or None if there is no matching table
+    '''
+    tables = find_tables(content, table_id, table_class, backend)
+    if not tables:
+        return None
+
+    return tables[0]
+
+class TableRowsParser(HTMLParser):
+    '''
+    Incremental tokenizer that keeps the data-stat cells of one table's body
+    rows and ignores everything else on the page.
+
+    Inputs:
+    table_id (str): id attribute of the table
+    stat_ids (iterable of str): data-stat attributes to keep; None for all
+    '''
+    def __init__(self, table_id, stat_ids=None):
+        super().__init__(convert_charrefs=True)
+        self.table_id = table_id
+        self.stat_ids = None if stat_ids is None else set(stat_ids)
+        self.depth = 0 # tables open inside the target table, itself included
+        self.in_body = False
+        self.row = None
+        self.stat = None
+        self.text = []
+        self.rows = []
+        self.done = False
+
+    def close_cell(self):
+        '''
+        Keep the text of the open cell, if it is one of the stats kept.
+        '''
+        if self.stat is not None:
+            self.row[self.stat] = ''.join(self.text).strip()
+            self.stat = None
+
+    def close_row(self):
+        '''
+        Keep the open row, closing its last cell (end tags are optional).
+        '''
+        self.close_cell()
+        if self.row is not None:
+            self.rows.append(self.row)
+            self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'table':
+            if self.depth or dict(attrs).get('id') == self.table_id:
+                self.depth += 1
+            return
+        if self.depth != 1:
+            return
+
+        if tag == 'tbody':
+            self.in_body = True
+        elif tag == 'tr' and self.in_body:
+            self.close_row()
+            self.row = {'row_id': dict(attrs).get('id')}
+        elif tag in ('th', 'td') and self.row is not None:
+            self.close_cell()
+            stat = dict(attrs).get('data-stat')
+            if stat is not None and (self.stat_ids is None or stat in self.stat_ids):
+                self.stat = stat
+                self.text = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self.depth:
+            return
+        if tag == 'table':
+            self.depth -= 1
+            if not self.depth:
+                self.close_row()
+                self.done = True
+            return
+        if self.depth != 1:
+            return
+
+        if tag == 'tbody':
+            self.close_row()
+            self.in_body = False
+        elif tag == 'tr':
+            self.close_row()
+        elif tag in ('th', 'td'):
+            self.close_cell()
+
+    def handle_data(self, data):
+        if self.stat is not None:
+            self.text.append(data)
+
+def stream_table_rows(chunks, encoding, table_id, stat_ids=None):
+    '''
+    Pull the body rows of one table out of a page as its chunks arrive,
+    stopping as soon as the table closes.
+
+    Inputs:
+    chunks (iterator of bytes): page body
+    encoding (str): encoding of the body
+    table_id (str): id attribute of the table
+    stat_ids (iterable of str): data-stat attributes to keep; None for all
+
+    Returns: list of dicts of the row's id (row_id) and each cell's text by
+        data-stat, or None if the page has no such table
+    '''
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    parser = TableRowsParser(table_id, stat_ids)
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.done:
+            return parser.rows
+
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+
+    return parser.rows if parser.depth or parser.done else None
@@ -0,0 +1,358 @@
+'''
+Picks store
+Local copy of the parsed form responses, so a run only reads and parses the
+responses submitted since the last one.
+
+The parsed standings and tiebreaker picks are kept as Parquet files (pickles,
+with a warning, if pyarrow isn't installed), with every pick tagged by its
+response's row number, timestamp, and email. A JSON file records which
+worksheet they came from, its header row, the format the picks were saved in,
+and how many responses have been read. A run reads the header and
+any rows past that count in one ranged request, and skips the read entirely
+when the worksheet's grid has no room for new rows.
+
+Responses edited in place aren't noticed, so the store is rebuilt from a full
+read once it is older than PICKS_STORE_MAX_AGE or when asked to.
+'''
+
+import io
+import json
+import os
+import threading
+import time
+import warnings
+
+import gspread
+import pandas as pd
+from gspread.utils import numericise, numericise_all, rowcol_to_a1
+
+import fetch
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+PICKS_STORE_DIR = '.picks_store' # None to read every response on every run
+PICKS_STORE_MAX_AGE = 7 * 24 * 60 * 60 # seconds before a full re-read
+STORE_FORMAT = 'parquet' if pyarrow is not None else 'pickle'
+# formats that can be read here, whichever format this run saves in
+READABLE_FORMATS = ['parquet', 'pickle'] if pyarrow is not None else ['pickle']
+
+FRAME_NAMES = ['standings_picks', 'tiebreaker_picks']
+RESPONSE_COL = '__response__' # 0-based row number of the response
+KEY_COLS = ['timestamp', 'Email'] # response columns after renaming
+
+# per thread, so pools updated at once each see their own read
+_read_stats = threading.local()
+
+def get_read_stats():
+    '''
+    Get how the latest read_picks(...) call on this thread got its responses.
+
+    Returns: dict of whether the whole worksheet was read, the number of
+        responses read, and the number of responses stored
+    '''
+    return dict(getattr(_read_stats, 'stats', {}))
+
+def get_store_path(name, store_dir, ext):
+    '''
+    Get where one part of the store is saved.
+
+    Inputs:
+    name (str): one of FRAME_NAMES, or meta
+    store_dir (str): directory of the store
+    ext (str): file extension
+
+    Returns: str
+    '''
+    return os.path.join(store_dir, f'{name}.{ext}')
+
+def get_mixed_cols(df):
+    '''
+    Find columns mixing strings with numbers (e.g. tiebreaker picks left
+    blank), which Parquet can't store as one type.
+
+    Inputs:
+    df (pd.DataFrame): parsed picks
+
+    Returns: list of str
+    '''
+    return [
+        col for col in df.columns
+        if df[col].dtype == object and
+        pd.api.types.infer_dtype(df[col], skipna=False) not in {'string', 'empty'}
+    ]
+
+def write_frame(df, fp):
+    '''
+    Save a dataframe in STORE_FORMAT, with mixed columns saved as strings.
+
+    Inputs:
+    df (pd.DataFrame): parsed picks
+    fp (str): destination path
+
+    Returns: list of str, the columns saved as strings
+    '''
+    mixed_cols = get_mixed_cols(df)
+    df = df.astype({col: str for col in mixed_cols})
+
+    buffer = io.BytesIO()
+    if STORE_FORMAT == 'parquet':
+        df.to_parquet(buffer, index=False)
+    else:
+        warnings.warn(
+            "pyarrow isn't installed, so picks and history are saved as "
+            "pickles instead of Parquet files"
+        )
+        df.to_pickle(buffer)
+    fetch.write_atomic(fp, buffer.getvalue())
+
+    return mixed_cols
+
+def read_frame(fp, mixed_cols=(), memory_map=False, store_format=None):
+    '''
+    Read a dataframe saved by write_frame(...), numericising mixed columns the
+    same way gspread does.
+
+    Inputs:
+    fp (str): path of the saved dataframe
+    mixed_cols (list of str): columns saved as strings
+    memory_map (bool): if True, map Parquet files into memory instead of
+        reading them (ignored for pickles)
+    store_format (str): format the dataframe was saved in; by default,
+        STORE_FORMAT
+
+    Returns: pd.DataFrame
+    '''
+    if (store_format or STORE_FORMAT) == 'parquet':
+        df = pd.read_parquet(fp, memory_map=memory_map)
+    else:
+        df = pd.read_pickle(fp)
+
+    for col in mixed_cols:
+        df[col] = df[col].map(numericise)
+
+    return df
+
+def load_store(ws, store_dir):
+    '''
+    Load the stored picks for a worksheet, if the store holds that worksheet's
+    responses and is still young enough to use.
+
+    Inputs:
+    ws (gspread.Worksheet): responses worksheet
+    store_dir (str): directory of the store
+
+    Returns: tuple of dict (metadata) and list of pd.DataFrame, or (None, None)
+    '''
+    try:
+        with open(get_store_path('meta', store_dir, 'json'), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+
+    is_usable = (
+        meta.get('spreadsheet_id') == ws.spreadsheet_id and
+        meta.get('worksheet_id') == ws.id and
+        meta.get('col_count') == ws.col_count and
+        meta.get('format') in READABLE_FORMATS and
+        time.time() - meta.get('built_at', 0) < PICKS_STORE_MAX_AGE
+    )
+    if not is_usable:
+        return None, None
+
+    try:
+        frames = [
+            read_frame(
+                get_store_path(name, store_dir, meta['format']),
+                meta['mixed_cols'][name],
+                store_format=meta['format']
+            )
+            for name in FRAME_NAMES
+        ]
+    except (OSError, ValueError, KeyError) as e:
+        print(f'Picks store read error: {e}')
+        return None, None
+
+    return meta, frames
+
+def save_store(ws, store_dir, meta, frames):
+    '''
+    Save the parsed picks and their metadata, metadata last so a partly
+    written store is never used.
+
+    Inputs:
+    ws (gspread.Worksheet): responses worksheet
+    store_dir (str): directory of the store
+    meta (dict): header, n_responses, and built_at
+    frames (list of pd.DataFrame): parsed picks, in FRAME_NAMES order
+    '''
+    meta = {
+        **meta,
+        'spreadsheet_id': ws.spreadsheet_id,
+        'worksheet_id': ws.id,
+        'col_count': ws.col_count,
+        'format': STORE_FORMAT,
+        'mixed_cols': {},
+    }
+    for name, df in zip(FRAME_NAMES, frames):
+        meta['mixed_cols'][name] = write_frame(
+            df, get_store_path(name, store_dir, STORE_FORMAT)
+        )
+
+    fetch.write_atomic(
+        get_store_path('meta', store_dir, 'json'),
+        json.dumps(meta).encode('utf-8')
+    )
+
+def make_responses_df(header, rows, first_response):
+    '''
+    Build a dataframe of responses the way Worksheet.get_all_records() does:
+    rows padded to the header and numbers numericised.
+
+    Inputs:
+    header (list of str): worksheet header row
+    rows (list of lists): response rows
+    first_response (int): 0-based row number of the first response
+
+    Returns: pd.DataFrame
+    '''
+    rows = [
+        numericise_all((row + [''] * len(header))[:len(header)])
+        for row in rows
+    ]
+    df = pd.DataFrame(rows, columns=header)
+    df[RESPONSE_COL] = range(first_response, first_response + len(rows))
+
+    return df
+
+def strip_row(row):
+    '''
+    Drop a row's trailing empty cells, which the Sheets API may or may not
+    return depending on the rest of the range.
+
+    Inputs:
+    row (list): cell values
+
+    Returns: list
+    '''
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+
+    return row
+
+def sort_picks(df):
+    '''
+    Put picks in the order a single parse of every response gives: each
+    response's first pick, then each response's second pick, and so on.
+
+    Inputs:
+    df (pd.DataFrame): parsed picks with RESPONSE_COL
+
+    Returns: pd.DataFrame
+    '''
+    pick_order = df.groupby(RESPONSE_COL, sort=False).cumcount()
+
+    return (
+        df
+        .assign(__pick__=pick_order.to_numpy())
+        .sort_values(['__pick__', RESPONSE_COL], kind='stable')
+        .drop('__pick__', axis=1)
+        .reset_index(drop=True)
+    )
+
+def merge_picks(stored_df, new_df):
+    '''
+    Merge newly parsed picks into the stored ones, replacing stored picks from
+    any response with the same timestamp and email.
+
+    Inputs:
+    stored_df (pd.DataFrame): stored picks
+    new_df (pd.DataFrame): newly parsed picks
+
+    Returns: pd.DataFrame
+    '''
+    new_keys = pd.MultiIndex.from_frame(new_df.loc[:, KEY_COLS])
+    is_replaced = pd.MultiIndex.from_frame(stored_df.loc[:, KEY_COLS]).isin(new_keys)
+
+    return sort_picks(pd.concat([stored_df[~is_replaced], new_df]))
+
+def read_picks(ws, parse_fxn, id_cols, rebuild=False, store_dir=None):
+    '''
+    Read each participant's picks, parsing only responses that aren't in the
+    picks store yet.
+
+    Inputs:
+    ws (gspread.Worksheet): responses worksheet
+    parse_fxn (function): takes a dataframe of responses and the columns
+        identifying each response, and returns the standings picks and
+        tiebreaker picks dataframes
+    id_cols (list of str): columns identifying each response in the returned
+        picks
+    rebuild (bool): if True, read every response and rebuild the store
+    store_dir (str): directory of the store; by default, PICKS_STORE_DIR
+
+    Returns: tuple of pd.DataFrame (picks) and pd.DataFrame (tiebreakers)
+    '''
+    store_dir = store_dir or PICKS_STORE_DIR
+    store_cols = (
+        [RESPONSE_COL] + [col for col in KEY_COLS if col not in id_cols] +
+        list(id_cols)
+    )
+    extra_cols = [col for col in store_cols if col not in id_cols]
+
+    meta, frames = None, None
+    if store_dir is not None and not rebuild:
+        meta, frames = load_store(ws, store_dir)
+
+    rows = None
+    if meta is not None:
+        n_responses = meta['n_responses']
+        if ws.row_count <= n_responses + 1:
+            rows = [] # the grid has no room for new responses
+        else:
+            last_cell = rowcol_to_a1(ws.row_count, len(meta['header']))
+            header_range, rows_range = ws.batch_get(
+                ['1:1', f'A{n_responses + 2}:{last_cell}']
+            )
+            if header_range and strip_row(header_range[0]) == strip_row(meta['header']):
+                rows = list(rows_range)
+
+    if rows is None:
+        # no usable store, or the header changed: read every response
+        values = ws.get(pad_values=True)
+        if not values or values == [[]]:
+            raise gspread.exceptions.GSpreadException('No responses to read')
+        meta = {
+            'header': values[0], 'n_responses': 0, 'built_at': time.time()
+        }
+        frames = None
+        rows = values[1:]
+
+    is_full_read = frames is None
+    if rows or is_full_read:
+        new_frames = parse_fxn(
+            make_responses_df(meta['header'], rows, meta['n_responses']),
+            store_cols
+        )
+        if is_full_read:
+            frames = [sort_picks(df) for df in new_frames]
+        else:
+            frames = [
+                merge_picks(stored_df, new_df)
+                for stored_df, new_df in zip(frames, new_frames)
+            ]
+        meta['n_responses'] += len(rows)
+
+        if store_dir is not None:
+            save_store(ws, store_dir, meta, frames)
+
+    _read_stats.stats = {
+        'full_read': is_full_read,
+        'responses_read': len(rows),
+        'responses_stored': meta['n_responses'],
+    }
+
+    return tuple(df.drop(extra_cols, axis=1) for df in frames)
@@ -0,0 +1,373 @@
+'''
+Projection
+Monte Carlo projection of the final standings and the pool's results.
+
+Every simulated season starts from each team's current W-L. Without a
+schedule, each team's remaining games are drawn as a binomial on its win
+probability; with one, each remaining game is drawn with log5 odds between its
+two teams. Teams are seeded by wins within their conference (ties broken at
+random) and every entrant's picks are scored on each simulated season with the
+same rank points and playoff points as the real standings.
+
+Simulations run in fixed-size chunks, each with its own child of one seed, so
+results are reproducible for a given seed however many workers run them. The
+simulated seeds depend only on the standings, so a run simulates them once and
+scores every pool's picks against the same seasons.
+'''
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import scoring
+
+GAMES_PER_SEASON = 82
+PRIOR_GAMES = 10 # .500 games added to each record when estimating strength
+N_SIMULATIONS = 100000
+CHUNK_SIZE = 5000 # simulations per task
+MAX_WORKERS = os.cpu_count()
+
+# season inputs shared by every chunk a worker process runs
+_worker_inputs = None
+
+def get_win_probabilities(wins, losses):
+    '''
+    Estimate each team's chance of winning a game from its record, shrunk
+    toward .500 by PRIOR_GAMES.
+
+    Inputs:
+    wins (np.ndarray): wins so far
+    losses (np.ndarray): losses so far
+
+    Returns: np.ndarray of float
+    '''
+    return (wins + PRIOR_GAMES / 2) / (wins + losses + PRIOR_GAMES)
+
+def get_seed_points(simulation, standings_picks_df):
+    '''
+    Work out how many points each entrant gets from each team finishing at
+    each seed, so scoring a simulated season is one matrix product.
+
+    Inputs:
+    simulation (dict): from simulate_seasons(...)
+    standings_picks_df (pd.DataFrame): standings picks
+
+    Returns: tuple of np.ndarray ((team, seed) x entrants points) and
+        pd.MultiIndex (Email and Name of each entrant)
+    '''
+    standings_df = simulation['standings_df']
+    n_seeds = simulation['n_seeds']
+    team_ids = {team: i for i, team in enumerate(standings_df['Team'])}
+
+    # playoff points the real standings give each seed
+    playoff_points = np.zeros(n_seeds)
+    playoff_points[standings_df['Rank'].to_numpy()] = (
+        standings_df['Playoff Points'].to_numpy()
+    )
+
+    picks_df = standings_picks_df.assign(
+        __team__=standings_picks_df['Team'].map(team_ids)
+    ).dropna(subset=['__team__'])
+    entrant_ids, entrants = pd.factorize(
+        pd.MultiIndex.from_frame(picks_df.loc[:, ['Email', 'Name']])
+    )
+    pick_teams = picks_df['__team__'].to_numpy(dtype=int)
+    pick_ranks = picks_df['Picks Rank'].to_numpy(dtype=int)
+
+    seeds = np.arange(n_seeds)
+    pick_points = scoring.get_rank_points(
+        np.repeat(pick_ranks, n_seeds), np.tile(seeds, len(pick_ranks))
+    ).reshape(len(pick_ranks), n_seeds) + playoff_points
+
+    seed_points = np.zeros((len(team_ids) * n_seeds, len(entrants)))
+    np.add.at(
+        seed_points,
+        (
+            (pick_teams * n_seeds)[:, np.newaxis] + seeds,
+            np.broadcast_to(entrant_ids[:, np.newaxis], pick_points.shape)
+        ),
+        pick_points
+    )
+
+    return seed_points, entrants
+
+def make_season_inputs(standings_df, schedule=None):
+    '''
+    Turn the standings and remaining schedule into the arrays every
+    simulation chunk needs.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings from get_standings(...)
+    schedule (list of tuples): remaining games as (team, team) pairs of full
+        team names; by default, each team's remaining games are played against
+        a .500 field
+
+    Returns: dict
+    '''
+    standings_df = standings_df.reset_index(drop=True)
+    team_ids = {team: i for i, team in enumerate(standings_df['Team'])}
+
+    wins_losses = standings_df['W-L'].str.extract(r'^(\d+)-(\d+)$').astype(int)
+    wins = wins_losses[0].to_numpy()
+    losses = wins_losses[1].to_numpy()
+
+    conference_codes, conferences = pd.factorize(standings_df['Conference'])
+    conference_team_ids = [
+        np.flatnonzero(conference_codes == i) for i in range(len(conferences))
+    ]
+
+    if schedule is None:
+        games = None
+    else:
+        games = np.array(
+            [(team_ids[a], team_ids[b]) for a, b in schedule], dtype=int
+        ).reshape(-1, 2)
+
+    return {
+        'wins': wins,
+        'remaining': np.maximum(GAMES_PER_SEASON - wins - losses, 0),
+        'win_probabilities': get_win_probabilities(wins, losses),
+        'conference_team_ids': conference_team_ids,
+        'games': games,
+    }
+
+def simulate_final_wins(inputs, n_sims, rng):
+    '''
+    Simulate every team's final win total.
+
+    Inputs:
+    inputs (dict): from make_season_inputs(...)
+    n_sims (int): number of seasons
+    rng (np.random.Generator): random numbers
+
+    Returns: np.ndarray of int, seasons x teams
+    '''
+    wins = np.broadcast_to(inputs['wins'], (n_sims, len(inputs['wins'])))
+    games = inputs['games']
+    p = inputs['win_probabilities']
+
+    if games is None:
+        return wins + rng.binomial(inputs['remaining'], p, size=wins.shape)
+
+    # log5: chance the first team of each game beats the second
+    p_a, p_b = p[games[:, 0]], p[games[:, 1]]
+    p_game = p_a * (1 - p_b) / (p_a * (1 - p_b) + p_b * (1 - p_a))
+    first_team_won = rng.random((n_sims, len(games))) < p_game
+
+    winners = np.where(first_team_won, games[:, 0], games[:, 1])
+    offsets = np.arange(n_sims)[:, np.newaxis] * len(p)
+    new_wins = np.bincount(
+        (winners + offsets).ravel(), minlength=n_sims * len(p)
+    ).reshape(n_sims, len(p))
+
+    return wins + new_wins
+
+def get_seeds(final_wins, conference_team_ids, rng):
+    '''
+    Seed teams within their conference by wins, breaking ties at random.
+
+    Inputs:
+    final_wins (np.ndarray): seasons x teams
+    conference_team_ids (list of np.ndarray): teams in each conference
+    rng (np.random.Generator): random numbers
+
+    Returns: np.ndarray of int, seasons x teams, 1 for the best team
+    '''
+    n_sims = len(final_wins)
+    keys = final_wins + rng.random(final_wins.shape) # jitter only breaks ties
+    seeds = np.zeros(final_wins.shape, dtype=int)
+    for team_ids in conference_team_ids:
+        order = np.argsort(-keys[:, team_ids], axis=1)
+        conference_seeds = np.empty_like(order)
+        conference_seeds[np.arange(n_sims)[:, np.newaxis], order] = (
+            np.arange(1, len(team_ids) + 1)
+        )
+        seeds[:, team_ids] = conference_seeds
+
+    return seeds
+
+def simulate_chunk(n_sims, seed_sequence, inputs=None):
+    '''
+    Simulate one chunk of seasons.
+
+    Inputs:
+    n_sims (int): number of seasons
+    seed_sequence (np.random.SeedSequence): seed for this chunk
+    inputs (dict): from make_season_inputs(...); by default, the inputs this
+        worker process was started with
+
+    Returns: dict of each team's seed in each season and final win sums
+    '''
+    inputs = inputs or _worker_inputs
+    rng = np.random.default_rng(seed_sequence)
+    final_wins = simulate_final_wins(inputs, n_sims, rng)
+    seeds = get_seeds(final_wins, inputs['conference_team_ids'], rng)
+
+    return {
+        'seeds': seeds.astype(np.int8),
+        'win_sums': final_wins.sum(axis=0),
+    }
+
+def set_worker_inputs(inputs):
+    '''
+    Keep the season inputs in a worker process, so each chunk sent to it only
+    carries its size and seed.
+
+    Inputs:
+    inputs (dict): from make_season_inputs(...)
+    '''
+    global _worker_inputs
+    _worker_inputs = inputs
+
+def simulate_seasons(
+    standings_df, n_sims=None, seed=None, schedule=None, max_workers=MAX_WORKERS
+):
+    '''
+    Simulate the rest of the season, keeping every team's seed in every
+    simulated season so any number of pools can be scored against them.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings from get_standings(...)
+    n_sims (int): number of simulated seasons; by default, N_SIMULATIONS
+    seed (int): random seed; None for a different projection every run
+    schedule (list of tuples): remaining games as (team, team) pairs
+    max_workers (int): worker processes; 1 runs every chunk in this process
+
+    Returns: dict of the standings, seeds per conference plus one for seed 0,
+        seasons x teams seeds, and final win sums
+    '''
+    n_sims = n_sims or N_SIMULATIONS
+    inputs = make_season_inputs(standings_df, schedule)
+
+    chunk_sizes = [CHUNK_SIZE] * (n_sims // CHUNK_SIZE)
+    if n_sims % CHUNK_SIZE:
+        chunk_sizes.append(n_sims % CHUNK_SIZE)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    if max_workers == 1 or len(chunk_sizes) == 1:
+        chunks = [
+            simulate_chunk(chunk_size, seed_sequence, inputs)
+            for chunk_size, seed_sequence in zip(chunk_sizes, seed_sequences)
+        ]
+    else:
+        # spawned, not forked, since runs call this from threads
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=set_worker_inputs,
+            initargs=(inputs,)
+        ) as executor:
+            chunks = list(executor.map(simulate_chunk, chunk_sizes, seed_sequences))
+
+    return {
+        'standings_df': standings_df.reset_index(drop=True),
+        'n_seeds': max(len(ids) for ids in inputs['conference_team_ids']) + 1,
+        'seeds': np.concatenate([chunk['seeds'] for chunk in chunks]),
+        'win_sums': sum(chunk['win_sums'] for chunk in chunks),
+    }
+
+def get_seed_projection(simulation):
+    '''
+    Project each team's final wins and chance of finishing at each seed.
+
+    Inputs:
+    simulation (dict): from simulate_seasons(...)
+
+    Returns: pd.DataFrame
+    '''
+    seeds = simulation['seeds']
+    n_sims, n_teams = seeds.shape
+    n_seeds = simulation['n_seeds']
+
+    seeds_df = simulation['standings_df'].loc[:, ['Conference', 'Team']].copy()
+    seeds_df['Expected Wins'] = simulation['win_sums'] / n_sims
+    seed_counts = np.bincount(
+        (np.arange(n_teams) * n_seeds + seeds).ravel(),
+        minlength=n_teams * n_seeds
+    )
+    seed_probabilities = (
+        seed_counts.reshape(n_teams, n_seeds)[:, 1:] / n_sims
+    )
+    seeds_df['Mean Seed'] = seed_probabilities @ np.arange(1, n_seeds)
+    for i in range(1, n_seeds):
+        seeds_df[f'Seed {i}'] = seed_probabilities[:, i - 1]
+
+    return seeds_df
+
+def get_pool_projection(simulation, standings_picks_df):
+    '''
+    Score every entrant's picks on each simulated season, and project their
+    points and chance of winning the pool.
+
+    Inputs:
+    simulation (dict): from simulate_seasons(...)
+    standings_picks_df (pd.DataFrame): standings picks
+
+    Returns: pd.DataFrame
+    '''
+    seed_points, entrants = get_seed_points(simulation, standings_picks_df)
+    seeds = simulation['seeds']
+    n_sims, n_teams = seeds.shape
+    n_seeds = simulation['n_seeds']
+
+    point_sums = np.zeros(len(entrants))
+    point_square_sums = np.zeros(len(entrants))
+    win_shares = np.zeros(len(entrants))
+    for start in range(0, n_sims, CHUNK_SIZE):
+        chunk_seeds = seeds[start:start + CHUNK_SIZE]
+        # one column per (team, seed), 1 where the team finished at that seed
+        finishes = np.zeros((len(chunk_seeds), n_teams * n_seeds))
+        finishes[
+            np.arange(len(chunk_seeds))[:, np.newaxis],
+            np.arange(n_teams) * n_seeds + chunk_seeds
+        ] = 1
+        totals = finishes @ seed_points
+
+        point_sums += totals.sum(axis=0)
+        point_square_sums += (totals ** 2).sum(axis=0)
+        if len(entrants):
+            is_winner = totals == totals.max(axis=1, keepdims=True)
+            win_shares += (
+                is_winner / is_winner.sum(axis=1, keepdims=True)
+            ).sum(axis=0)
+
+    entrants_df = pd.DataFrame(list(entrants), columns=['Email', 'Name'])
+    expected_points = point_sums / n_sims
+    entrants_df['Expected Points'] = expected_points
+    entrants_df['Points Std Dev'] = np.sqrt(np.maximum(
+        point_square_sums / n_sims - expected_points ** 2, 0
+    ))
+    entrants_df['Win Probability'] = win_shares / n_sims
+
+    return entrants_df.sort_values(
+        ['Win Probability', 'Expected Points'], ascending=False, kind='stable'
+    ).reset_index(drop=True)
+
+def project(
+    standings_df, standings_picks_df, n_sims=None, seed=None, schedule=None,
+    max_workers=MAX_WORKERS
+):
+    '''
+    Project the final seeds of every team and the results of every entrant.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings from get_standings(...)
+    standings_picks_df (pd.DataFrame): standings picks
+    n_sims (int): number of simulated seasons; by default, N_SIMULATIONS
+    seed (int): random seed; None for a different projection every run
+    schedule (list of tuples): remaining games as (team, team) pairs
+    max_workers (int): worker processes; 1 runs every chunk in this process
+
+    Returns: tuple of pd.DataFrame (team seeds) and pd.DataFrame (entrants)
+    '''
+    simulation = simulate_seasons(
+        standings_df, n_sims, seed, schedule, max_workers
+    )
+
+    return (
+        get_seed_projection(simulation),
+        get_pool_projection(simulation, standings_picks_df)
+    )
@@ -0,0 +1,177 @@
+'''
+Scoring
+Score every pick in the pool with vectorized pandas/NumPy instead of
+per-row spreadsheet formulas.
+
+The scored tabs hold the same columns the formula mode writes (Standings
+Rank, Rank Points, Playoff Points, and Total Points for standings picks;
+Actual Value and Difference for tiebreaker picks) as static values, so the
+sheet has nothing to recalculate when it's opened or edited.
+'''
+
+import numpy as np
+import pandas as pd
+
+# points for a pick 0, 1, 2, or 3 places away from the team's actual rank
+RANK_POINTS = np.array([7, 5, 3, 1])
+
+LEADERBOARD_COLS = [
+    'Place', 'Name', 'Picks Source', 'Rank Points', 'Playoff Points',
+    'Total Points'
+]
+
+def get_rank_points(picks_rank, standings_rank):
+    '''
+    Score how close each pick was to the team's actual rank.
+
+    Inputs:
+    picks_rank (array-like of int): rank each team was picked at
+    standings_rank (array-like of float): each team's actual rank; NaN if the
+        team isn't in the standings
+
+    Returns: np.ndarray of float, NaN where the actual rank is unknown
+    '''
+    distance = np.abs(
+        np.asarray(picks_rank, dtype=float) - np.asarray(standings_rank, dtype=float)
+    )
+    is_known = ~np.isnan(distance)
+    distance = np.where(is_known, distance, len(RANK_POINTS)).astype(int)
+
+    points = np.zeros(len(distance), dtype=float)
+    is_close = distance < len(RANK_POINTS)
+    points[is_close] = RANK_POINTS[distance[is_close]]
+    points[~is_known] = np.nan
+
+    return points
+
+def score_standings_picks(standings_df, standings_picks_df):
+    '''
+    Score each standings pick against the current standings.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings from get_standings(...)
+    standings_picks_df (pd.DataFrame): standings picks
+
+    Returns: pd.DataFrame, the picks with Standings Rank, Rank Points, Playoff
+        Points, and Total Points columns; NaN for teams not in the standings
+    '''
+    standings_by_team = standings_df.drop_duplicates('Team').set_index('Team')
+
+    scored_df = standings_picks_df.copy(deep=True)
+    scored_df['Standings Rank'] = (
+        scored_df['Team'].map(standings_by_team['Rank']).astype(float)
+    )
+    scored_df['Rank Points'] = get_rank_points(
+        scored_df['Picks Rank'], scored_df['Standings Rank']
+    )
+    scored_df['Playoff Points'] = (
+        scored_df['Team'].map(standings_by_team['Playoff Points']).astype(float)
+    )
+    scored_df['Total Points'] = (
+        scored_df['Rank Points'] + scored_df['Playoff Points']
+    )
+
+    return scored_df
+
+def score_tiebreaker_picks(tiebreaker_picks_df, tiebreaker_values):
+    '''
+    Score each tiebreaker pick against the tiebreakers' actual values.
+
+    Inputs:
+    tiebreaker_picks_df (pd.DataFrame): tiebreaker picks
+    tiebreaker_values (dict): actual value of each tiebreaker by number; None
+        if it couldn't be scraped
+
+    Returns: pd.DataFrame, the picks with Actual Value and Difference columns;
+        NaN where either value is missing
+    '''
+    actual_values = pd.Series(
+        {str(n): value for n, value in tiebreaker_values.items()}, dtype=float
+    )
+
+    scored_df = tiebreaker_picks_df.copy(deep=True)
+    scored_df['Tiebreaker #'] = scored_df['Tiebreaker #'].astype(int)
+    scored_df['Actual Value'] = (
+        scored_df['Tiebreaker #'].astype(str).map(actual_values)
+    )
+    scored_df['Difference'] = (
+        pd.to_numeric(scored_df['Pick Value'], errors='coerce') -
+        scored_df['Actual Value']
+    ).abs()
+
+    return scored_df
+
+def make_leaderboard(scored_standings_picks_df, scored_tiebreaker_picks_df):
+    '''
+    Total each entrant's points and rank the entrants, breaking ties by the
+    tiebreaker differences in order (smaller is better). Entrants who are
+    tied on everything share a place.
+
+    Inputs:
+    scored_standings_picks_df (pd.DataFrame): from score_standings_picks(...)
+    scored_tiebreaker_picks_df (pd.DataFrame): from score_tiebreaker_picks(...)
+
+    Returns: pd.DataFrame
+    '''
+    entrant_cols = ['Email', 'Name', 'Picks Source']
+    points_df = (
+        scored_standings_picks_df
+        .groupby(entrant_cols, sort=False)
+        [['Rank Points', 'Playoff Points', 'Total Points']]
+        .sum(min_count=1)
+    )
+
+    # pivot_table(..., dropna=False) would make a row for every combination
+    # of Email, Name, and Picks Source, quadratic in the pool's size
+    differences_df = (
+        scored_tiebreaker_picks_df
+        .groupby(entrant_cols + ['Tiebreaker #'])
+        ['Difference']
+        .first()
+        .unstack('Tiebreaker #')
+    )
+    tiebreaker_cols = [
+        f'Tiebreaker #{n} Difference' for n in differences_df.columns
+    ]
+    differences_df.columns = tiebreaker_cols
+
+    leaderboard_df = points_df.join(differences_df, how='left')
+    sort_cols = ['Total Points'] + tiebreaker_cols
+    leaderboard_df = leaderboard_df.sort_values(
+        sort_cols,
+        ascending=[False] + [True] * len(tiebreaker_cols),
+        na_position='last',
+        kind='stable'
+    ).reset_index()
+
+    # each entrant takes the place of the first entrant they're tied with
+    sort_values = leaderboard_df[sort_cols]
+    is_tied = (
+        (sort_values == sort_values.shift()) |
+        (sort_values.isna() & sort_values.shift().isna())
+    ).all(axis=1)
+    is_tied.iloc[:1] = False
+    positions = pd.Series(np.arange(1, len(leaderboard_df) + 1, dtype=float))
+    leaderboard_df['Place'] = (
+        positions.mask(is_tied.to_numpy()).ffill().astype(int)
+    )
+
+    return leaderboard_df[LEADERBOARD_COLS + tiebreaker_cols]
+
+def to_sheet_values(df):
+    '''
+    Replace missing values with empty cells and whole floats with ints so a
+    scored dataframe can be written to the Google Sheet as-is.
+
+    Inputs:
+    df (pd.DataFrame): scored data
+
+    Returns: pd.DataFrame
+    '''
+    sheet_df = df.astype(object)
+    for col in df.select_dtypes('float').columns:
+        is_whole = df[col].notna() & (df[col] % 1 == 0)
+        whole_values = df[col].fillna(0).astype('int64').astype(object)
+        sheet_df[col] = sheet_df[col].mask(is_whole, whole_values)
+
+    return sheet_df.where(df.notna(), '')
@@ -0,0 +1,108 @@
+'''
+Scrapes
+The pages every pool shares, scraped once per run: the standings, from the
+results file or a hedged scrape of the standings sites, and the tables the
+tiebreakers read. Nothing here touches Google, so the standings and
+tiebreakers commands run without loading the Sheets side of nba_sheets.py.
+'''
+
+import time
+from datetime import datetime
+
+import pytz
+
+import fetch
+import standings_sources
+
+STANDINGS_FS_URL = 'https://www.foxsports.com/nba/standings'
+STANDINGS_BBREF_URL = (
+    'https://www.basketball-reference.com/leagues/NBA_2026_standings.html'
+)
+
+# where the standings are scraped from, in order of preference; later sources
+# are only asked if the earlier ones are slow or fail (see standings_sources.py)
+STANDINGS_SOURCES = [
+    standings_sources.FoxSportsSource(STANDINGS_FS_URL),
+    standings_sources.BBRefSource(STANDINGS_BBREF_URL),
+]
+# CSV of game results to work the standings out from (see standings_engine.py)
+# instead of scraping Fox Sports; None to scrape
+RESULTS_FP = None
+
+def get_standings_scrape():
+    '''
+    Choose where the standings come from: the results file, if RESULTS_FP is
+    set, and otherwise a hedged scrape of STANDINGS_SOURCES.
+
+    Returns: tuple of a function and its arguments, giving the standings
+    '''
+    import standings_engine
+
+    if RESULTS_FP is not None:
+        return (standings_engine.get_standings_from_results, RESULTS_FP)
+
+    return (standings_sources.get_hedged_standings, STANDINGS_SOURCES)
+
+def start_scrapes():
+    '''
+    Start downloading and parsing every page the pools share, without waiting
+    for any to finish: the standings and each table the tiebreakers read.
+
+    Returns: dict of concurrent.futures.Future by scrape name (tiebreaker
+        tables by URL and table id)
+    '''
+    import tiebreakers
+
+    return fetch.run_concurrently({
+        'standings': get_standings_scrape(),
+        **tiebreakers.plan_scrapes(),
+    })
+
+def get_shared_data(scrapes):
+    '''
+    Finish the scrapes and work out the standings and tiebreaker values, once
+    for every pool.
+
+    Inputs:
+    scrapes (dict): from start_scrapes()
+
+    Returns: dict of the standings (None if they couldn't be scraped), the
+        tuple of description and value of each tiebreaker by number, and when
+        each was scraped and how long it took
+    '''
+    import tiebreakers
+
+    update_timestamps = {}
+    stage_durations = {}
+
+    stage_start = time.perf_counter()
+    try:
+        standings_df = scrapes['standings'].result()
+        update_timestamps['Standings'] = datetime.now(tz=pytz.utc)
+    except Exception as e:
+        print(f'Standings error: {e}')
+        standings_df = None
+        update_timestamps['Standings'] = None
+    stage_durations['Standings'] = time.perf_counter() - stage_start
+
+    tiebreaker_values = {}
+    frames = {} # each scraped table is made into a dataframe once
+    for tiebreaker in tiebreakers.TIEBREAKERS:
+        n = tiebreaker['number']
+        stage_start = time.perf_counter()
+        try:
+            value = tiebreakers.evaluate(tiebreaker, scrapes, frames)
+            update_timestamps[f'Tiebreaker #{n}'] = datetime.now(tz=pytz.utc)
+        except Exception as e:
+            print(f'Tiebreaker {n} error: {e}')
+            value = None
+            update_timestamps[f'Tiebreaker #{n}'] = None
+        tiebreaker_values[n] = (tiebreaker['description'], value)
+        stage_durations[f'Tiebreaker #{n}'] = time.perf_counter() - stage_start
+
+    return {
+        'standings_df': standings_df,
+        'tiebreakers': tiebreaker_values,
+        'update_timestamps': update_timestamps,
+        'stage_durations': stage_durations,
+    }
@@ -0,0 +1,611 @@
+'''
+Sheets
+Batched access to the Google Sheet the NBA Sheets script updates.
+
+A WorkbookSession reads the workbook's worksheet metadata once and queues
+every write, so a run costs one metadata read, one batchUpdate to create any
+missing tabs, and one values batchUpdate for every tab's data.
+
+In incremental mode, whole-tab writes are compared cell by cell against one
+bulk read of what the tabs currently hold, and only the changed blocks of
+cells are sent.
+
+Every API call a client makes can be held to a per-minute request budget with
+a token bucket shared by every workbook in the process (the Sheets quota is
+per service account), and calls that hit the quota or a transient server error
+are retried with jittered exponential backoff.
+'''
+
+import json
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+import gspread
+import requests
+from gspread.utils import (
+    ValueInputOption, ValueRenderOption, absolute_range_name, rowcol_to_a1
+)
+
+import metrics
+
+# path after the spreadsheet id -> Sheets API method, for the metrics
+API_PATH_RE = re.compile(r'/spreadsheets/[^/:]+(.*)$')
+
+API_REQUESTS_PER_MINUTE = 60 # Sheets quota per user; None for no limit
+API_BURST = 10 # requests that can be sent at once after being idle
+API_MAX_RETRIES = 5
+API_BACKOFF_SECONDS = 1 # longest wait before the first retry, doubled per retry
+API_MAX_BACKOFF_SECONDS = 32
+API_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_api_buckets = {}
+_api_buckets_lock = threading.Lock()
+
+class WorkbookSession:
+    '''
+    Worksheet metadata cache and write queue for one workbook.
+
+    Inputs:
+    wb (gspread.Spreadsheet): workbook to read and write
+    incremental (bool): if True, only send cells that differ from what the
+        workbook already holds
+    '''
+    def __init__(self, wb, incremental=False):
+        self.wb = wb
+        self.incremental = incremental
+        self.worksheets = None
+        self.grid_sizes = {}
+        self.current_grids = {}
+        self.pending_sheets = {}
+        self.pending_resizes = {}
+        self.pending_values = {}
+        self.last_commit_stats = {}
+
+    def load(self):
+        '''
+        Read the workbook's worksheet metadata, if it hasn't been read yet.
+        '''
+        if self.worksheets is None:
+            self.worksheets = {ws.title: ws for ws in self.wb.worksheets()}
+            self.grid_sizes = {
+                ws.title: (ws.row_count, ws.col_count)
+                for ws in self.worksheets.values()
+            }
+
+    def worksheet_names(self):
+        '''
+        List the names of worksheets that exist or are queued to be created.
+
+        Returns: set
+        '''
+        self.load()
+        return set(self.worksheets) | set(self.pending_sheets)
+
+    def worksheet(self, title):
+        '''
+        Get an existing worksheet without another metadata request.
+
+        Inputs:
+        title (str): name of the worksheet
+
+        Returns: gspread.Worksheet
+        '''
+        self.load()
+        if title not in self.worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+
+        return self.worksheets[title]
+
+    def ensure_worksheet(self, title, rows, cols):
+        '''
+        Queue a worksheet to be created on commit if it doesn't exist yet, or
+        to be enlarged if it is smaller than rows x cols.
+
+        Inputs:
+        title (str): name of the worksheet
+        rows (int): minimum number of rows
+        cols (int): minimum number of columns
+
+        Returns: bool, True if the worksheet is new
+        '''
+        if title in self.pending_sheets:
+            grid_properties = (
+                self.pending_sheets[title]['addSheet']['properties']['gridProperties']
+            )
+            grid_properties['rowCount'] = max(grid_properties['rowCount'], rows)
+            grid_properties['columnCount'] = max(grid_properties['columnCount'], cols)
+            return True
+
+        if title in self.worksheet_names():
+            n_rows, n_cols = self.grid_sizes[title]
+            if n_rows < rows or n_cols < cols:
+                self.grid_sizes[title] = (max(n_rows, rows), max(n_cols, cols))
+                self.pending_resizes[title] = {
+                    'updateSheetProperties': {
+                        'properties': {
+                            'sheetId': self.worksheets[title].id,
+                            'gridProperties': {
+                                'rowCount': self.grid_sizes[title][0],
+                                'columnCount': self.grid_sizes[title][1],
+                            },
+                        },
+                        'fields': 'gridProperties(rowCount,columnCount)',
+                    }
+                }
+            return False
+
+        self.pending_sheets[title] = {
+            'addSheet': {
+                'properties': {
+                    'title': title,
+                    'sheetType': 'GRID',
+                    'gridProperties': {'rowCount': rows, 'columnCount': cols},
+                }
+            }
+        }
+
+        return True
+
+    def queue_update(
+        self, title, values, range_name='A1',
+        value_input_option=ValueInputOption.raw
+    ):
+        '''
+        Queue values to be written to a worksheet on commit. A later update to
+        the same range of the same worksheet replaces an earlier one.
+
+        Inputs:
+        title (str): name of the worksheet
+        values (list of lists): rows of cell values
+        range_name (str): A1 notation of the range's top-left cell or extent
+        value_input_option (gspread.utils.ValueInputOption): whether values
+            are stored as-is (raw) or parsed like typed input (user_entered)
+        '''
+        self.pending_values[(title, range_name)] = (values, value_input_option)
+
+    def read_grids(self, titles):
+        '''
+        Read the current contents of existing worksheets in one request and
+        keep them for the rest of the session. Formulas are read as formulas
+        so they compare equal to the formulas being written.
+
+        Inputs:
+        titles (list of str): names of the worksheets
+        '''
+        titles = [title for title in titles if title not in self.current_grids]
+        if not titles:
+            return
+
+        value_ranges = self.wb.values_batch_get(
+            [absolute_range_name(title) for title in titles],
+            params={'valueRenderOption': ValueRenderOption.formula}
+        )['valueRanges']
+
+        for title, value_range in zip(titles, value_ranges):
+            self.current_grids[title] = value_range.get('values', [])
+
+    def get_values(self, title):
+        '''
+        Get a worksheet's current contents, reading it only if it hasn't been
+        read yet this session.
+
+        Inputs:
+        title (str): name of the worksheet
+
+        Returns: list of lists; empty for a worksheet queued to be created
+        '''
+        if title in self.pending_sheets:
+            return []
+        self.read_grids([title])
+
+        return self.current_grids[title]
+
+    def get_pending_cells(self):
+        '''
+        Count the cells queued to be written to each worksheet.
+
+        Returns: dict of int by worksheet name
+        '''
+        pending_cells = {}
+        for (title, _), (values, _) in self.pending_values.items():
+            pending_cells[title] = (
+                pending_cells.get(title, 0) + sum(len(row) for row in values)
+            )
+
+        return pending_cells
+
+    def commit(self):
+        '''
+        Create any queued worksheets in one batchUpdate and write every queued
+        range in one values batchUpdate.
+        '''
+        current_grids = {}
+        if self.incremental:
+            # whole-tab writes to existing worksheets
+            titles = [
+                title for title, range_name in self.pending_values
+                if range_name == 'A1' and title not in self.pending_sheets
+            ]
+            self.read_grids(titles)
+            current_grids = {title: self.current_grids[title] for title in titles}
+        n_cells_skipped = 0
+
+        if self.pending_sheets or self.pending_resizes:
+            replies = self.wb.batch_update({
+                'requests': (
+                    list(self.pending_sheets.values()) +
+                    list(self.pending_resizes.values())
+                )
+            })['replies']
+            for reply in replies:
+                if 'addSheet' not in reply:
+                    continue
+                properties = reply['addSheet']['properties']
+                grid_properties = properties['gridProperties']
+                self.worksheets[properties['title']] = gspread.Worksheet(
+                    self.wb, properties, self.wb.id, self.wb.client
+                )
+                self.grid_sizes[properties['title']] = (
+                    grid_properties['rowCount'], grid_properties['columnCount']
+                )
+            self.pending_sheets = {}
+            self.pending_resizes = {}
+        # contents read before this commit are out of date once it's written
+        self.current_grids = {}
+
+        if not self.pending_values:
+            self.last_commit_stats = {
+                'cells_written': 0, 'cells_skipped': 0, 'ranges_written': 0
+            }
+            return
+
+        input_options = {
+            value_input_option
+            for _, value_input_option in self.pending_values.values()
+        }
+        if len(input_options) == 1:
+            value_input_option = input_options.pop()
+        else:
+            value_input_option = ValueInputOption.user_entered
+
+        data = []
+        n_cells_written = 0
+        for (title, range_name), (values, input_option) in self.pending_values.items():
+            if input_option != value_input_option:
+                values = [[escape_raw_value(x) for x in row] for row in values]
+
+            if title in current_grids:
+                blocks = get_changed_blocks(current_grids[title], values)
+                n_cells = sum(len(row) for row in values)
+                n_cells_changed = sum(
+                    len(block_values) * len(block_values[0])
+                    for _, block_values in blocks
+                )
+                n_cells_skipped += n_cells - n_cells_changed
+            else:
+                blocks = [(range_name, values)]
+                n_cells_changed = sum(len(row) for row in values)
+
+            n_cells_written += n_cells_changed
+            for block_range_name, block_values in blocks:
+                data.append({
+                    'range': absolute_range_name(title, block_range_name),
+                    'values': block_values,
+                })
+
+        if data:
+            self.wb.values_batch_update({
+                'valueInputOption': value_input_option,
+                'data': data,
+            })
+        self.pending_values = {}
+        self.last_commit_stats = {
+            'cells_written': n_cells_written,
+            'cells_skipped': n_cells_skipped,
+            'ranges_written': len(data),
+        }
+
+def get_api_method(method, endpoint):
+    '''
+    Name the Sheets API method a request calls, e.g. values.batchUpdate.
+
+    Inputs:
+    method (str): HTTP method
+    endpoint (str): request URL
+
+    Returns: str, other for requests outside the Sheets API
+    '''
+    match = API_PATH_RE.search(urlparse(endpoint).path)
+    if match is None:
+        return 'other'
+
+    path = match.group(1)
+    if path == '':
+        return 'spreadsheets.get'
+    if path.startswith(':'):
+        return f'spreadsheets.{path[1:]}'
+    if path.startswith('/values:'):
+        return f"values.{path[len('/values:'):]}"
+    if path.startswith('/values/'):
+        _, _, action = path.rpartition(':')
+        if action in {'append', 'clear'}:
+            return f'values.{action}'
+        return 'values.get' if method.lower() == 'get' else 'values.update'
+
+    return 'other'
+
+def count_api_calls(http_client, **labels):
+    '''
+    Count every Sheets API call made through a gspread HTTP client (and so
+    through its workbooks and worksheets), with its latency and payload sizes,
+    in the run's metrics.
+
+    Inputs:
+    http_client (gspread.http_client.HTTPClient): client to instrument, e.g.
+        a workbook's client
+    labels: label values for every call, e.g. pool
+    '''
+    if getattr(http_client, 'is_counted', False):
+        return
+    request = http_client.request
+
+    def counted_request(method, endpoint, *args, **kwargs):
+        api_method = get_api_method(method, endpoint)
+        start = time.perf_counter()
+        status = 'error'
+        response = None
+        try:
+            response = request(method, endpoint, *args, **kwargs)
+            status = response.status_code
+            return response
+        except gspread.exceptions.APIError as e:
+            status = e.response.status_code
+            raise
+        finally:
+            metrics.count(
+                'sheets_api_calls_total', api_method=api_method, status=status,
+                **labels
+            )
+            metrics.count(
+                'sheets_api_seconds_total', time.perf_counter() - start,
+                api_method=api_method, **labels
+            )
+            body = kwargs.get('json')
+            if body is not None:
+                metrics.count(
+                    'sheets_api_request_bytes_total', len(json.dumps(body)),
+                    api_method=api_method, **labels
+                )
+            if response is not None:
+                metrics.count(
+                    'sheets_api_response_bytes_total', len(response.content),
+                    api_method=api_method, **labels
+                )
+
+    http_client.request = counted_request
+    http_client.is_counted = True
+
+class TokenBucket:
+    '''
+    Request budget that refills continuously; each request takes one token,
+    waiting for it when the bucket is empty.
+
+    Inputs:
+    per_minute (float): tokens added per minute
+    capacity (int): most tokens the bucket holds
+    '''
+    def __init__(self, per_minute, capacity):
+        self.rate = per_minute / 60
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        '''
+        Take a token, waiting until one is available.
+
+        Returns: float, seconds waited
+        '''
+        waited = 0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+def get_api_bucket():
+    '''
+    Get the token bucket for the current API_REQUESTS_PER_MINUTE and
+    API_BURST, creating it on first use.
+
+    Returns: TokenBucket, or None if requests aren't limited
+    '''
+    if API_REQUESTS_PER_MINUTE is None:
+        return None
+
+    key = (API_REQUESTS_PER_MINUTE, API_BURST)
+    with _api_buckets_lock:
+        if key not in _api_buckets:
+            _api_buckets[key] = TokenBucket(*key)
+        return _api_buckets[key]
+
+def get_backoff_seconds(attempt, response=None):
+    '''
+    Choose how long to wait before retrying a call: the server's Retry-After
+    if it sent one, and otherwise a random wait up to API_BACKOFF_SECONDS
+    doubled for every earlier retry, so clients that failed together don't
+    retry together.
+
+    Inputs:
+    attempt (int): retries already made
+    response (requests.Response): failed response, if there was one
+
+    Returns: float
+    '''
+    retry_after = None if response is None else response.headers.get('Retry-After')
+    if retry_after is not None and retry_after.isdigit():
+        return min(float(retry_after), API_MAX_BACKOFF_SECONDS)
+
+    return random.uniform(
+        0, min(API_BACKOFF_SECONDS * 2 ** attempt, API_MAX_BACKOFF_SECONDS)
+    )
+
+def limit_api_calls(http_client, bucket=None):
+    '''
+    Hold every Sheets API call made through a gspread HTTP client to the
+    request budget, and retry calls that fail with a quota error (429), a
+    transient server error, or a dropped connection.
+
+    Inputs:
+    http_client (gspread.http_client.HTTPClient): client to limit, e.g. a
+        workbook's client
+    bucket (TokenBucket): request budget; by default, the process-wide budget
+        from get_api_bucket()
+    '''
+    if getattr(http_client, 'is_limited', False):
+        return
+    request = http_client.request
+
+    def limited_request(method, endpoint, *args, **kwargs):
+        api_method = get_api_method(method, endpoint)
+        for attempt in range(API_MAX_RETRIES + 1):
+            call_bucket = bucket or get_api_bucket()
+            if call_bucket is not None:
+                waited = call_bucket.acquire()
+                if waited:
+                    metrics.count(
+                        'sheets_api_throttle_seconds_total', waited,
+                        api_method=api_method
+                    )
+            try:
+                return request(method, endpoint, *args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                status = e.response.status_code
+                if status not in API_RETRY_STATUSES or attempt == API_MAX_RETRIES:
+                    raise
+                backoff = get_backoff_seconds(attempt, e.response)
+            except (
+                requests.exceptions.ConnectionError, requests.exceptions.Timeout
+            ):
+                if attempt == API_MAX_RETRIES:
+                    raise
+                status = 'error'
+                backoff = get_backoff_seconds(attempt)
+
+            metrics.count(
+                'sheets_api_retries_total', api_method=api_method, status=status
+            )
+            time.sleep(backoff)
+
+    http_client.request = limited_request
+    http_client.is_limited = True
+
+def escape_raw_value(value):
+    '''
+    Prepare a raw value for a user-entered write so Sheets stores it as-is:
+    strings get a leading apostrophe so they aren't parsed as numbers, dates,
+    or formulas.
+
+    Inputs:
+    value: cell value
+
+    Returns: cell value
+    '''
+    if isinstance(value, str) and value:
+        return "'" + value
+
+    return value
+
+def get_changed_blocks(current_values, values):
+    '''
+    Find the rectangular blocks of cells that differ between a worksheet's
+    current contents and the values to be written to it from A1. Changed
+    cells are grouped into runs along each row, and identical runs on
+    consecutive rows are merged into one block.
+
+    Inputs:
+    current_values (list of lists): rows currently in the worksheet; trailing
+        empty cells may be missing
+    values (list of lists): rows to write
+
+    Returns: list of tuples of A1 range and list of lists of values
+    '''
+    open_blocks = {} # (first col, last col) -> [first row, last row]
+    blocks = []
+    for i, row in enumerate(values):
+        current_row = current_values[i] if i < len(current_values) else []
+
+        runs = []
+        run_start = None
+        for j, value in enumerate(row + [None]):
+            is_changed = j < len(row) and not cells_equal(
+                current_row[j] if j < len(current_row) else '', value
+            )
+            if is_changed and run_start is None:
+                run_start = j
+            elif not is_changed and run_start is not None:
+                runs.append((run_start, j - 1))
+                run_start = None
+
+        next_open_blocks = {}
+        for run in runs:
+            if run in open_blocks:
+                open_blocks[run][1] = i
+                next_open_blocks[run] = open_blocks.pop(run)
+            else:
+                next_open_blocks[run] = [i, i]
+        blocks.extend(
+            (first_row, last_row, first_col, last_col)
+            for (first_col, last_col), (first_row, last_row) in open_blocks.items()
+        )
+        open_blocks = next_open_blocks
+
+    blocks.extend(
+        (first_row, last_row, first_col, last_col)
+        for (first_col, last_col), (first_row, last_row) in open_blocks.items()
+    )
+
+    return [
+        (
+            rowcol_to_a1(first_row + 1, first_col + 1) + ':' +
+            rowcol_to_a1(last_row + 1, last_col + 1),
+            [
+                values[i][first_col:last_col + 1]
+                for i in range(first_row, last_row + 1)
+            ]
+        )
+        for first_row, last_row, first_col, last_col in sorted(blocks)
+    ]
+
+def cells_equal(current_value, value):
+    '''
+    Check whether a cell already holds the value to be written to it. A
+    quote-prefixed string matches the same string read back without its
+    prefix, and a missing value matches an empty cell.
+
+    Inputs:
+    current_value: value read from the worksheet
+    value: value to be written
+
+    Returns: bool
+    '''
+    if value is None:
+        value = ''
+    if isinstance(value, str) and value.startswith("'"):
+        value = value[1:]
+    if isinstance(value, bool) or isinstance(current_value, bool):
+        return value is current_value
+
+    return current_value == value
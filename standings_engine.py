@@ -0,0 +1,444 @@
+'''
+Standings Engine
+Standings worked out locally from game results instead of scraped from Fox
+Sports.
+
+Every game updates the two teams' overall, conference, and division records,
+points, and head-to-head record in constant time. Teams are only ranked when
+the standings are asked for, by winning percentage with ties broken by the
+NBA's tiebreaker rules, into the same dataframe get_standings(...) returns.
+
+Results are read from a CSV file with a Date, Home, Away, Home Points, and
+Away Points column and a row per game (full team names, as in the
+standings). The file is only ever appended to, so each read only parses the
+rows added since the last one.
+'''
+
+import csv
+import io
+import os
+from fractions import Fraction
+
+import pandas as pd
+
+RESULT_COLS = ['Date', 'Home', 'Away', 'Home Points', 'Away Points']
+
+# team -> conference and division
+TEAMS = {
+    'Boston Celtics': ('Eastern', 'Atlantic'),
+    'Brooklyn Nets': ('Eastern', 'Atlantic'),
+    'New York Knicks': ('Eastern', 'Atlantic'),
+    'Philadelphia 76ers': ('Eastern', 'Atlantic'),
+    'Toronto Raptors': ('Eastern', 'Atlantic'),
+    'Chicago Bulls': ('Eastern', 'Central'),
+    'Cleveland Cavaliers': ('Eastern', 'Central'),
+    'Detroit Pistons': ('Eastern', 'Central'),
+    'Indiana Pacers': ('Eastern', 'Central'),
+    'Milwaukee Bucks': ('Eastern', 'Central'),
+    'Atlanta Hawks': ('Eastern', 'Southeast'),
+    'Charlotte Hornets': ('Eastern', 'Southeast'),
+    'Miami Heat': ('Eastern', 'Southeast'),
+    'Orlando Magic': ('Eastern', 'Southeast'),
+    'Washington Wizards': ('Eastern', 'Southeast'),
+    'Denver Nuggets': ('Western', 'Northwest'),
+    'Minnesota Timberwolves': ('Western', 'Northwest'),
+    'Oklahoma City Thunder': ('Western', 'Northwest'),
+    'Portland Trail Blazers': ('Western', 'Northwest'),
+    'Utah Jazz': ('Western', 'Northwest'),
+    'Golden State Warriors': ('Western', 'Pacific'),
+    'LA Clippers': ('Western', 'Pacific'),
+    'Los Angeles Lakers': ('Western', 'Pacific'),
+    'Phoenix Suns': ('Western', 'Pacific'),
+    'Sacramento Kings': ('Western', 'Pacific'),
+    'Dallas Mavericks': ('Western', 'Southwest'),
+    'Houston Rockets': ('Western', 'Southwest'),
+    'Memphis Grizzlies': ('Western', 'Southwest'),
+    'New Orleans Pelicans': ('Western', 'Southwest'),
+    'San Antonio Spurs': ('Western', 'Southwest'),
+}
+
+CONFERENCES = ['Western', 'Eastern'] # in the order get_standings(...) uses
+
+# playoff points by rank within a conference; will need to update after the
+# play-in
+PLAYOFF_POINTS = [8] * 6 + [4] * 2 + [0] * 7
+
+PLAYOFF_ELIGIBLE_RANK = 10 # lowest rank that makes the play-in
+
+# NBA tiebreakers for two-team ties, then ties of three or more teams, in the
+# order they're applied
+TWO_TEAM_CRITERIA = [
+    'head_to_head', 'division_leader', 'division_record', 'conference_record',
+    'playoff_own_conference', 'playoff_other_conference', 'point_differential',
+]
+MULTI_TEAM_CRITERIA = [
+    'division_leader', 'head_to_head', 'division_record', 'conference_record',
+    'playoff_own_conference', 'playoff_other_conference', 'point_differential',
+]
+
+RECORD_KEYS = [
+    'wins', 'losses', 'conference_wins', 'conference_losses', 'division_wins',
+    'division_losses', 'points_for', 'points_against',
+]
+
+def get_pct(wins, losses):
+    '''
+    Get a winning percentage exactly, so equal records compare equal.
+
+    Inputs:
+    wins (int): games won
+    losses (int): games lost
+
+    Returns: fractions.Fraction, 0 with no games played
+    '''
+    if wins + losses == 0:
+        return Fraction(0)
+
+    return Fraction(wins, wins + losses)
+
+class StandingsEngine:
+    '''
+    Team records built up one game result at a time.
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        '''
+        Forget every game.
+        '''
+        self.records = {
+            team: dict.fromkeys(RECORD_KEYS, 0) for team in TEAMS
+        }
+        self.head_to_head = {} # (team, opponent) -> wins
+        self.games = set()
+        self.file_offsets = {} # results file -> bytes already read
+
+    def add_game(self, date, home, away, home_points, away_points):
+        '''
+        Add one game's result to the records. A game already added (same
+        date and teams) is ignored.
+
+        Inputs:
+        date (str): date of the game
+        home/away (str): full team names
+        home_points/away_points (int): final score
+
+        Returns: bool, True if the game was new
+        '''
+        for team in [home, away]:
+            if team not in TEAMS:
+                raise ValueError(f'Unknown team: {team}')
+        key = (date, home, away)
+        if key in self.games:
+            return False
+        self.games.add(key)
+
+        if home_points > away_points:
+            winner, loser = home, away
+        else:
+            winner, loser = away, home
+        winner_record = self.records[winner]
+        loser_record = self.records[loser]
+
+        winner_record['wins'] += 1
+        loser_record['losses'] += 1
+        winner_conference, winner_division = TEAMS[winner]
+        loser_conference, loser_division = TEAMS[loser]
+        if winner_conference == loser_conference:
+            winner_record['conference_wins'] += 1
+            loser_record['conference_losses'] += 1
+        if winner_division == loser_division:
+            winner_record['division_wins'] += 1
+            loser_record['division_losses'] += 1
+
+        for team, points_for, points_against in [
+            (home, home_points, away_points), (away, away_points, home_points)
+        ]:
+            self.records[team]['points_for'] += points_for
+            self.records[team]['points_against'] += points_against
+        self.head_to_head[(winner, loser)] = (
+            self.head_to_head.get((winner, loser), 0) + 1
+        )
+
+        return True
+
+    def add_results(self, results):
+        '''
+        Add games from result rows, skipping rows without a final score
+        (games not played yet).
+
+        Inputs:
+        results (iterable of dicts): rows with the RESULT_COLS keys
+
+        Returns: int, games added
+        '''
+        n_added = 0
+        for result in results:
+            if not result.get('Home Points') or not result.get('Away Points'):
+                continue
+            n_added += self.add_game(
+                result['Date'], result['Home'].strip(), result['Away'].strip(),
+                int(result['Home Points']), int(result['Away Points'])
+            )
+
+        return n_added
+
+    def read_results(self, fp):
+        '''
+        Add the games appended to a results file since it was last read. If
+        the file got shorter (it was replaced), every game is read again.
+
+        Inputs:
+        fp (str): path of the results CSV
+
+        Returns: int, games added
+        '''
+        offset = self.file_offsets.get(fp, 0)
+        if os.path.getsize(fp) < offset:
+            self.reset()
+            offset = 0
+
+        with open(fp, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # leave a row still being written for the next read
+        data = data[:data.rfind(b'\n') + 1]
+        self.file_offsets[fp] = offset + len(data)
+
+        lines = io.StringIO(data.decode('utf-8'))
+        if offset == 0:
+            rows = csv.DictReader(lines)
+        else:
+            rows = csv.DictReader(lines, fieldnames=self.get_header(fp))
+
+        return self.add_results(rows)
+
+    def get_header(self, fp):
+        '''
+        Read the column names of a results file.
+
+        Inputs:
+        fp (str): path of the results CSV
+
+        Returns: list of str
+        '''
+        with open(fp, newline='') as f:
+            return next(csv.reader(f))
+
+    def get_team_pct(self, team, prefix=''):
+        '''
+        Get a team's winning percentage overall or in its conference or
+        division games.
+
+        Inputs:
+        team (str): full team name
+        prefix (str): '', 'conference_', or 'division_'
+
+        Returns: fractions.Fraction
+        '''
+        record = self.records[team]
+
+        return get_pct(record[f'{prefix}wins'], record[f'{prefix}losses'])
+
+    def get_pct_against(self, team, opponents):
+        '''
+        Get a team's winning percentage against a set of teams.
+
+        Inputs:
+        team (str): full team name
+        opponents (iterable of str): full team names
+
+        Returns: fractions.Fraction
+        '''
+        wins = losses = 0
+        for opponent in opponents:
+            if opponent != team:
+                wins += self.head_to_head.get((team, opponent), 0)
+                losses += self.head_to_head.get((opponent, team), 0)
+
+        return get_pct(wins, losses)
+
+    def get_playoff_eligible(self, conference):
+        '''
+        List the teams in the play-in places of a conference by winning
+        percentage, counting every team tied for the last place.
+
+        Inputs:
+        conference (str): Eastern or Western
+
+        Returns: set of str
+        '''
+        pcts = sorted(
+            (
+                self.get_team_pct(team) for team, (team_conference, _) in TEAMS.items()
+                if team_conference == conference
+            ),
+            reverse=True
+        )
+        cutoff = pcts[min(PLAYOFF_ELIGIBLE_RANK, len(pcts)) - 1]
+
+        return {
+            team for team, (team_conference, _) in TEAMS.items()
+            if team_conference == conference and self.get_team_pct(team) >= cutoff
+        }
+
+    def is_division_leader(self, team):
+        '''
+        Check whether a team has its division's best winning percentage
+        (every team tied for it counts as a leader).
+
+        Inputs:
+        team (str): full team name
+
+        Returns: bool
+        '''
+        division = TEAMS[team][1]
+        best = max(
+            self.get_team_pct(other) for other, (_, other_division) in TEAMS.items()
+            if other_division == division
+        )
+
+        return self.get_team_pct(team) == best
+
+    def get_tiebreak_values(self, criterion, teams):
+        '''
+        Get each tied team's value for one tiebreaker, higher being better.
+
+        Inputs:
+        criterion (str): one of TWO_TEAM_CRITERIA or MULTI_TEAM_CRITERIA
+        teams (list of str): tied teams
+
+        Returns: dict of value by team, or None if the criterion doesn't apply
+        '''
+        conference = TEAMS[teams[0]][0]
+        if criterion == 'head_to_head':
+            return {team: self.get_pct_against(team, teams) for team in teams}
+        if criterion == 'division_leader':
+            return {team: self.is_division_leader(team) for team in teams}
+        if criterion == 'division_record':
+            if len({TEAMS[team][1] for team in teams}) > 1:
+                return None
+            return {team: self.get_team_pct(team, 'division_') for team in teams}
+        if criterion == 'conference_record':
+            return {team: self.get_team_pct(team, 'conference_') for team in teams}
+        if criterion == 'playoff_own_conference':
+            eligible = self.get_playoff_eligible(conference)
+            return {team: self.get_pct_against(team, eligible) for team in teams}
+        if criterion == 'playoff_other_conference':
+            other_conference = [c for c in CONFERENCES if c != conference][0]
+            eligible = self.get_playoff_eligible(other_conference)
+            return {team: self.get_pct_against(team, eligible) for team in teams}
+        if criterion == 'point_differential':
+            return {
+                team: (
+                    self.records[team]['points_for'] -
+                    self.records[team]['points_against']
+                )
+                for team in teams
+            }
+
+        raise ValueError(f'Unknown tiebreaker: {criterion}')
+
+    def break_ties(self, teams):
+        '''
+        Order teams with the same winning percentage by the NBA's tiebreakers.
+        When a tiebreaker separates some of the teams, each group still tied
+        starts over from the first tiebreaker; teams tied on every one are
+        ordered by name, standing in for the drawing of lots.
+
+        Inputs:
+        teams (list of str): tied teams, all in one conference
+
+        Returns: list of str, best first
+        '''
+        if len(teams) == 1:
+            return list(teams)
+
+        criteria = TWO_TEAM_CRITERIA if len(teams) == 2 else MULTI_TEAM_CRITERIA
+        for criterion in criteria:
+            values = self.get_tiebreak_values(criterion, teams)
+            if values is None or len(set(values.values())) == 1:
+                continue
+
+            ordered = []
+            for value in sorted(set(values.values()), reverse=True):
+                ordered += self.break_ties(
+                    [team for team in teams if values[team] == value]
+                )
+            return ordered
+
+        return sorted(teams)
+
+    def rank_conference(self, conference):
+        '''
+        Rank a conference's teams by winning percentage, breaking ties.
+
+        Inputs:
+        conference (str): Eastern or Western
+
+        Returns: list of str, best first
+        '''
+        teams = [
+            team for team, (team_conference, _) in TEAMS.items()
+            if team_conference == conference
+        ]
+        pcts = {team: self.get_team_pct(team) for team in teams}
+
+        ranked = []
+        for pct in sorted(set(pcts.values()), reverse=True):
+            ranked += self.break_ties(sorted(
+                team for team in teams if pcts[team] == pct
+            ))
+
+        return ranked
+
+    def get_standings(self):
+        '''
+        Rank every team into the standings, in the same layout as
+        get_standings(...) scrapes them.
+
+        Returns: pd.DataFrame
+        '''
+        conference_dfs = []
+        for conference in CONFERENCES:
+            ranked = self.rank_conference(conference)
+            leader = self.records[ranked[0]]
+            rows = []
+            for rank, team in enumerate(ranked, 1):
+                record = self.records[team]
+                pct = self.get_team_pct(team)
+                rows.append({
+                    'Conference': conference,
+                    'Rank': rank,
+                    'Team': team,
+                    'W-L': f"{record['wins']}-{record['losses']}",
+                    # truncated to three places, like the published standings
+                    'PCT': int(pct * 1000) / 1000,
+                    'GB': (
+                        (leader['wins'] - record['wins']) +
+                        (record['losses'] - leader['losses'])
+                    ) / 2,
+                    'Playoff Points': PLAYOFF_POINTS[rank - 1],
+                })
+            conference_dfs.append(pd.DataFrame(rows))
+
+        return pd.concat(conference_dfs, axis=0)
+
+# records kept between runs of a long-lived process, so each run only reads
+# new results
+ENGINE = StandingsEngine()
+
+def get_standings_from_results(fp):
+    '''
+    Work out the standings from a results file, reading only the games added
+    since the last call.
+
+    Inputs:
+    fp (str): path of the results CSV
+
+    Returns: pd.DataFrame
+    '''
+    ENGINE.read_results(fp)
+
+    return ENGINE.get_standings()
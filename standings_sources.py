@@ -0,0 +1,349 @@
+'''
+Standings Sources
+Sites the standings can be scraped from, each behind the same interface, and
+a hedged fetch across them, along with the parsers for each site's page.
+
+The first source is asked for the standings straight away. If it hasn't
+answered within HEDGE_SECONDS (or fails), the next source is asked too, and
+so on down the list; the first standings that parse and pass validation (all
+30 teams, each in its own conference, ranked 1 to 15) are used. A slow or
+broken source then costs the Standings stage at most the hedge delay instead
+of failing it.
+'''
+
+import concurrent.futures
+import logging
+
+import fetch
+import metrics
+
+# seconds to wait on a source before also asking the next one; None to only
+# ask the next one once a source fails
+HEDGE_SECONDS = 2
+
+# Fox Sports team names and the full names the sheets use
+NAMES_MAP = {'Lakers': 'Los Angeles Lakers',
+             'Clippers': 'LA Clippers',
+             'Nuggets': 'Denver Nuggets',
+             'Thunder': 'Oklahoma City Thunder',
+             'Rockets': 'Houston Rockets',
+             'Jazz': 'Utah Jazz',
+             'Mavericks': 'Dallas Mavericks',
+             'Trail Blazers': 'Portland Trail Blazers',
+             'Grizzlies': 'Memphis Grizzlies',
+             'Suns': 'Phoenix Suns',
+             'Spurs': 'San Antonio Spurs',
+             'Kings': 'Sacramento Kings',
+             'Pelicans': 'New Orleans Pelicans',
+             'Timberwolves': 'Minnesota Timberwolves',
+             'Warriors': 'Golden State Warriors',
+             'Bucks': 'Milwaukee Bucks',
+             'Raptors': 'Toronto Raptors',
+             'Celtics': 'Boston Celtics',
+             'Heat': 'Miami Heat',
+             'Pacers': 'Indiana Pacers',
+             '76ers': 'Philadelphia 76ers',
+             'Magic': 'Orlando Magic',
+             'Nets': 'Brooklyn Nets',
+             'Wizards': 'Washington Wizards',
+             'Hornets': 'Charlotte Hornets',
+             'Bulls': 'Chicago Bulls',
+             'Knicks': 'New York Knicks',
+             'Pistons': 'Detroit Pistons',
+             'Hawks': 'Atlanta Hawks',
+             'Cavaliers': 'Cleveland Cavaliers'
+            }
+
+# Basketball Reference team names that differ from the names the sheets use
+BBREF_NAMES_MAP = {'Los Angeles Clippers': 'LA Clippers'}
+
+STANDINGS_COLS = [
+    'Conference', 'Rank', 'Team', 'W-L', 'PCT', 'GB', 'Playoff Points'
+]
+
+class StandingsSource:
+    '''
+    A site the standings can be scraped from. Subclasses implement
+    get_standings().
+
+    Inputs:
+    url (str): web address of the site's standings page
+    '''
+    name = None
+
+    def __init__(self, url):
+        self.url = url
+
+    def get_standings(self):
+        '''
+        Scrape the standings.
+
+        Returns: pd.DataFrame in the layout get_standings(...) returns
+        '''
+        raise NotImplementedError
+
+class FoxSportsSource(StandingsSource):
+    '''
+    Standings from the Fox Sports standings page.
+    '''
+    name = 'Fox Sports'
+
+    def get_standings(self):
+        return get_standings(self.url)
+
+class BBRefSource(StandingsSource):
+    '''
+    Standings from a Basketball Reference season standings page.
+    '''
+    name = 'Basketball Reference'
+
+    def get_standings(self):
+        return get_bbref_standings(self.url)
+
+def get_conference_standings(standings_tbl):
+    '''
+    Parse an HTML conference standings table from the Fox Sports website.
+
+    Inputs:
+    standings_tbl (bs4.element.Tag): HTML conference standings table
+    
+    Returns: pandas dataframe
+    '''
+    import pandas as pd
+
+    # find column locations
+    i = 0
+    cols = {'W-L', 'PCT', 'GB'}
+    col_locs = {'Rank': 0,
+                'Team': 1}
+    for col in standings_tbl.find_all('th'):
+        colspan = col.get('colspan', 1)
+        i += int(colspan)
+        content = col.text.strip()
+        if content in cols:
+            col_locs[content] = i - 1 # correct to 0-based indexing
+
+    # extract standings
+    data = []
+    for i, row in enumerate(standings_tbl.find_all('tr')):
+        if i == 0: # skip header row
+            continue
+        
+        entry = {}
+        cells = row.find_all('td')
+        for stat, loc in col_locs.items():
+            entry[stat] = cells[loc].text.strip().rstrip('XYZ')
+        
+        data.append(entry)
+    df = pd.DataFrame(data)
+
+    missing_cols = {'W-L', 'PCT', 'GB'} - set(df.columns)
+    for col in missing_cols:
+        df[col] = 0
+        logging.error(f"Standings: couldn't find {col} column")
+
+
+    df['GB'] = df.GB.where(df.GB != '-', 0)
+    df['PCT'] = df.PCT.where(df.PCT != '-', 0)
+    df['Team'] = df.Team.str.strip().map(NAMES_MAP)
+
+    df = df.astype({'GB': float,
+                    'PCT': float,
+                    'Rank': int})
+
+
+    return df
+
+@fetch.cache_parsed
+def get_standings(url):
+    '''
+    Pull standings from the Fox Sports website.
+
+    url (str): web address of the Fox Sports NBA standings page
+
+    Returns: two pandas dataframes
+    '''
+    import pandas as pd
+
+    import parsers
+    import standings_engine
+
+    r = fetch.get_page(url)
+
+    eastern_html, western_html = parsers.find_tables(
+        r.content, table_class='data-table'
+    )
+
+    eastern_df = get_conference_standings(eastern_html)
+    western_df = get_conference_standings(western_html)
+
+    western_df['Playoff Points'] = standings_engine.PLAYOFF_POINTS
+    eastern_df['Playoff Points'] = standings_engine.PLAYOFF_POINTS
+
+    western_df['Conference'] = "Western"
+    eastern_df['Conference'] = "Eastern"
+
+    standings_df = pd.concat([western_df, eastern_df], axis=0)
+    standings_df = standings_df[['Conference', 'Rank', 'Team', 'W-L', 'PCT', 'GB', 'Playoff Points']]
+
+    return standings_df
+
+@fetch.cache_parsed
+def get_bbref_standings(url):
+    '''
+    Pull standings from a Basketball Reference season standings page, from
+    its two conference standings tables.
+
+    Inputs:
+    url (str): web address of the page, e.g.
+        https://www.basketball-reference.com/leagues/NBA_2026_standings.html
+
+    Returns: pd.DataFrame
+    '''
+    import pandas as pd
+
+    import parsers
+    import standings_engine
+
+    r = fetch.get_page(url)
+
+    conference_dfs = []
+    for conference in standings_engine.CONFERENCES:
+        table = parsers.find_table(
+            r.content, table_id=f'confs_standings_{conference[0]}'
+        )
+        if table is None or table.find('tbody') is None:
+            raise ValueError(f'No {conference} standings table at {url}')
+
+        rows = []
+        for row in table.find('tbody').find_all('tr'):
+            team = row.find(['th', 'td'], {'data-stat': 'team_name'})
+            if team is None or team.find('a') is None:
+                continue # header rows repeated in the table
+            stats = {
+                cell['data-stat']: cell.text.strip()
+                for cell in row.find_all('td', {'data-stat': True})
+            }
+            team_name = team.find('a').text.strip()
+            rows.append({
+                'Conference': conference,
+                'Rank': len(rows) + 1,
+                'Team': BBREF_NAMES_MAP.get(team_name, team_name),
+                'W-L': f"{stats['wins']}-{stats['losses']}",
+                'PCT': float(stats['win_loss_pct']),
+                # the leader's games behind is a dash
+                'GB': float(stats['gb']) if stats['gb'][:1].isdigit() else 0.0,
+                'Playoff Points': standings_engine.PLAYOFF_POINTS[len(rows)],
+            })
+        conference_dfs.append(pd.DataFrame(rows))
+
+    return pd.concat(conference_dfs, axis=0)[STANDINGS_COLS]
+
+def validate_standings(standings_df):
+    '''
+    Check standings have every team once, in its own conference, with each
+    conference ranked 1 to 15.
+
+    Inputs:
+    standings_df (pd.DataFrame): standings from a source
+
+    Returns: str describing the first problem found, or None if there's none
+    '''
+    import standings_engine
+
+    missing_cols = set(STANDINGS_COLS) - set(standings_df.columns)
+    if missing_cols:
+        return f"missing columns {', '.join(sorted(missing_cols))}"
+    if len(standings_df) != len(standings_engine.TEAMS):
+        return f'{len(standings_df)} teams instead of {len(standings_engine.TEAMS)}'
+    unknown_teams = set(standings_df['Team']) - set(standings_engine.TEAMS)
+    if unknown_teams or standings_df['Team'].duplicated().any():
+        return f'unknown or repeated teams {sorted(map(str, unknown_teams))}'
+
+    for conference, team in standings_df[['Conference', 'Team']].itertuples(
+        index=False
+    ):
+        if standings_engine.TEAMS[team][0] != conference:
+            return f'{team} in the {conference} Conference'
+    for conference, ranks in standings_df.groupby('Conference')['Rank']:
+        if sorted(ranks) != list(range(1, len(ranks) + 1)):
+            return f'{conference} Conference ranks out of order'
+
+    return None
+
+def get_validated_standings(source):
+    '''
+    Scrape the standings from a source and check them.
+
+    Inputs:
+    source (StandingsSource): where to scrape them from
+
+    Returns: pd.DataFrame
+    '''
+    standings_df = source.get_standings()
+    problem = validate_standings(standings_df)
+    if problem is not None:
+        raise ValueError(f'Invalid standings: {problem}')
+
+    return standings_df
+
+def get_hedged_standings(sources, hedge_seconds=None):
+    '''
+    Ask each source for the standings in turn, asking the next one whenever
+    every source asked so far has been slower than the hedge delay or failed,
+    and use the first valid standings any of them returns. Sources still
+    working once the standings are in are left to finish in the background.
+
+    Inputs:
+    sources (list of StandingsSource): in order of preference
+    hedge_seconds (float): by default, HEDGE_SECONDS
+
+    Returns: pd.DataFrame
+    '''
+    if hedge_seconds is None:
+        hedge_seconds = HEDGE_SECONDS
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(sources))
+    remaining = iter(sources)
+    pending = {}
+    errors = []
+
+    def ask_next(result):
+        source = next(remaining, None)
+        if source is not None:
+            metrics.count('standings_source_total', source=source.name, result=result)
+            pending[executor.submit(get_validated_standings, source)] = source
+
+    try:
+        ask_next('asked')
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, timeout=hedge_seconds,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                ask_next('hedged')
+                continue
+
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    standings_df = future.result()
+                except Exception as e:
+                    print(f'Standings source {source.name} error: {e}')
+                    metrics.count(
+                        'standings_source_total', source=source.name,
+                        result='failed'
+                    )
+                    errors.append(f'{source.name}: {e}')
+                    continue
+                metrics.count(
+                    'standings_source_total', source=source.name, result='used'
+                )
+                return standings_df
+
+            ask_next('fallback')
+    finally:
+        executor.shutdown(wait=False)
+
+    raise ValueError(f"No standings source worked ({'; '.join(errors)})")
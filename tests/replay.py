@@ -0,0 +1,40 @@
+'''
+Replay
+Serve the pages saved in tests/fixtures to the scrapers during a test.
+'''
+
+import os
+
+import fetch
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def read_fixture(url):
+    '''
+    Read the saved page of a URL.
+
+    Inputs:
+    url (str): web address of the page
+
+    Returns: bytes
+    '''
+    with open(fetch.get_fixture_path(url, FIXTURES_DIR), 'rb') as f:
+        return f.read()
+
+def use_fixtures(test_case):
+    '''
+    Serve every page from FIXTURES_DIR until a test ends, then restore the
+    live session and page cache.
+
+    Inputs:
+    test_case (unittest.TestCase): test to serve the pages to
+    '''
+    page_cache_dir = fetch.PAGE_CACHE_DIR
+    fetch.use_replay(FIXTURES_DIR)
+
+    def restore():
+        fetch.PAGE_CACHE_DIR = page_cache_dir
+        fetch.set_session(None)
+        fetch.clear_memo()
+
+    test_case.addCleanup(restore)
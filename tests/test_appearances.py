@@ -0,0 +1,72 @@
+'''
+Appearances tests
+Games played together counted by appearances.py from small game logs.
+'''
+
+import unittest
+
+import appearances
+
+def make_game_log(games, team='GSW', missed=()):
+    '''
+    Make game log rows for a player's team games.
+
+    Inputs:
+    games (iterable of int): team game numbers, in order
+    team (str): team abbreviation
+    missed (iterable of int): games the player didn't appear in
+
+    Returns: list of dicts
+    '''
+    rows = []
+    n_played = 0
+    for game in games:
+        played = game not in missed
+        n_played += played
+        rows.append({
+            'player_game_num_career': str(n_played) if played else '',
+            'team_game_num_season': str(game),
+            'team_name_abbr': team,
+        })
+
+    return rows
+
+class TestAppearanceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = appearances.AppearanceIndex()
+        self.index.add_game_log('steph', make_game_log(range(1, 11), missed={2, 7}))
+        self.index.add_game_log('seth', make_game_log(range(1, 11), missed={3}))
+
+    def test_count_games(self):
+        self.assertEqual(self.index.count_games(['steph'], 'GSW'), 8)
+        self.assertEqual(self.index.count_games(['steph', 'seth'], 'GSW'), 7)
+        self.assertEqual(self.index.count_games(['steph', 'seth'], 'LAL'), 0)
+
+    def test_only_new_rows_read(self):
+        rows = make_game_log(range(1, 13), missed={2, 7})
+        self.assertEqual(self.index.add_game_log('steph', rows), 2)
+        self.assertEqual(self.index.add_game_log('steph', rows), 0)
+        self.assertEqual(self.index.count_games(['steph'], 'GSW'), 10)
+
+    def test_shorter_log_reindexed(self):
+        # e.g. a new season under the same key
+        self.index.add_game_log('steph', make_game_log([1, 2]))
+        self.assertEqual(self.index.count_games(['steph'], 'GSW'), 2)
+
+    def test_traded_player(self):
+        rows = make_game_log([1, 2]) + make_game_log([3, 4], team='LAL')
+        self.index.add_game_log('jimmy', rows)
+        self.assertEqual(self.index.count_games(['jimmy'], 'GSW'), 2)
+        self.assertEqual(self.index.count_games(['jimmy'], 'LAL'), 2)
+
+    def test_empty_game_log(self):
+        self.index.add_game_log('rookie', [])
+        self.assertEqual(self.index.count_games(['rookie', 'steph'], 'GSW'), 0)
+
+    def test_pair_matrix(self):
+        matrix = self.index.get_pair_matrix(['steph', 'seth'], 'GSW')
+        self.assertEqual(matrix.values.tolist(), [[8, 7], [7, 9]])
+
+if __name__ == '__main__':
+    unittest.main()
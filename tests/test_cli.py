@@ -0,0 +1,95 @@
+'''
+CLI tests
+Commands run by cli.py in a fresh interpreter against the pages in
+tests/fixtures, checking what they print, how they exit, and which modules
+they load.
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from replay import FIXTURES_DIR
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# runs a command, then prints which of the modules named in the environment
+# it loaded on the last line, even if the command exits
+RUN_COMMAND = '''
+import os, sys
+import cli
+try:
+    cli.main(sys.argv[1:])
+finally:
+    print(sorted(set(sys.modules) & set(os.environ['CHECK_MODULES'].split())))
+'''
+
+def run(args, script=RUN_COMMAND, check_modules=()):
+    '''
+    Run a script in a fresh interpreter from the root of the repo.
+
+    Inputs:
+    args (list of str): command line arguments
+    script (str): code to run, or the path of a file to run
+    check_modules (iterable of str): modules RUN_COMMAND reports on
+
+    Returns: subprocess.CompletedProcess
+    '''
+    if not script.endswith('.py'):
+        args = ['-c', script] + args
+    else:
+        args = [script] + args
+
+    return subprocess.run(
+        [sys.executable, '-W', 'ignore'] + args, cwd=REPO_DIR,
+        capture_output=True, text=True,
+        env={**os.environ, 'CHECK_MODULES': ' '.join(check_modules)}
+    )
+
+class TestCommands(unittest.TestCase):
+
+    def test_standings_skip_sheets(self):
+        result = run(
+            ['--replay', FIXTURES_DIR, 'standings'],
+            check_modules=['nba_sheets', 'gspread', 'sheets']
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lines = result.stdout.splitlines()
+        self.assertIn('Oklahoma City Thunder', lines[1])
+        self.assertEqual(len(lines), 32)
+        self.assertEqual(lines[-1], '[]')
+
+    def test_tiebreakers_skip_sheets(self):
+        result = run(
+            ['--replay', FIXTURES_DIR, 'tiebreakers'],
+            check_modules=['nba_sheets', 'gspread', 'sheets']
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lines = result.stdout.splitlines()
+        self.assertTrue(lines[0].endswith(': 51'))
+        self.assertTrue(lines[1].endswith(': 399'))
+        self.assertEqual(lines[-1], '[]')
+
+    def test_help_loads_nothing_heavy(self):
+        result = run(
+            ['--help'],
+            check_modules=['pandas', 'numpy', 'gspread', 'nba_sheets', 'scrapes']
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines()[-1], '[]')
+
+    def test_what_if_without_standings(self):
+        with tempfile.TemporaryDirectory() as empty_dir:
+            result = run(['--replay', empty_dir, 'what-if', 'Boston Celtics', '1'])
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('without the standings', result.stderr)
+
+    def test_run_as_script(self):
+        result = run(['--help'], script='nba_sheets.py')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('dry-run', result.stdout)
+
+if __name__ == '__main__':
+    unittest.main()
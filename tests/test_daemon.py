@@ -0,0 +1,120 @@
+'''
+Daemon tests
+The game windows and poll intervals daemon.py schedules by, and polls
+against the pages in tests/fixtures and the in-memory Sheets API in
+fake_gspread.py.
+'''
+
+import contextlib
+import io
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+
+import daemon
+import fake_gspread
+import fetch
+import history
+import nba_sheets
+import picks_store
+import sheets
+from replay import use_fixtures
+
+def eastern(*args):
+    return daemon.TIMEZONE.localize(datetime(*args))
+
+class TestSchedule(unittest.TestCase):
+
+    def test_game_windows(self):
+        # Monday 5 January 2026
+        self.assertFalse(daemon.is_game_window(eastern(2026, 1, 5, 15)))
+        self.assertTrue(daemon.is_game_window(eastern(2026, 1, 5, 20)))
+        # Monday's window runs past midnight
+        self.assertTrue(daemon.is_game_window(eastern(2026, 1, 6, 0, 30)))
+        self.assertFalse(daemon.is_game_window(eastern(2026, 1, 6, 1, 30)))
+        # weekend games start at noon
+        self.assertTrue(daemon.is_game_window(eastern(2026, 1, 10, 13)))
+
+    def test_windows_keep_hours_across_dst(self):
+        # the clocks change on Sunday 8 March and Sunday 1 November 2026
+        for day in [datetime(2026, 3, 8, 9), datetime(2026, 11, 1, 9)]:
+            with self.subTest(day=day):
+                windows = daemon.get_game_windows(daemon.TIMEZONE.localize(day))
+                start, end = windows[1]
+                self.assertEqual(start.date(), day.date())
+                self.assertEqual(start.hour, 12)
+                self.assertEqual(end.astimezone(daemon.TIMEZONE).hour, 1)
+
+    def test_active_interval_backs_off(self):
+        now = eastern(2026, 1, 5, 20)
+        intervals = [daemon.get_poll_interval(now, n) for n in range(4)]
+        self.assertEqual(intervals, [300, 600, 1200, 1200])
+
+    def test_idle_interval_cut_short(self):
+        # an hour before Monday's games start
+        now = eastern(2026, 1, 5, 18)
+        self.assertEqual(daemon.get_poll_interval(now, 0), 60 * 60)
+        now = eastern(2026, 1, 5, 10)
+        self.assertEqual(
+            daemon.get_poll_interval(now, 0), daemon.IDLE_POLL_INTERVAL
+        )
+
+class TestRun(unittest.TestCase):
+
+    def setUp(self):
+        use_fixtures(self)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings = [
+            (picks_store, 'PICKS_STORE_DIR', f'{tmp_dir.name}/picks'),
+            (history, 'HISTORY_DIR', f'{tmp_dir.name}/history'),
+            (sheets, 'API_REQUESTS_PER_MINUTE', None),
+            (fetch, 'PAGE_CACHE_TTL', fetch.PAGE_CACHE_TTL),
+            # poll again straight away
+            (daemon, 'ACTIVE_POLL_INTERVAL', 0),
+            (daemon, 'IDLE_POLL_INTERVAL', 0),
+        ]
+        for module, name, value in settings:
+            self.addCleanup(setattr, module, name, getattr(module, name))
+            setattr(module, name, value)
+        self.addCleanup(nba_sheets._leaderboard_indexes.clear)
+
+        self.server = fake_gspread.FakeSheetsServer()
+        self.server.create_spreadsheet('daemon')
+        wb = fake_gspread.open_fake_workbook(self.server, 'daemon')
+        header = list(nba_sheets.COLS_MAP)
+        response = [
+            'Oklahoma City Thunder' if col.startswith('Who will') else ''
+            for col in header
+        ]
+        response[:3] = ['10/1/2025 12:00:00', 'a@example.com', 'Entrant']
+        wb.add_worksheet('Responses', rows=2, cols=len(header))
+        wb.worksheet('Responses').update([header, response])
+        self.pools = [
+            {'name': None, 'sheet_id': 'daemon', 'responses_ws_name': 'Responses'}
+        ]
+        self.workbooks = {None: wb}
+
+    def run_daemon(self, max_polls, stop_event=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return daemon.run(
+                self.pools, self.workbooks, n_simulations=0,
+                stop_event=stop_event or threading.Event(), max_polls=max_polls
+            )
+
+    def test_unchanged_polls_skipped(self):
+        stats = self.run_daemon(max_polls=3)
+        self.assertEqual(stats, {'polls': 3, 'updates': 1, 'skipped': 2})
+        standings = self.workbooks[None].worksheet('Standings').get_all_values()
+        self.assertEqual(len(standings), 31)
+
+    def test_stop_event(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        stats = self.run_daemon(max_polls=1, stop_event=stop_event)
+        self.assertEqual(stats['polls'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+'''
+History tests
+Nightly snapshots saved and read back by history.py in a temporary
+directory.
+'''
+
+import tempfile
+import unittest
+from datetime import date
+
+import pandas as pd
+
+import history
+import picks_store
+
+STANDINGS_DF = pd.DataFrame({
+    'Conference': ['Western', 'Western'],
+    'Rank': [1, 2],
+    'Team': ['Oklahoma City Thunder', 'Denver Nuggets'],
+    'W-L': ['50-10', '45-15'],
+    'PCT': [0.833, 0.75],
+    'GB': [0.0, 5.0],
+    'Playoff Points': [5, 4],
+})
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.history_dir = tmp_dir.name
+
+    def save(self, day, standings_df=STANDINGS_DF, **kwargs):
+        return history.append_snapshot(
+            day, standings_df, history_dir=self.history_dir, **kwargs
+        )
+
+    def test_round_trip(self):
+        self.assertEqual(self.save(date(2026, 1, 1)), ['standings'])
+        df = history.read_history('standings', history_dir=self.history_dir)
+        self.assertEqual(df['Wins'].tolist(), [50, 45])
+        self.assertEqual(str(df['Rank'].dtype), 'int8')
+        self.assertEqual(str(df['Team'].dtype), 'category')
+        self.assertTrue((df['Date'] == pd.Timestamp(2026, 1, 1)).all())
+
+    def test_same_day_replaced(self):
+        self.save(date(2026, 1, 1))
+        self.save(date(2026, 1, 1), STANDINGS_DF.assign(Rank=[2, 1]))
+        df = history.read_history('standings', history_dir=self.history_dir)
+        self.assertEqual(df['Rank'].tolist(), [2, 1])
+
+    def test_team_history(self):
+        self.save(date(2026, 1, 1))
+        self.save(date(2026, 1, 2), STANDINGS_DF.assign(Rank=[2, 1]))
+        df = history.get_team_history(
+            'Denver Nuggets', start=date(2026, 1, 2), history_dir=self.history_dir
+        )
+        self.assertEqual(df['Rank'].tolist(), [1])
+
+    def test_trend_table(self):
+        self.save(date(2026, 1, 1))
+        self.save(date(2026, 1, 2), STANDINGS_DF.assign(Rank=[2, 1]))
+        table = history.get_trend_table(
+            'standings', 'Team', 'Rank', history_dir=self.history_dir
+        )
+        self.assertEqual(
+            table.columns.tolist(), ['Team', '2026-01-01', '2026-01-02']
+        )
+
+    def test_read_in_saved_format(self):
+        # a day saved as a pickle is still read after pyarrow is installed
+        store_format = picks_store.STORE_FORMAT
+        self.addCleanup(setattr, picks_store, 'STORE_FORMAT', store_format)
+        picks_store.STORE_FORMAT = 'pickle'
+        self.save(date(2026, 1, 1))
+        picks_store.STORE_FORMAT = 'parquet'
+        self.assertEqual(
+            history.list_dates('standings', self.history_dir), [date(2026, 1, 1)]
+        )
+        df = history.read_history('standings', history_dir=self.history_dir)
+        self.assertEqual(len(df), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+'''
+Leaderboard tests
+The leaderboard index in leaderboard.py checked against scoring.py scoring
+the same random picks from scratch, as the standings change.
+'''
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import leaderboard
+import scoring
+import standings_engine
+
+def make_standings(seed=None):
+    '''
+    Make standings for every team, in order within each conference or
+    shuffled.
+
+    Inputs:
+    seed (int): shuffles the ranks if given
+
+    Returns: pd.DataFrame
+    '''
+    rng = np.random.default_rng(seed)
+    dfs = []
+    for conference in standings_engine.CONFERENCES:
+        teams = [
+            team for team, (team_conference, _) in standings_engine.TEAMS.items()
+            if team_conference == conference
+        ]
+        if seed is not None:
+            teams = list(rng.permutation(teams))
+        dfs.append(pd.DataFrame({
+            'Conference': conference,
+            'Rank': range(1, len(teams) + 1),
+            'Team': teams,
+            'Playoff Points': standings_engine.PLAYOFF_POINTS,
+        }))
+
+    return pd.concat(dfs, ignore_index=True)
+
+def make_picks(n_entrants, seed):
+    '''
+    Make random standings and tiebreaker picks, including picks of a team
+    under the wrong conference, picks of teams not in the standings, and a
+    pick without an entrant.
+
+    Inputs:
+    n_entrants (int): entrants
+    seed (int): random seed
+
+    Returns: tuple of standings picks and tiebreaker picks (pd.DataFrame)
+    '''
+    rng = np.random.default_rng(seed)
+    teams = list(standings_engine.TEAMS) + ['Seattle SuperSonics']
+    standings_rows = []
+    tiebreaker_rows = []
+    for i in range(n_entrants):
+        entrant = (f'{i}@example.com', f'Entrant {i}', 'Bettor')
+        for conference in standings_engine.CONFERENCES:
+            for rank, team in enumerate(rng.choice(teams, 8, replace=False), 1):
+                standings_rows.append((*entrant, conference, team, rank))
+        for n in [1, 2]:
+            # a few values repeat, so some entrants tie
+            tiebreaker_rows.append((*entrant, str(rng.integers(0, 5)), str(n)))
+    standings_rows.append((None, 'Nobody', 'Bettor', 'Western', teams[0], 1))
+
+    standings_picks_df = pd.DataFrame.from_records(standings_rows, columns=[
+        'Email', 'Name', 'Picks Source', 'Conference', 'Team', 'Picks Rank'
+    ])
+    tiebreaker_picks_df = pd.DataFrame.from_records(tiebreaker_rows, columns=[
+        'Email', 'Name', 'Picks Source', 'Pick Value', 'Tiebreaker #'
+    ])
+
+    return standings_picks_df, tiebreaker_picks_df
+
+class TestLeaderboardIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.picks_df, tiebreaker_picks_df = make_picks(60, seed=0)
+        self.scored_tiebreakers_df = scoring.score_tiebreaker_picks(
+            tiebreaker_picks_df, {1: 2, 2: 3}
+        )
+        self.index = leaderboard.LeaderboardIndex()
+        self.index.set_picks(self.picks_df)
+        self.index.set_tiebreakers(self.scored_tiebreakers_df)
+
+    def assert_matches_scoring(self, standings_df):
+        scored_df = scoring.score_standings_picks(standings_df, self.picks_df)
+        pd.testing.assert_frame_equal(self.index.get_scored_picks(), scored_df)
+        pd.testing.assert_frame_equal(
+            self.index.get_leaderboard(),
+            scoring.make_leaderboard(scored_df, self.scored_tiebreakers_df)
+        )
+
+    def test_matches_make_leaderboard(self):
+        for seed in [None, 1, 2, 3]:
+            with self.subTest(seed=seed):
+                standings_df = make_standings(seed)
+                self.index.set_standings(standings_df)
+                self.assert_matches_scoring(standings_df)
+
+    def test_picks_under_wrong_conference_scored(self):
+        standings_df = make_standings()
+        self.index.set_standings(standings_df)
+        eastern_team = standings_df['Team'].iloc[-1]
+        is_misplaced = (
+            (self.picks_df['Team'] == eastern_team) &
+            (self.picks_df['Conference'] == 'Western')
+        )
+        self.assertTrue(is_misplaced.any())
+        scored_df = self.index.get_scored_picks()
+        self.assertTrue(scored_df.loc[is_misplaced, 'Standings Rank'].eq(15).all())
+
+    def test_only_moved_teams_rescored(self):
+        standings_df = make_standings()
+        self.index.set_standings(standings_df)
+        self.assertEqual(self.index.set_standings(standings_df), 0)
+        # the 5 and 6 seeds in the West swap places
+        swapped_df = standings_df.copy()
+        swapped_df.loc[[4, 5], 'Team'] = swapped_df.loc[[5, 4], 'Team'].to_numpy()
+        self.assertGreater(self.index.set_standings(swapped_df), 0)
+        self.assert_matches_scoring(swapped_df)
+
+    def test_what_if(self):
+        standings_df = make_standings()
+        self.index.set_standings(standings_df)
+        team = standings_df['Team'].iloc[-1]
+        # the last team in the East finishing first moves the rest down one
+        what_if_df = pd.concat([
+            standings_df.iloc[:15],
+            standings_df.iloc[15:].assign(
+                Team=[team] + standings_df['Team'].iloc[15:-1].tolist()
+            ),
+        ])
+        expected = scoring.make_leaderboard(
+            scoring.score_standings_picks(what_if_df, self.picks_df),
+            self.scored_tiebreakers_df
+        )
+        pd.testing.assert_frame_equal(self.index.what_if(team, 1), expected)
+        # and the real standings are put back
+        self.assert_matches_scoring(standings_df)
+
+    def test_what_if_unknown_team(self):
+        self.index.set_standings(make_standings())
+        with self.assertRaises(KeyError):
+            self.index.what_if('Seattle SuperSonics', 1)
+        with self.assertRaises(ValueError):
+            self.index.what_if('Boston Celtics', 16)
+
+if __name__ == '__main__':
+    unittest.main()
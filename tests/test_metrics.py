@@ -0,0 +1,137 @@
+'''
+Metrics tests
+Counters, gauges, and stage timers recorded by metrics.py, and the JSON and
+Prometheus files they're written to.
+'''
+
+import json
+import os
+import tempfile
+import unittest
+
+import fake_gspread
+import metrics
+import sheets
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def get_values(self):
+        return {
+            (metric['name'], tuple(metric['labels'].items())): metric['value']
+            for metric in metrics.get_metrics()
+        }
+
+    def test_counters_add_by_labels(self):
+        metrics.count('http_requests_total', host='a.com')
+        metrics.count('http_requests_total', 2, host='a.com')
+        metrics.count('http_requests_total', host='b.com')
+        self.assertEqual(self.get_values(), {
+            ('nba_sheets_http_requests_total', (('host', 'a.com'),)): 3,
+            ('nba_sheets_http_requests_total', (('host', 'b.com'),)): 1,
+        })
+
+    def test_unknown_metric(self):
+        with self.assertRaises(KeyError):
+            metrics.count('not_a_metric')
+
+    def test_timer_records_failure(self):
+        with metrics.timer('Standings'):
+            pass
+        with self.assertRaises(ValueError):
+            with metrics.timer('Leaderboard', pool='one'):
+                raise ValueError
+        values = self.get_values()
+        self.assertEqual(
+            values['nba_sheets_stage_success', (('stage', 'Standings'),)], 1
+        )
+        self.assertEqual(values[
+            'nba_sheets_stage_success', (('pool', 'one'), ('stage', 'Leaderboard'))
+        ], 0)
+        self.assertIn(
+            ('nba_sheets_stage_seconds', (('stage', 'Standings'),)), values
+        )
+
+    def test_record_stages(self):
+        metrics.record_stages(
+            {'Standings': 1.0, 'Tiebreaker #1': None}, {'Standings': 0.5}
+        )
+        self.assertEqual(self.get_values(), {
+            ('nba_sheets_stage_seconds', (('stage', 'Standings'),)): 0.5,
+            ('nba_sheets_stage_success', (('stage', 'Standings'),)): 1,
+            ('nba_sheets_stage_success', (('stage', 'Tiebreaker #1'),)): 0,
+        })
+
+    def test_prometheus_format(self):
+        metrics.count('parses_total', 2)
+        metrics.count('page_cache_total', kind='reused')
+        metrics.count('page_cache_total', kind='say "hi"\\')
+        self.assertEqual(metrics.to_prometheus(), '\n'.join([
+            '# HELP nba_sheets_page_cache_total Page cache events by kind',
+            '# TYPE nba_sheets_page_cache_total counter',
+            'nba_sheets_page_cache_total{kind="reused"} 1',
+            'nba_sheets_page_cache_total{kind="say \\"hi\\"\\\\"} 1',
+            '# HELP nba_sheets_parses_total Pages parsed',
+            '# TYPE nba_sheets_parses_total counter',
+            'nba_sheets_parses_total 2',
+        ]) + '\n')
+
+    def test_write_metrics(self):
+        metrics.set_value('pools_failed', 1)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_fp = os.path.join(tmp_dir, 'metrics.json')
+            prom_fp = os.path.join(tmp_dir, 'metrics.prom')
+            metrics.write_metrics(json_fp, prom_fp)
+            with open(json_fp) as f:
+                written = json.load(f)
+            with open(prom_fp) as f:
+                prom = f.read()
+        self.assertEqual(written['metrics'], [
+            {'name': 'nba_sheets_pools_failed', 'labels': {}, 'value': 1}
+        ])
+        self.assertIn('nba_sheets_pools_failed 1\n', prom)
+
+    def test_nothing_written_by_default(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                metrics.write_metrics()
+            finally:
+                os.chdir(cwd)
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+class TestSheetsApiCalls(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_calls_counted_by_pool(self):
+        server = fake_gspread.FakeSheetsServer()
+        server.create_spreadsheet('wb')
+        wb = fake_gspread.open_fake_workbook(server, 'wb')
+        sheets.count_api_calls(wb.client, pool='one')
+        # counting the same client twice doesn't count its calls twice
+        sheets.count_api_calls(wb.client, pool='one')
+        server.reset_stats()
+        wb.sheet1.update([['a', 'b']], 'A1')
+        wb.sheet1.get_all_values()
+
+        calls = {
+            metric['labels']['api_method']: metric['value']
+            for metric in metrics.get_metrics()
+            if metric['name'] == 'nba_sheets_sheets_api_calls_total'
+        }
+        self.assertTrue(calls)
+        self.assertEqual(calls, server.stats['calls_by_method'])
+        self.assertTrue(all(
+            metric['labels']['pool'] == 'one'
+            for metric in metrics.get_metrics()
+        ))
+
+if __name__ == '__main__':
+    unittest.main()
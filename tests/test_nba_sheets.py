@@ -0,0 +1,170 @@
+'''
+nba_sheets tests
+The tabs written to a pool's workbook, against the in-memory Sheets API in
+fake_gspread.py, and the summaries written to them.
+'''
+
+import unittest
+from datetime import datetime
+
+import pandas as pd
+import pytz
+
+import fake_gspread
+import nba_sheets
+import sheets
+
+class TestWriteUpdateTimestamps(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fake_gspread.FakeSheetsServer()
+        self.server.create_spreadsheet('wb')
+        self.wb = fake_gspread.open_fake_workbook(self.server, 'wb')
+
+    def write(self, update_timestamps, stage_durations=None):
+        wb_session = sheets.WorkbookSession(self.wb)
+        nba_sheets.write_update_timestamps(
+            wb_session, 'Last Updated', update_timestamps, stage_durations
+        )
+        wb_session.commit()
+
+    def read(self):
+        return {
+            row[0]: row for row in
+            self.wb.worksheet('Last Updated').get_all_values()[1:]
+        }
+
+    def test_one_read(self):
+        timestamp = datetime(2026, 1, 1, 12, tzinfo=pytz.utc)
+        self.write({'Standings': timestamp, 'Tiebreakers': timestamp})
+        self.server.reset_stats()
+        self.write({'Standings': timestamp, 'Tiebreakers': timestamp})
+        calls = self.server.stats['calls_by_method']
+        self.assertEqual(calls.get('values.batchGet'), 1)
+        self.assertNotIn('values.get', calls)
+
+    def test_failed_stage_keeps_last_success(self):
+        timestamp = datetime(2026, 1, 1, 12, tzinfo=pytz.utc)
+        self.write({'Standings': timestamp}, {'Standings': 1.234})
+        self.write({'Standings': None, 'Leaderboard': timestamp})
+        rows = self.read()
+        self.assertEqual(
+            rows['Standings'][:4],
+            ['Standings', '2026-01-01 12:00:00 UTC', 'Error', '']
+        )
+        self.assertEqual(rows['Leaderboard'][2], 'OK')
+
+    def test_never_updated(self):
+        self.write({'Standings': None})
+        rows = self.read()
+        self.assertEqual(rows['Standings'][1:3], ['Never', 'Error'])
+
+    def test_old_stages_kept(self):
+        timestamp = datetime(2026, 1, 1, 12, tzinfo=pytz.utc)
+        self.write({'Retired': timestamp})
+        self.write({'Standings': timestamp})
+        self.assertEqual(list(self.read()), ['Retired', 'Standings'])
+
+class TestSummarizeStandingsPicks(unittest.TestCase):
+
+    def setUp(self):
+        self.standings_df = pd.DataFrame({
+            'Conference': ['Western'] * 3,
+            'Team': ['Thunder', 'Nuggets', 'Lakers'],
+        })
+        self.picks_df = pd.DataFrame.from_records([
+            ('a@example.com', 'Bettor', 'Western', 'Thunder', 1),
+            ('a@example.com', 'Bettor', 'Western', 'Nuggets', 2),
+            ('b@example.com', 'Bettor', 'Western', 'Nuggets', 1),
+            ('b@example.com', 'Bettor', 'Western', 'Thunder', 3),
+            ('c@example.com', 'Pundit', 'Western', 'Lakers', 1),
+        ], columns=[
+            'Email', 'Picks Source', 'Conference', 'Team', 'Picks Rank'
+        ])
+
+    def test_count_pick_ranks(self):
+        teams_df = self.standings_df[['Conference', 'Team']]
+        counts = nba_sheets.count_pick_ranks(teams_df, self.picks_df)
+        self.assertEqual(counts.shape, (3, nba_sheets.UNRANKED_PICK + 1))
+        self.assertEqual(counts[0, [1, 3]].tolist(), [1, 1])
+        self.assertEqual(counts[1, [1, 2]].tolist(), [1, 1])
+        # the two who didn't pick the Lakers count once each as unranked
+        self.assertEqual(counts[2, [1, nba_sheets.UNRANKED_PICK]].tolist(), [1, 2])
+
+    def test_summarize_standings_picks(self):
+        summary_df = nba_sheets.summarize_standings_picks(
+            self.standings_df, self.picks_df
+        )
+        self.assertEqual(summary_df.values.tolist(), [
+            ['Western', 'Lakers', '', '', '', '', 0.0],
+            ['Western', 'Nuggets', 1.0, 2.0, 1.5, 1.0, 1.0],
+            ['Western', 'Thunder', 1.0, 3.0, 2.0, 1.0, 1.0],
+        ])
+
+    def test_no_bettors(self):
+        picks_df = self.picks_df.assign(Email=None)
+        summary_df = nba_sheets.summarize_standings_picks(
+            self.standings_df, picks_df
+        )
+        self.assertTrue(summary_df.empty)
+
+class TestWriteArrayFormulas(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fake_gspread.FakeSheetsServer()
+        self.server.create_spreadsheet('wb')
+        self.wb = fake_gspread.open_fake_workbook(self.server, 'wb')
+
+    def make_picks(self, n_entrants):
+        return pd.DataFrame.from_records([
+            (f'{i}@example.com', f'Entrant {i}', 'Bettor', str(i), n)
+            for i in range(n_entrants) for n in [1, 2]
+        ], columns=['Email', 'Name', 'Picks Source', 'Pick Value', 'Tiebreaker #'])
+
+    def write(self, picks_df, array_formulas=True):
+        wb_session = sheets.WorkbookSession(self.wb)
+        nba_sheets.write_tiebreakers_picks(
+            wb_session, 'Tiebreaker Picks', picks_df, 'Tiebreakers',
+            array_formulas=array_formulas
+        )
+        n_cells = wb_session.get_pending_cells()['Tiebreaker Picks']
+        wb_session.commit()
+
+        return n_cells
+
+    def read(self):
+        return self.wb.worksheet('Tiebreaker Picks').get(
+            'A1:G', value_render_option='FORMULA'
+        )
+
+    def test_rewrite_sends_only_picks(self):
+        picks_df = self.make_picks(5)
+        n_cells = self.write(picks_df)
+        # header, picks, and the two arrays
+        self.assertEqual(n_cells, 7 + picks_df.size + 2)
+        # Sheets reads the cells the arrays spill into as values, which the
+        # fake server doesn't fill in itself
+        self.wb.worksheet('Tiebreaker Picks').update(
+            [[0, 0]] * (len(picks_df) - 1), f'F3:G{len(picks_df) + 1}'
+        )
+        self.assertEqual(self.write(picks_df), n_cells)
+
+    def test_switch_from_per_row_formulas(self):
+        picks_df = self.make_picks(5)
+        self.write(picks_df, array_formulas=False)
+        n_cells = self.write(picks_df)
+        # the per-row formulas under the arrays are cleared once
+        self.assertEqual(n_cells, 7 + picks_df.size + 2 + 2 * (len(picks_df) - 1))
+        rows = self.read()
+        self.assertTrue(rows[1][5].startswith('=ARRAYFORMULA('))
+        self.assertTrue(all(len(row) == 5 for row in rows[2:]))
+        self.assertEqual(self.write(picks_df), 7 + picks_df.size + 2)
+
+    def test_stale_rows_cleared(self):
+        self.write(self.make_picks(5))
+        picks_df = self.make_picks(3)
+        self.write(picks_df)
+        self.assertEqual(len(self.read()), len(picks_df) + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+'''
+Parser tests
+Each parser backend and the streaming table parser against the full
+html.parser tree, and the scrapers against the values expected from the pages
+in tests/fixtures.
+'''
+
+import json
+import os
+import unittest
+
+import nba_sheets
+import parsers
+import standings_sources
+import tiebreakers
+from replay import FIXTURES_DIR, read_fixture, use_fixtures
+
+with open(os.path.join(FIXTURES_DIR, 'expected.json')) as f:
+    EXPECTED = json.load(f)
+
+FOX_URL = 'https://www.foxsports.com/nba/standings'
+GAME_LOG_URL = (
+    'https://www.basketball-reference.com/players/c/curryst01/gamelog/2026'
+)
+PLAYER_URL = 'https://www.basketball-reference.com/players/e/edwaran01.html'
+MVP_URL = 'https://www.basketball-reference.com/friv/mvp.html'
+
+# page, and id and class of the tables read from it
+TABLE_CASES = [
+    (FOX_URL, None, 'data-table'),
+    (GAME_LOG_URL, 'player_game_log_reg', None),
+    (PLAYER_URL, 'totals_stats', None),
+    (MVP_URL, 'players', None),
+]
+
+def get_rows(tables):
+    '''
+    Get the text of every cell of every table, row by row.
+
+    Inputs:
+    tables (list of bs4.element.Tag): tables
+
+    Returns: list of lists of str
+    '''
+    return [
+        [cell.get_text() for cell in row.find_all(['th', 'td'])]
+        for table in tables for row in table.find_all('tr')
+    ]
+
+class TestFindTables(unittest.TestCase):
+
+    def test_backends_match_html_parser(self):
+        backends = [
+            backend for backend in parsers.BACKENDS
+            if parsers.is_backend_available(backend)
+        ]
+        for url, table_id, table_class in TABLE_CASES:
+            content = read_fixture(url)
+            expected = get_rows(
+                parsers.find_tables(content, table_id, table_class, 'html.parser')
+            )
+            self.assertTrue(expected)
+            for backend in backends:
+                with self.subTest(url=url, backend=backend):
+                    tables = parsers.find_tables(
+                        content, table_id, table_class, backend
+                    )
+                    self.assertEqual(get_rows(tables), expected)
+
+    def test_both_conference_tables(self):
+        tables = parsers.find_tables(
+            read_fixture(FOX_URL), table_class='data-table'
+        )
+        self.assertEqual(len(tables), 2)
+
+    def test_missing_table(self):
+        self.assertIsNone(
+            parsers.find_table(read_fixture(PLAYER_URL), table_id='nope')
+        )
+
+    def test_unavailable_backend(self):
+        with self.assertRaises(ValueError):
+            parsers.find_tables(b'<table></table>', backend='nope')
+
+class TestScrapers(unittest.TestCase):
+
+    def setUp(self):
+        use_fixtures(self)
+
+    def test_get_standings(self):
+        standings_df = standings_sources.get_standings(FOX_URL)
+        self.assertEqual(
+            standings_df[['Conference', 'Rank', 'Team', 'W-L']].values.tolist(),
+            EXPECTED['standings']
+        )
+
+    def test_get_standings_any_backend(self):
+        default_backend = parsers.PARSER_BACKEND
+        self.addCleanup(setattr, parsers, 'PARSER_BACKEND', default_backend)
+        parsers.PARSER_BACKEND = 'html.parser'
+        expected = standings_sources.get_standings.__wrapped__(FOX_URL)
+        parsers.PARSER_BACKEND = 'strainer'
+        self.assertTrue(
+            standings_sources.get_standings.__wrapped__(FOX_URL).equals(expected)
+        )
+
+    def test_parse_bbref_player_pg(self):
+        value = nba_sheets.parse_bbref_player_pg(
+            PLAYER_URL, 'totals_stats.2026', 'fg3a', int
+        )
+        self.assertEqual(value, EXPECTED['parse_bbref_player_pg'])
+
+    def test_parse_bbref_player_season_game_log(self):
+        rows = nba_sheets.parse_bbref_player_season_game_log(
+            GAME_LOG_URL, ['team_game_num_season', 'team_name_abbr'], [int, str]
+        )
+        self.assertEqual(
+            rows[0], {'team_game_num_season': 1, 'team_name_abbr': 'GSW'}
+        )
+        # header rows repeated in the table parse as empty rows
+        games = [row['team_game_num_season'] for row in rows if row]
+        self.assertEqual(games, list(range(1, 83)))
+
+    def test_parse_bbref_mvp_tracker(self):
+        self.assertEqual(
+            nba_sheets.parse_bbref_mvp_tracker(MVP_URL, 'Nikola Jokic'),
+            EXPECTED['parse_bbref_mvp_tracker']
+        )
+        self.assertEqual(
+            nba_sheets.parse_bbref_mvp_tracker(MVP_URL, 'Nobody'), 'Unranked'
+        )
+
+def iter_chunks(content, chunk_size, consumed):
+    '''
+    Split a page into chunks, counting how many are read.
+
+    Inputs:
+    content (bytes): page body
+    chunk_size (int): bytes per chunk
+    consumed (list): one None appended per chunk read
+
+    Returns: iterator of bytes
+    '''
+    for start in range(0, len(content), chunk_size):
+        consumed.append(None)
+        yield content[start:start + chunk_size]
+
+class TestStreamTableRows(unittest.TestCase):
+
+    # page, table id, and the stats read from it
+    CASES = [
+        (GAME_LOG_URL, 'player_game_log_reg', [
+            'player_game_num_career', 'team_game_num_season', 'team_name_abbr'
+        ]),
+        (PLAYER_URL, 'totals_stats', ['fg3', 'fg3a']),
+        (MVP_URL, 'players', None),
+    ]
+
+    def setUp(self):
+        use_fixtures(self)
+
+    def stream(self, content, table_id, stat_ids, chunk_size=256):
+        consumed = []
+        rows = parsers.stream_table_rows(
+            iter_chunks(content, chunk_size, consumed), 'utf-8', table_id,
+            stat_ids
+        )
+
+        return rows, len(consumed)
+
+    def test_matches_whole_page(self):
+        for url, table_id, stat_ids in self.CASES[:2]:
+            with self.subTest(url=url):
+                expected = tiebreakers.parse_bbref_table.__wrapped__(
+                    url, table_id, stat_ids
+                )
+                rows, _ = self.stream(read_fixture(url), table_id, stat_ids)
+                self.assertEqual(rows, expected)
+                self.assertEqual(
+                    tiebreakers.stream_bbref_table(url, table_id, stat_ids),
+                    expected
+                )
+
+    def test_split_characters(self):
+        # chunks one byte long split every multibyte character
+        content = read_fixture(MVP_URL)
+        expected, _ = self.stream(content, 'players', None)
+        rows, _ = self.stream(content, 'players', None, chunk_size=1)
+        self.assertTrue(rows)
+        self.assertEqual(rows, expected)
+
+    def test_stops_at_table_end(self):
+        url, table_id, stat_ids = self.CASES[0]
+        page = read_fixture(url)
+        content = page.replace(
+            b'</body>', b'<!--' + b'x' * 100000 + b'--></body>', 1
+        )
+        rows, n_consumed = self.stream(content, table_id, stat_ids)
+        self.assertTrue(rows)
+        # nothing past the original page is read
+        self.assertLessEqual(n_consumed * 256, len(page) + 256)
+
+    def test_missing_table(self):
+        rows, _ = self.stream(read_fixture(PLAYER_URL), 'nope', ['fg3'])
+        self.assertIsNone(rows)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+'''
+Picks store tests
+Form responses read through picks_store.py from the in-memory Sheets API in
+fake_gspread.py, parsed by nba_sheets.parse_responses(...).
+'''
+
+import json
+import os
+import tempfile
+import unittest
+import warnings
+
+import fake_gspread
+import nba_sheets
+import picks_store
+
+QUESTIONS = {col: question for question, col in nba_sheets.COLS_MAP.items()}
+HEADER = [
+    QUESTIONS[col] for col in [
+        'timestamp', 'Email', 'Name', 'Western_1', 'Western_2',
+        'Tiebreaker_1', 'Picks Source'
+    ]
+]
+
+def make_response(n, tiebreaker=50):
+    '''
+    Make the nth entrant's form response.
+
+    Inputs:
+    n (int): entrant number
+    tiebreaker (int or str): tiebreaker pick
+
+    Returns: list
+    '''
+    return [
+        f'1/{n}/2026 12:00:00', f'{n}@example.com', f'Entrant {n}', 'Thunder',
+        'Nuggets', tiebreaker, 'Bettor'
+    ]
+
+class TestReadPicks(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fake_gspread.FakeSheetsServer()
+        self.server.create_spreadsheet('wb')
+        self.wb = fake_gspread.open_fake_workbook(self.server, 'wb')
+        ws = self.wb.add_worksheet('Responses', rows=3, cols=len(HEADER))
+        ws.update([HEADER, make_response(1), make_response(2, '')], 'A1')
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.store_dir = tmp_dir.name
+
+    def read(self, **kwargs):
+        # reopened each time, as each run would, so the grid size is current
+        frames = picks_store.read_picks(
+            self.wb.worksheet('Responses'), nba_sheets.parse_responses,
+            nba_sheets.RESPONSE_ID_COLS, store_dir=self.store_dir, **kwargs
+        )
+
+        return frames, picks_store.get_read_stats()
+
+    def assert_frames_equal(self, frames, expected):
+        for df, expected_df in zip(frames, expected):
+            self.assertTrue(df.equals(expected_df))
+
+    def test_reads_only_new_responses(self):
+        _, stats = self.read()
+        self.assertTrue(stats['full_read'])
+        self.wb.worksheet('Responses').append_row(make_response(3))
+        frames, stats = self.read()
+        self.assertEqual(
+            stats,
+            {'full_read': False, 'responses_read': 1, 'responses_stored': 3}
+        )
+        expected, _ = self.read(rebuild=True)
+        self.assert_frames_equal(frames, expected)
+        self.assertEqual(len(frames[0]), 6)
+
+    def test_full_grid_skips_read(self):
+        self.read()
+        self.server.reset_stats()
+        _, stats = self.read()
+        self.assertEqual(stats['responses_read'], 0)
+        self.assertNotIn('values.batchGet', self.server.stats['calls_by_method'])
+
+    def test_records_format(self):
+        self.read()
+        with open(os.path.join(self.store_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        self.assertEqual(meta['format'], picks_store.STORE_FORMAT)
+
+    def test_unreadable_format_rebuilt(self):
+        self.read()
+        meta_fp = os.path.join(self.store_dir, 'meta.json')
+        with open(meta_fp) as f:
+            meta = json.load(f)
+        with open(meta_fp, 'w') as f:
+            json.dump({**meta, 'format': 'feather'}, f)
+        _, stats = self.read()
+        self.assertTrue(stats['full_read'])
+
+    def test_read_in_recorded_format(self):
+        # a store saved as pickles is still read after pyarrow is installed
+        store_format = picks_store.STORE_FORMAT
+        self.addCleanup(setattr, picks_store, 'STORE_FORMAT', store_format)
+        picks_store.STORE_FORMAT = 'pickle'
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            expected, _ = self.read()
+        picks_store.STORE_FORMAT = 'parquet'
+        frames, stats = self.read()
+        self.assertFalse(stats['full_read'])
+        self.assert_frames_equal(frames, expected)
+
+    def test_pickle_fallback_warns(self):
+        store_format = picks_store.STORE_FORMAT
+        self.addCleanup(setattr, picks_store, 'STORE_FORMAT', store_format)
+        picks_store.STORE_FORMAT = 'pickle'
+        with self.assertWarns(UserWarning):
+            self.read()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+'''
+Pools tests
+Several pools updated in one run by nba_sheets.update_pools(...), against
+the pages in tests/fixtures and the in-memory Sheets API in fake_gspread.py.
+'''
+
+import contextlib
+import io
+import tempfile
+import unittest
+
+import fake_gspread
+import fetch
+import history
+import nba_sheets
+import picks_store
+import sheets
+from replay import use_fixtures
+
+TEAMS = {
+    'Western': [
+        'Oklahoma City Thunder', 'Houston Rockets', 'Los Angeles Lakers',
+        'Denver Nuggets', 'Minnesota Timberwolves', 'San Antonio Spurs',
+        'Phoenix Suns', 'Golden State Warriors',
+    ],
+    'Eastern': [
+        'Detroit Pistons', 'Boston Celtics', 'New York Knicks',
+        'Cleveland Cavaliers', 'Toronto Raptors', 'Atlanta Hawks',
+        'Orlando Magic', 'Philadelphia 76ers',
+    ],
+}
+
+def make_responses(n_entrants):
+    '''
+    Make form responses, every entrant picking the same teams.
+
+    Inputs:
+    n_entrants (int): number of responses
+
+    Returns: list of lists, header first
+    '''
+    header = list(nba_sheets.COLS_MAP)
+    rows = [header]
+    for i in range(n_entrants):
+        row = []
+        for question in header:
+            field = nba_sheets.COLS_MAP[question]
+            conference, _, rank = field.partition('_')
+            if conference in TEAMS:
+                row.append(TEAMS[conference][int(rank) - 1])
+            elif field.startswith('Tiebreaker_'):
+                row.append(50 + i)
+            elif field == 'timestamp':
+                row.append(f'10/1/2025 12:00:{i:02d}')
+            elif field == 'Email':
+                row.append(f'entrant{i}@example.com')
+            elif field == 'Name':
+                row.append(f'Entrant {i}')
+            elif field == 'Picks Source':
+                row.append('Bettor')
+            else:
+                row.append('')
+        rows.append(row)
+
+    return rows
+
+class TestUpdatePools(unittest.TestCase):
+
+    def setUp(self):
+        use_fixtures(self)
+        fetch.reset_cache_stats()
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        for module, name in [
+            (picks_store, 'PICKS_STORE_DIR'), (history, 'HISTORY_DIR')
+        ]:
+            self.addCleanup(setattr, module, name, getattr(module, name))
+            setattr(module, name, f'{tmp_dir.name}/{name}')
+        self.addCleanup(nba_sheets._leaderboard_indexes.clear)
+        # the fake API has no quota to stay under
+        self.addCleanup(
+            setattr, sheets, 'API_REQUESTS_PER_MINUTE',
+            sheets.API_REQUESTS_PER_MINUTE
+        )
+        sheets.API_REQUESTS_PER_MINUTE = None
+
+        self.server = fake_gspread.FakeSheetsServer()
+        self.pools = []
+        self.workbooks = {}
+        for name in ['one', 'two']:
+            sheet_id = f'pool-{name}'
+            self.server.create_spreadsheet(sheet_id)
+            wb = fake_gspread.open_fake_workbook(self.server, sheet_id)
+            wb.add_worksheet('Responses', rows=4, cols=len(nba_sheets.COLS_MAP))
+            wb.worksheet('Responses').update(make_responses(3))
+            self.pools.append({
+                'name': name, 'sheet_id': sheet_id,
+                'responses_ws_name': 'Responses',
+            })
+            self.workbooks[name] = wb
+
+    def update(self, pools, **kwargs):
+        # the run prints its progress
+        with contextlib.redirect_stdout(io.StringIO()):
+            return nba_sheets.update_pools(pools, self.workbooks, **kwargs)
+
+    def read_tab(self, name, title):
+        return self.workbooks[name].worksheet(title).get_all_values()
+
+    def test_pages_downloaded_once(self):
+        results = self.update(self.pools, n_simulations=0)
+        self.assertTrue(all(results[pool['name']] for pool in self.pools))
+        # the standings and the three pages the tiebreakers read
+        self.assertEqual(fetch.get_cache_stats()['misses'], 4)
+        for name in ['one', 'two']:
+            self.assertEqual(len(self.read_tab(name, 'Standings')), 31)
+            self.assertEqual(len(self.read_tab(name, 'Leaderboard')), 4)
+
+    def test_projection_shared(self):
+        self.update(self.pools, n_simulations=500)
+        self.assertEqual(
+            self.read_tab('one', 'Seed Projections'),
+            self.read_tab('two', 'Seed Projections')
+        )
+
+    def test_failed_pool_doesnt_stop_others(self):
+        # a pool without a workbook tries the missing service account key
+        pools = self.pools + [{
+            'name': 'three', 'sheet_id': 'pool-three',
+            'responses_ws_name': 'Responses',
+        }]
+        with self.assertRaisesRegex(AssertionError, 'three'):
+            self.update(pools, n_simulations=0)
+        self.assertEqual(len(self.read_tab('two', 'Leaderboard')), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+'''
+Projection tests
+Seasons simulated by projection.py from small standings, checked against
+results certain from the records and against each other by seed.
+'''
+
+import unittest
+from concurrent.futures import Future
+
+import pandas as pd
+
+import nba_sheets
+import projection
+
+# one conference of three teams; the Thunder have clinched the 1 seed
+STANDINGS_DF = pd.DataFrame({
+    'Conference': ['Western'] * 3,
+    'Rank': [1, 2, 3],
+    'Team': ['Thunder', 'Nuggets', 'Lakers'],
+    'W-L': ['75-0', '40-30', '35-35'],
+    'Playoff Points': [3, 2, 1],
+})
+
+def make_picks(picks):
+    '''
+    Make standings picks, one entrant per list of teams.
+
+    Inputs:
+    picks (list of lists of str): each entrant's picks, in rank order
+
+    Returns: pd.DataFrame
+    '''
+    return pd.DataFrame.from_records([
+        (f'{i}@example.com', f'Entrant {i}', team, rank)
+        for i, teams in enumerate(picks)
+        for rank, team in enumerate(teams, 1)
+    ], columns=['Email', 'Name', 'Team', 'Picks Rank'])
+
+class TestProjection(unittest.TestCase):
+
+    def test_clinched_seed(self):
+        seeds_df = projection.get_seed_projection(
+            projection.simulate_seasons(STANDINGS_DF, 2000, seed=0, max_workers=1)
+        )
+        thunder = seeds_df.set_index('Team').loc['Thunder']
+        self.assertEqual(thunder['Seed 1'], 1)
+        self.assertTrue(75 < thunder['Expected Wins'] < 82)
+        self.assertAlmostEqual(seeds_df['Mean Seed'].sum(), 6)
+
+    def test_pool_points(self):
+        picks_df = make_picks([['Thunder'], ['Lakers']])
+        _, entrants_df = projection.project(
+            STANDINGS_DF, picks_df, 2000, seed=0, max_workers=1
+        )
+        # the Thunder's pick always scores 7 rank points and 3 playoff points
+        first = entrants_df.iloc[0]
+        self.assertEqual(first['Name'], 'Entrant 0')
+        self.assertEqual(first['Expected Points'], 10)
+        self.assertEqual(first['Points Std Dev'], 0)
+        self.assertEqual(entrants_df['Win Probability'].sum(), 1)
+
+    def test_same_seed_same_projection(self):
+        picks_df = make_picks([['Thunder', 'Nuggets'], ['Nuggets', 'Lakers']])
+        n_sims = projection.CHUNK_SIZE * 2 + 1
+        expected = projection.project(
+            STANDINGS_DF, picks_df, n_sims, seed=1, max_workers=1
+        )
+        for max_workers in [1, 2]:
+            with self.subTest(max_workers=max_workers):
+                seeds_df, entrants_df = projection.project(
+                    STANDINGS_DF, picks_df, n_sims, seed=1,
+                    max_workers=max_workers
+                )
+                self.assertTrue(seeds_df.equals(expected[0]))
+                self.assertTrue(entrants_df.equals(expected[1]))
+
+    def test_pools_share_simulation(self):
+        simulation = projection.simulate_seasons(
+            STANDINGS_DF, 3000, seed=2, max_workers=1
+        )
+        self.assertEqual(simulation['seeds'].shape, (3000, 3))
+        for picks in [[['Lakers', 'Nuggets']], [['Nuggets'], ['Thunder']]]:
+            picks_df = make_picks(picks)
+            _, expected = projection.project(
+                STANDINGS_DF, picks_df, 3000, seed=2, max_workers=1
+            )
+            entrants_df = projection.get_pool_projection(simulation, picks_df)
+            self.assertTrue(entrants_df.equals(expected))
+
+    def test_no_standings(self):
+        shared = Future()
+        shared.set_result({'standings_df': None})
+        with self.assertRaises(ValueError):
+            nba_sheets.simulate_seasons(shared, 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+'''
+Scoring tests
+Picks scored by scoring.py against small, hand-checked standings.
+'''
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import scoring
+
+ENTRANTS = [
+    ('a@example.com', 'Ann', 'Form'),
+    ('b@example.com', 'Bob', 'Form'),
+    ('c@example.com', 'Cat', 'Form'),
+]
+
+def make_standings_picks(picks):
+    '''
+    Make standings picks for the entrants in ENTRANTS.
+
+    Inputs:
+    picks (list of lists of str): each entrant's Western picks, in rank order
+
+    Returns: pd.DataFrame
+    '''
+    return pd.DataFrame.from_records([
+        (email, name, source, team, 'Western', rank)
+        for (email, name, source), teams in zip(ENTRANTS, picks)
+        for rank, team in enumerate(teams, 1)
+    ], columns=[
+        'Email', 'Name', 'Picks Source', 'Team', 'Conference', 'Picks Rank'
+    ])
+
+def make_tiebreaker_picks(values):
+    '''
+    Make tiebreaker picks for the entrants in ENTRANTS.
+
+    Inputs:
+    values (list of lists of str): each entrant's tiebreaker picks, in order
+
+    Returns: pd.DataFrame
+    '''
+    return pd.DataFrame.from_records([
+        (email, name, source, value, str(n))
+        for (email, name, source), picks in zip(ENTRANTS, values)
+        for n, value in enumerate(picks, 1)
+    ], columns=['Email', 'Name', 'Picks Source', 'Pick Value', 'Tiebreaker #'])
+
+STANDINGS_DF = pd.DataFrame({
+    'Conference': ['Western'] * 5,
+    'Rank': [1, 2, 3, 4, 5],
+    'Team': ['Thunder', 'Nuggets', 'Lakers', 'Rockets', 'Warriors'],
+    'Playoff Points': [5, 4, 3, 2, 1],
+})
+
+class TestScoring(unittest.TestCase):
+
+    def test_get_rank_points(self):
+        points = scoring.get_rank_points([1] * 6, [1, 2, 3, 4, 5, np.nan])
+        np.testing.assert_array_equal(points, [7, 5, 3, 1, 0, np.nan])
+
+    def test_score_standings_picks(self):
+        picks_df = make_standings_picks([['Nuggets', 'Thunder', 'Spurs']])
+        scored_df = scoring.score_standings_picks(STANDINGS_DF, picks_df)
+        self.assertEqual(scored_df['Standings Rank'].tolist()[:2], [2.0, 1.0])
+        self.assertEqual(scored_df['Rank Points'].tolist()[:2], [5.0, 5.0])
+        self.assertEqual(scored_df['Total Points'].tolist()[:2], [9.0, 10.0])
+        # a team missing from the standings isn't scored
+        missing = scored_df.iloc[2][['Standings Rank', 'Total Points']]
+        self.assertTrue(missing.isna().all())
+
+    def test_score_tiebreaker_picks(self):
+        picks_df = make_tiebreaker_picks([['50', 'lots']])
+        scored_df = scoring.score_tiebreaker_picks(picks_df, {1: 51, 2: None})
+        self.assertEqual(scored_df['Actual Value'].iloc[0], 51)
+        self.assertEqual(scored_df['Difference'].iloc[0], 1)
+        self.assertTrue(scored_df['Difference'].iloc[1:].isna().all())
+
+    def test_make_leaderboard(self):
+        standings_picks_df = scoring.score_standings_picks(
+            STANDINGS_DF, make_standings_picks([
+                ['Nuggets', 'Thunder'],
+                ['Thunder', 'Nuggets'],
+                ['Thunder', 'Nuggets'],
+            ])
+        )
+        tiebreaker_picks_df = scoring.score_tiebreaker_picks(
+            make_tiebreaker_picks([['51'], ['40'], ['40']]), {1: 51}
+        )
+        leaderboard_df = scoring.make_leaderboard(
+            standings_picks_df, tiebreaker_picks_df
+        )
+        # Bob and Cat are tied on everything, so they share first place
+        self.assertEqual(leaderboard_df['Name'].tolist(), ['Bob', 'Cat', 'Ann'])
+        self.assertEqual(leaderboard_df['Place'].tolist(), [1, 1, 3])
+        self.assertEqual(leaderboard_df['Total Points'].tolist(), [23, 23, 19])
+        self.assertEqual(
+            leaderboard_df.columns.tolist(),
+            scoring.LEADERBOARD_COLS + ['Tiebreaker #1 Difference']
+        )
+
+    def test_tiebreaker_breaks_tie(self):
+        standings_picks_df = scoring.score_standings_picks(
+            STANDINGS_DF, make_standings_picks([['Thunder'], ['Thunder']])
+        )
+        tiebreaker_picks_df = scoring.score_tiebreaker_picks(
+            make_tiebreaker_picks([['40'], ['50']]), {1: 51}
+        )
+        leaderboard_df = scoring.make_leaderboard(
+            standings_picks_df, tiebreaker_picks_df
+        )
+        self.assertEqual(leaderboard_df['Name'].tolist(), ['Bob', 'Ann'])
+        self.assertEqual(leaderboard_df['Place'].tolist(), [1, 2])
+
+    def test_to_sheet_values(self):
+        df = pd.DataFrame({
+            'Points': [7.0, np.nan, 2.5], 'Team': ['a', None, 'c']
+        })
+        self.assertEqual(
+            scoring.to_sheet_values(df).values.tolist(),
+            [[7, 'a'], ['', ''], [2.5, 'c']]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+'''
+Sheets tests
+Batched and incremental workbook writes, and the request budget and retries
+Sheets API calls go through, against the in-memory Sheets API in
+fake_gspread.py.
+'''
+
+import unittest
+
+import gspread
+import requests
+
+import fake_gspread
+import metrics
+import sheets
+
+class TestChangedBlocks(unittest.TestCase):
+
+    def test_unchanged(self):
+        values = [['Team', 'Rank'], ['Celtics', 1]]
+        self.assertEqual(sheets.get_changed_blocks(values, values), [])
+
+    def test_runs_on_consecutive_rows_merge(self):
+        current = [['a', 1, 2], ['b', 3, 4], ['c', 5, 6]]
+        values = [['a', 1, 2], ['b', 7, 8], ['c', 9, 10]]
+        self.assertEqual(
+            sheets.get_changed_blocks(current, values),
+            [('B2:C3', [[7, 8], [9, 10]])]
+        )
+
+    def test_separate_runs(self):
+        current = [['a', 1, 2, 3]]
+        values = [['x', 1, 2, 'y']]
+        self.assertEqual(
+            sheets.get_changed_blocks(current, values),
+            [('A1:A1', [['x']]), ('D1:D1', [['y']])]
+        )
+
+    def test_new_rows(self):
+        # trailing empty cells and rows aren't returned by the API
+        current = [['a', 1]]
+        values = [['a', 1], ['b', '']]
+        self.assertEqual(
+            sheets.get_changed_blocks(current, values), [('A2:A2', [['b']])]
+        )
+
+    def test_cells_equal(self):
+        self.assertTrue(sheets.cells_equal('', None))
+        self.assertTrue(sheets.cells_equal('1-1', "'1-1"))
+        self.assertFalse(sheets.cells_equal(1, True))
+        self.assertFalse(sheets.cells_equal('1', 1))
+
+class TestWorkbookSession(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fake_gspread.FakeSheetsServer()
+        self.server.create_spreadsheet('wb')
+        self.wb = fake_gspread.open_fake_workbook(self.server, 'wb')
+
+    def write(self, values, incremental=True):
+        wb_session = sheets.WorkbookSession(self.wb, incremental=incremental)
+        wb_session.ensure_worksheet('Tab', rows=len(values), cols=len(values[0]))
+        wb_session.queue_update('Tab', values)
+        self.server.reset_stats()
+        wb_session.commit()
+
+        return wb_session.last_commit_stats
+
+    def test_one_write_per_commit(self):
+        wb_session = sheets.WorkbookSession(self.wb)
+        for title in ['One', 'Two']:
+            wb_session.ensure_worksheet(title, rows=2, cols=2)
+            wb_session.queue_update(title, [['a', 'b'], [1, 2]])
+        self.server.reset_stats()
+        wb_session.commit()
+        self.assertEqual(
+            self.server.stats['calls_by_method'],
+            {'spreadsheets.batchUpdate': 1, 'values.batchUpdate': 1}
+        )
+        self.assertEqual(
+            self.wb.worksheet('Two').get_all_values(), [['a', 'b'], ['1', '2']]
+        )
+
+    def test_later_update_replaces_earlier(self):
+        wb_session = sheets.WorkbookSession(self.wb)
+        wb_session.ensure_worksheet('Tab', rows=1, cols=1)
+        wb_session.queue_update('Tab', [['old']])
+        wb_session.queue_update('Tab', [['new']])
+        self.assertEqual(wb_session.get_pending_cells(), {'Tab': 1})
+        wb_session.commit()
+        self.assertEqual(self.wb.worksheet('Tab').get_all_values(), [['new']])
+
+    def test_unchanged_tab_sends_nothing(self):
+        values = [['Team', 'Rank'], ['Celtics', 1], ['Knicks', 2]]
+        self.write(values)
+        stats = self.write(values)
+        self.assertEqual(
+            stats, {'cells_written': 0, 'cells_skipped': 6, 'ranges_written': 0}
+        )
+        self.assertNotIn('values.batchUpdate', self.server.stats['calls_by_method'])
+
+    def test_only_changed_cells_sent(self):
+        self.write([['Team', 'Rank'], ['Celtics', 1], ['Knicks', 2]])
+        stats = self.write([['Team', 'Rank'], ['Celtics', 2], ['Knicks', 1]])
+        self.assertEqual(
+            stats, {'cells_written': 2, 'cells_skipped': 4, 'ranges_written': 1}
+        )
+        self.assertEqual(
+            self.wb.worksheet('Tab').get_all_values(),
+            [['Team', 'Rank'], ['Celtics', '2'], ['Knicks', '1']]
+        )
+
+    def test_hand_edits_are_corrected(self):
+        values = [['Team', 'Rank'], ['Celtics', 1]]
+        self.write(values)
+        self.wb.worksheet('Tab').update([['edited']], 'A2')
+        stats = self.write(values)
+        self.assertEqual(stats['cells_written'], 1)
+        self.assertEqual(self.wb.worksheet('Tab').acell('A2').value, 'Celtics')
+
+    def test_full_write_without_incremental(self):
+        values = [['Team', 'Rank'], ['Celtics', 1]]
+        self.write(values, incremental=False)
+        stats = self.write(values, incremental=False)
+        self.assertEqual(stats['cells_written'], 4)
+
+class TestLimitApiCalls(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fake_gspread.FakeSheetsServer()
+        self.server.create_spreadsheet('wb')
+        self.wb = fake_gspread.open_fake_workbook(self.server, 'wb')
+        self.ws = self.wb.sheet1
+        # retry straight away
+        for name, value in [('API_BACKOFF_SECONDS', 0), ('API_MAX_RETRIES', 2)]:
+            self.addCleanup(setattr, sheets, name, getattr(sheets, name))
+            setattr(sheets, name, value)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def limit(self, bucket=None):
+        sheets.limit_api_calls(self.wb.client, bucket)
+        self.server.reset_stats()
+
+    def get_retries(self):
+        return {
+            metric['labels']['status']: metric['value']
+            for metric in metrics.get_metrics()
+            if metric['name'] == 'nba_sheets_sheets_api_retries_total'
+        }
+
+    def test_quota_and_server_errors_retried(self):
+        self.limit()
+        self.server.inject_errors(429, 503)
+        self.ws.update([['a']], 'A1')
+        self.assertEqual(self.server.stats['calls'], 3)
+        self.assertEqual(self.get_retries(), {'429': 1, '503': 1})
+        self.assertEqual(self.ws.get_all_values(), [['a']])
+
+    def test_gives_up_after_max_retries(self):
+        self.limit()
+        self.server.inject_errors(503, 503, 503)
+        with self.assertRaises(gspread.exceptions.APIError):
+            self.ws.update([['a']], 'A1')
+        self.assertEqual(self.server.stats['calls'], 3)
+
+    def test_client_errors_not_retried(self):
+        self.limit()
+        self.server.inject_errors(400)
+        with self.assertRaises(gspread.exceptions.APIError):
+            self.ws.update([['a']], 'A1')
+        self.assertEqual(self.server.stats['calls'], 1)
+        self.assertEqual(self.get_retries(), {})
+
+    def test_calls_wait_for_budget(self):
+        # one call at once, then one every 100 ms
+        self.limit(sheets.TokenBucket(600, 1))
+        for _ in range(3):
+            self.ws.get_all_values()
+        throttled = sum(
+            metric['value'] for metric in metrics.get_metrics()
+            if metric['name'] == 'nba_sheets_sheets_api_throttle_seconds_total'
+        )
+        self.assertGreater(throttled, 0.15)
+
+    def test_limited_once(self):
+        self.limit()
+        self.limit()
+        self.server.inject_errors(503, 503)
+        self.ws.get_all_values()
+        self.assertEqual(self.get_retries(), {'503': 2})
+
+    def test_fake_quota(self):
+        # opening the workbook and worksheet takes two of the three requests
+        server = fake_gspread.FakeSheetsServer(quota_per_minute=3)
+        server.create_spreadsheet('wb')
+        ws = fake_gspread.open_fake_workbook(server, 'wb').sheet1
+        ws.get_all_values()
+        with self.assertRaises(gspread.exceptions.APIError) as raised:
+            ws.get_all_values()
+        self.assertEqual(raised.exception.response.status_code, 429)
+
+class TestBackoff(unittest.TestCase):
+
+    def make_response(self, retry_after):
+        response = requests.Response()
+        response.headers['Retry-After'] = retry_after
+        return response
+
+    def test_retry_after(self):
+        self.assertEqual(
+            sheets.get_backoff_seconds(0, self.make_response('3')), 3
+        )
+        self.assertEqual(
+            sheets.get_backoff_seconds(0, self.make_response('600')),
+            sheets.API_MAX_BACKOFF_SECONDS
+        )
+
+    def test_jittered_exponential_backoff(self):
+        for attempt in range(8):
+            limit = min(
+                sheets.API_BACKOFF_SECONDS * 2 ** attempt,
+                sheets.API_MAX_BACKOFF_SECONDS
+            )
+            backoff = sheets.get_backoff_seconds(
+                attempt, self.make_response('a date')
+            )
+            self.assertTrue(0 <= backoff <= limit)
+
+if __name__ == '__main__':
+    unittest.main()
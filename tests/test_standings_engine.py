@@ -0,0 +1,136 @@
+'''
+Standings engine tests
+Standings worked out by standings_engine.py from small sets of game results,
+with ties broken by the NBA's tiebreakers, and results files read a few rows
+at a time.
+'''
+
+import os
+import tempfile
+import unittest
+
+import standings_engine
+import standings_sources
+
+def add_games(engine, games):
+    '''
+    Add games to an engine, each on its own date.
+
+    Inputs:
+    engine (StandingsEngine): engine to add to
+    games (list of tuples): winner, loser, and optionally the winning margin
+    '''
+    for i, (winner, loser, *margin) in enumerate(games):
+        engine.add_game(
+            f'2026-01-{i + 1:02d}', winner, loser, 100 + sum(margin or [1]), 100
+        )
+
+class TestStandingsEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = standings_engine.StandingsEngine()
+
+    def test_layout(self):
+        add_games(self.engine, [('Boston Celtics', 'Denver Nuggets')])
+        standings_df = self.engine.get_standings()
+        self.assertIsNone(standings_sources.validate_standings(standings_df))
+        celtics = standings_df.set_index('Team').loc['Boston Celtics']
+        self.assertEqual(celtics['W-L'], '1-0')
+        self.assertEqual(celtics['Rank'], 1)
+        nuggets = standings_df.set_index('Team').loc['Denver Nuggets']
+        self.assertEqual((nuggets['Rank'], nuggets['GB']), (15, 0.5))
+
+    def test_same_game_added_once(self):
+        self.assertTrue(self.engine.add_game(
+            '2026-01-01', 'Boston Celtics', 'Miami Heat', 110, 100
+        ))
+        self.assertFalse(self.engine.add_game(
+            '2026-01-01', 'Boston Celtics', 'Miami Heat', 110, 100
+        ))
+        self.assertEqual(self.engine.records['Boston Celtics']['wins'], 1)
+
+    def test_unknown_team(self):
+        with self.assertRaises(ValueError):
+            self.engine.add_game(
+                '2026-01-01', 'Seattle SuperSonics', 'Miami Heat', 1, 0
+            )
+
+    def test_head_to_head(self):
+        # both 1-1; the Heat beat the Celtics
+        add_games(self.engine, [
+            ('Miami Heat', 'Boston Celtics'),
+            ('Boston Celtics', 'Denver Nuggets'),
+            ('Utah Jazz', 'Miami Heat'),
+        ])
+        ranked = self.engine.rank_conference('Eastern')
+        self.assertLess(
+            ranked.index('Miami Heat'), ranked.index('Boston Celtics')
+        )
+
+    def test_division_leader_breaks_three_team_tie(self):
+        # the Hawks are 2-0 and the rest 1-1; the Celtics lead their
+        # division, the Hawks lead the Heat's and Magic's
+        add_games(self.engine, [
+            ('Boston Celtics', 'Denver Nuggets'),
+            ('Utah Jazz', 'Boston Celtics'),
+            ('Phoenix Suns', 'New York Knicks'),
+            ('Atlanta Hawks', 'Miami Heat'),
+            ('Atlanta Hawks', 'Orlando Magic'),
+            ('Miami Heat', 'Los Angeles Lakers'),
+            ('Orlando Magic', 'Golden State Warriors', 20),
+        ])
+        ranked = self.engine.rank_conference('Eastern')
+        self.assertEqual(ranked[:2], ['Atlanta Hawks', 'Boston Celtics'])
+        # the Heat and Magic start over as a two-team tie, decided by point
+        # differential
+        self.assertEqual(ranked[2:4], ['Orlando Magic', 'Miami Heat'])
+
+    def test_lots_drawn_by_name(self):
+        self.assertEqual(
+            self.engine.break_ties(['Utah Jazz', 'Denver Nuggets']),
+            ['Denver Nuggets', 'Utah Jazz']
+        )
+
+class TestReadResults(unittest.TestCase):
+
+    HEADER = ','.join(standings_engine.RESULT_COLS) + '\n'
+
+    def setUp(self):
+        self.engine = standings_engine.StandingsEngine()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.fp = os.path.join(tmp_dir.name, 'results.csv')
+
+    def write(self, text, mode='a'):
+        with open(self.fp, mode) as f:
+            f.write(text)
+
+    def test_only_new_rows_read(self):
+        self.write(
+            self.HEADER + '2026-01-01,Boston Celtics,Miami Heat,110,100\n'
+        )
+        self.assertEqual(self.engine.read_results(self.fp), 1)
+        # a game not played yet, and a row still being written
+        self.write(
+            '2026-01-02,Miami Heat,Boston Celtics,,\n' +
+            '2026-01-03,Miami Heat,Boston Celtics,99,'
+        )
+        self.assertEqual(self.engine.read_results(self.fp), 0)
+        self.write('98\n')
+        self.assertEqual(self.engine.read_results(self.fp), 1)
+        self.assertEqual(self.engine.records['Miami Heat']['wins'], 1)
+
+    def test_replaced_file_read_again(self):
+        self.write(
+            self.HEADER + '2026-01-01,Boston Celtics,Miami Heat,110,100\n' +
+            '2026-01-02,Boston Celtics,Miami Heat,110,100\n'
+        )
+        self.engine.read_results(self.fp)
+        self.write(
+            self.HEADER + '2026-01-01,Miami Heat,Boston Celtics,110,100\n', 'w'
+        )
+        self.assertEqual(self.engine.read_results(self.fp), 1)
+        self.assertEqual(self.engine.records['Boston Celtics']['wins'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
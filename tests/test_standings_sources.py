@@ -0,0 +1,156 @@
+'''
+Standings sources tests
+The hedged standings fetch in standings_sources.py across stub sources that
+answer slowly, fail, or return bad standings, and the checks standings from
+any source must pass.
+'''
+
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+import fetch
+import metrics
+import scrapes
+import standings_engine
+import standings_sources
+from replay import use_fixtures
+
+def make_standings():
+    '''
+    Make valid standings, every team 0-0.
+
+    Returns: pd.DataFrame
+    '''
+    return standings_engine.StandingsEngine().get_standings()
+
+class StubSource(standings_sources.StandingsSource):
+    '''
+    A source returning given standings, or raising, once it's released.
+
+    Inputs:
+    name (str): source name
+    standings_df (pd.DataFrame): standings to return; None to fail
+    released (threading.Event): set when the source may answer; by default
+        it answers straight away
+    '''
+
+    def __init__(self, name, standings_df=None, released=None):
+        super().__init__(url=None)
+        self.name = name
+        self.standings_df = standings_df
+        self.released = released
+        self.n_asked = 0
+
+    def get_standings(self):
+        self.n_asked += 1
+        if self.released is not None:
+            self.released.wait()
+        if self.standings_df is None:
+            raise ValueError(f'{self.name} is down')
+
+        return self.standings_df
+
+class TestValidateStandings(unittest.TestCase):
+
+    def setUp(self):
+        self.standings_df = make_standings()
+
+    def test_valid(self):
+        self.assertIsNone(standings_sources.validate_standings(self.standings_df))
+
+    def test_fox_sports_fixture(self):
+        use_fixtures(self)
+        fetch.clear_memo()
+        source = standings_sources.FoxSportsSource(scrapes.STANDINGS_FS_URL)
+        self.assertIsNone(
+            standings_sources.validate_standings(source.get_standings())
+        )
+
+    def test_problems(self):
+        df = self.standings_df
+        west = df.index[df['Conference'] == 'Western']
+        cases = {
+            'missing column': df.drop(columns='GB'),
+            'missing team': df.iloc[1:],
+            'unknown team': df.assign(Team=df['Team'].replace(
+                'Utah Jazz', 'Seattle SuperSonics'
+            )),
+            'wrong conference': df.assign(Conference='Western'),
+            'ranks out of order': df.assign(
+                Rank=df['Rank'].where(~df.index.isin(west[:1]), 2)
+            ),
+        }
+        for case, bad_df in cases.items():
+            with self.subTest(case=case):
+                self.assertIsNotNone(standings_sources.validate_standings(bad_df))
+
+    def test_invalid_standings_raise(self):
+        source = StubSource('Short', self.standings_df.iloc[1:])
+        with self.assertRaisesRegex(ValueError, 'Invalid standings'):
+            standings_sources.get_validated_standings(source)
+
+class TestHedgedStandings(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.standings_df = make_standings()
+        self.released = threading.Event()
+        # let any slow source still waiting finish
+        self.addCleanup(self.released.set)
+
+    def get_standings(self, sources, hedge_seconds=0.05):
+        # failed sources print why
+        with contextlib.redirect_stdout(io.StringIO()):
+            return standings_sources.get_hedged_standings(sources, hedge_seconds)
+
+    def get_results(self):
+        return {
+            (metric['labels']['source'], metric['labels']['result']): metric['value']
+            for metric in metrics.get_metrics()
+            if metric['name'] == 'nba_sheets_standings_source_total'
+        }
+
+    def test_first_source_used(self):
+        first = StubSource('First', self.standings_df)
+        second = StubSource('Second', self.standings_df)
+        self.assertIs(self.get_standings([first, second]), self.standings_df)
+        self.assertEqual(second.n_asked, 0)
+        self.assertEqual(
+            self.get_results(), {('First', 'asked'): 1, ('First', 'used'): 1}
+        )
+
+    def test_slow_source_hedged(self):
+        slow = StubSource('Slow', self.standings_df, self.released)
+        fast = StubSource('Fast', self.standings_df.copy())
+        start = time.perf_counter()
+        standings_df = self.get_standings([slow, fast], hedge_seconds=0.05)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertIsNot(standings_df, self.standings_df)
+        self.assertEqual(self.get_results(), {
+            ('Slow', 'asked'): 1, ('Fast', 'hedged'): 1, ('Fast', 'used'): 1,
+        })
+
+    def test_failed_source_falls_back(self):
+        down = StubSource('Down')
+        invalid = StubSource('Invalid', self.standings_df.iloc[1:])
+        backup = StubSource('Backup', self.standings_df)
+        self.assertIs(
+            self.get_standings([down, invalid, backup], hedge_seconds=None),
+            self.standings_df
+        )
+        results = self.get_results()
+        self.assertEqual(results['Down', 'failed'], 1)
+        self.assertEqual(results['Invalid', 'failed'], 1)
+        self.assertEqual(results['Backup', 'used'], 1)
+
+    def test_every_source_fails(self):
+        sources = [StubSource('Down'), StubSource('Also Down')]
+        with self.assertRaisesRegex(ValueError, 'Down is down.*Also Down is down'):
+            self.get_standings(sources)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+'''
+Tiebreakers tests
+Tiebreaker values worked out by tiebreakers.py from the pages in
+tests/fixtures, and from tables with no rows or no table at all.
+'''
+
+import contextlib
+import io
+import json
+import os
+import unittest
+from concurrent.futures import Future
+
+import appearances
+import fetch
+import scrapes
+import tiebreakers
+from replay import FIXTURES_DIR, use_fixtures
+
+with open(os.path.join(FIXTURES_DIR, 'expected.json')) as f:
+    EXPECTED = {int(n): value for n, value in json.load(f)['tiebreakers'].items()}
+
+GAME_LOG_URL = (
+    'https://www.basketball-reference.com/players/c/curryst01/gamelog/2026'
+)
+
+def make_scrapes(tiebreaker, rows):
+    '''
+    Make finished scrapes of every table a tiebreaker reads.
+
+    Inputs:
+    tiebreaker (dict): one of tiebreakers.TIEBREAKERS
+    rows (list of dicts): rows of each table
+
+    Returns: dict of concurrent.futures.Future by (URL, table id)
+    '''
+    table_scrapes = {}
+    for table in tiebreakers.get_tables(tiebreaker):
+        table_scrapes[table] = Future()
+        table_scrapes[table].set_result(rows)
+
+    return table_scrapes
+
+class TestTiebreakers(unittest.TestCase):
+
+    def setUp(self):
+        use_fixtures(self)
+        fetch.clear_memo()
+        self.addCleanup(setattr, tiebreakers, 'APPEARANCES', tiebreakers.APPEARANCES)
+        tiebreakers.APPEARANCES = appearances.AppearanceIndex()
+        self.addCleanup(
+            setattr, tiebreakers, 'STREAM_TABLES', tiebreakers.STREAM_TABLES
+        )
+
+    def get_values(self):
+        # failed tiebreakers print why
+        with contextlib.redirect_stdout(io.StringIO()):
+            shared_data = scrapes.get_shared_data(scrapes.start_scrapes())
+
+        return {n: value for n, (_, value) in shared_data['tiebreakers'].items()}
+
+    def test_expected_values(self):
+        self.assertEqual(self.get_values(), EXPECTED)
+
+    def test_streamed_values(self):
+        tiebreakers.STREAM_TABLES = True
+        self.assertEqual(self.get_values(), EXPECTED)
+
+    def test_each_table_scraped_once(self):
+        tiebreaker = {
+            **tiebreakers.TIEBREAKERS[1], 'number': 3, 'expression': 'fg3'
+        }
+        planned = tiebreakers.plan_scrapes(tiebreakers.TIEBREAKERS + [tiebreaker])
+        self.assertEqual(len(planned), 3)
+
+    def test_empty_game_log_counts_zero(self):
+        for tiebreaker in tiebreakers.TIEBREAKERS:
+            with self.subTest(number=tiebreaker['number']):
+                value = tiebreakers.evaluate(
+                    tiebreaker, make_scrapes(tiebreaker, [])
+                )
+                self.assertEqual(value, 0)
+
+    def test_no_row_for_season_counts_zero(self):
+        tiebreaker = tiebreakers.TIEBREAKERS[1]
+        rows = [{'row_id': 'totals_stats.2025', 'fg3a': '500', 'fg3': '200'}]
+        value = tiebreakers.evaluate(tiebreaker, make_scrapes(tiebreaker, rows))
+        self.assertEqual(value, 0)
+
+    def test_missing_table(self):
+        for parse_fxn in [
+            tiebreakers.parse_bbref_table, tiebreakers.stream_bbref_table
+        ]:
+            with self.subTest(parse_fxn=parse_fxn.__name__):
+                with self.assertRaisesRegex(ValueError, 'No no_such_table table'):
+                    parse_fxn(GAME_LOG_URL, 'no_such_table', ['pts'])
+
+    def test_missing_table_fails_tiebreaker(self):
+        source = tiebreakers.SOURCES['game_log']
+        self.addCleanup(source.update, dict(source))
+        source['table_id'] = 'no_such_table'
+        values = self.get_values()
+        self.assertIsNone(values[1])
+        self.assertEqual(values[2], EXPECTED[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,293 @@
+'''
+Tiebreakers
+Tiebreaker values defined as data: which players, season, and table of their
+Basketball Reference pages to read, and an expression over that table's stats.
+
+The planner groups every stat the tiebreakers need by the page and table it
+comes from, so each page is downloaded and parsed once however many
+tiebreakers read it. Each table is then turned into one dataframe that every
+tiebreaker's expression is evaluated against. Games played together are
+counted with an appearances index kept for the life of the process, so a
+daemon only indexes games added to the game logs since its last poll.
+'''
+
+import ast
+
+import numpy as np
+import pandas as pd
+
+import appearances
+import fetch
+import parsers
+
+BBREF_PLAYERS_URL = 'https://www.basketball-reference.com/players/'
+
+# True to stream each table from its page, stopping the download once the
+# table ends, instead of parsing the whole page; streamed pages skip the page
+# and parse caches, so this suits one-off runs more than the daemon
+STREAM_TABLES = False
+
+# appearances of every game-log player, by (player id, season)
+APPEARANCES = appearances.AppearanceIndex()
+
+# source table -> URL of a player's page (for a player id like e/edwaran01),
+# id of the table, and id of the row to keep (None to keep every row)
+SOURCES = {
+    'totals': {
+        'url': BBREF_PLAYERS_URL + '{player}.html',
+        'table_id': 'totals_stats',
+        'row_id': 'totals_stats.{season}',
+    },
+    'game_log': {
+        'url': BBREF_PLAYERS_URL + '{player}/gamelog/{season}',
+        'table_id': 'player_game_log_reg',
+        'row_id': None,
+    },
+}
+
+# how the expression's values, over every kept row of every player, become the
+# tiebreaker's value: their sum, how many there are, or how many distinct
+# values every player has; games_together instead counts the games of team
+# that every player appeared in, from their game logs
+AGGREGATES = ['sum', 'count', 'count_common', 'games_together']
+
+# number (1 or 2, the rows of the Tiebreakers tab), description, players,
+# season, source table, filter on the table's rows (a pandas query, optional),
+# expression of the table's stats (data-stat names), and aggregate
+TIEBREAKERS = [
+    {
+        'number': 1,
+        'description': 'Steph Curry + Seth Curry GSW games played',
+        'players': ['c/curryst01', 'c/curryse01'],
+        'season': 2026,
+        'source': 'game_log',
+        'filter': None,
+        'expression': None,
+        'aggregate': 'games_together',
+        'team': 'GSW',
+    },
+    {
+        'number': 2,
+        'description': 'Anthony Edwards missed 3PA',
+        'players': ['e/edwaran01'],
+        'season': 2026,
+        'source': 'totals',
+        'filter': None,
+        'expression': 'fg3a - fg3',
+        'aggregate': 'sum',
+    },
+]
+
+def get_stat_ids(tiebreaker):
+    '''
+    List the stats a tiebreaker's filter and expression read.
+
+    Inputs:
+    tiebreaker (dict): one of TIEBREAKERS
+
+    Returns: set of str, data-stat names
+    '''
+    stat_ids = set()
+    if tiebreaker['aggregate'] == 'games_together':
+        stat_ids.update(appearances.STAT_IDS)
+    for expression in [tiebreaker['expression'], tiebreaker.get('filter')]:
+        if expression:
+            stat_ids.update(
+                node.id for node in ast.walk(ast.parse(expression, mode='eval'))
+                if isinstance(node, ast.Name)
+            )
+
+    return stat_ids
+
+def get_tables(tiebreaker):
+    '''
+    List the page and table a tiebreaker reads for each of its players.
+
+    Inputs:
+    tiebreaker (dict): one of TIEBREAKERS
+
+    Returns: list of tuples of URL and table id
+    '''
+    source = SOURCES[tiebreaker['source']]
+
+    return [
+        (
+            source['url'].format(player=player, season=tiebreaker['season']),
+            source['table_id']
+        )
+        for player in tiebreaker['players']
+    ]
+
+def plan_scrapes(tiebreakers=None):
+    '''
+    Group the stats every tiebreaker needs by the page and table they come
+    from, as one scrape per table.
+
+    Inputs:
+    tiebreakers (list of dicts): by default, TIEBREAKERS
+
+    Returns: dict mapping (URL, table id) to a task for fetch.run_concurrently
+    '''
+    if tiebreakers is None:
+        tiebreakers = TIEBREAKERS
+
+    stat_ids = {}
+    for tiebreaker in tiebreakers:
+        for table in get_tables(tiebreaker):
+            stat_ids.setdefault(table, set()).update(get_stat_ids(tiebreaker))
+
+    parse_fxn = stream_bbref_table if STREAM_TABLES else parse_bbref_table
+
+    return {
+        (url, table_id): (parse_fxn, url, table_id, sorted(table_stat_ids))
+        for (url, table_id), table_stat_ids in stat_ids.items()
+    }
+
+@fetch.cache_parsed
+def parse_bbref_table(url, table_id, stat_ids):
+    '''
+    Retrieve stats from every row of a table on a Basketball Reference page.
+
+    Inputs:
+    url (str): web address of the page
+    table_id (str): id of the table
+    stat_ids (iterable of str): data-stat attributes to pull
+
+    Returns: list of dicts of the row's id (row_id) and each stat, as text;
+        empty if the table has no rows, e.g. a game log before the first game
+    '''
+    stat_ids = set(stat_ids)
+    r = fetch.get_page(url)
+
+    data_table = parsers.find_table(r.content, table_id=table_id)
+    if data_table is None:
+        raise ValueError(f'No {table_id} table at {url}')
+    if data_table.find('tbody') is None:
+        return []
+
+    parsed_rows = []
+    for data_row in data_table.find('tbody').find_all('tr'):
+        parsed_row = {'row_id': data_row.get('id')}
+        for stat in data_row.find_all(
+            ['th', 'td'], {'data-stat': lambda x: x in stat_ids}
+        ):
+            parsed_row[stat['data-stat']] = stat.text.strip()
+        parsed_rows.append(parsed_row)
+
+    return parsed_rows
+
+def stream_bbref_table(url, table_id, stat_ids):
+    '''
+    Retrieve stats from every row of a table on a Basketball Reference page,
+    reading the page only until the table ends.
+
+    Inputs:
+    url (str): web address of the page
+    table_id (str): id of the table
+    stat_ids (iterable of str): data-stat attributes to pull
+
+    Returns: list of dicts of the row's id (row_id) and each stat, as text
+    '''
+    rows = fetch.stream_page(
+        url,
+        lambda chunks, encoding: parsers.stream_table_rows(
+            chunks, encoding, table_id, stat_ids
+        )
+    )
+    if rows is None:
+        raise ValueError(f'No {table_id} table at {url}')
+
+    return rows
+
+def make_frame(rows):
+    '''
+    Turn a table's parsed rows into a dataframe, making every stat whose
+    cells are all numbers or blank numeric (blanks as NaN).
+
+    Inputs:
+    rows (list of dicts): from parse_bbref_table(...)
+
+    Returns: pd.DataFrame
+    '''
+    df = pd.DataFrame(rows)
+    for col in df.columns.drop('row_id', errors='ignore'):
+        values = df[col].replace('', np.nan)
+        numbers = pd.to_numeric(values, errors='coerce')
+        if numbers.notna().sum() == values.notna().sum():
+            df[col] = numbers
+
+    return df
+
+def count_games_together(tiebreaker, scrapes):
+    '''
+    Count the games of a tiebreaker's team that all its players appeared in,
+    adding any new games from their scraped game logs to APPEARANCES.
+
+    Inputs:
+    tiebreaker (dict): one of TIEBREAKERS, with a team
+    scrapes (dict): futures by (URL, table id)
+
+    Returns: int
+    '''
+    players = []
+    for player, table in zip(tiebreaker['players'], get_tables(tiebreaker)):
+        rows = scrapes[table].result()
+        key = (player, tiebreaker['season'])
+        APPEARANCES.add_game_log(key, rows)
+        players.append(key)
+
+    return APPEARANCES.count_games(players, tiebreaker['team'])
+
+def evaluate(tiebreaker, scrapes, frames=None):
+    '''
+    Work out a tiebreaker's value from the scraped tables.
+
+    Inputs:
+    tiebreaker (dict): one of TIEBREAKERS
+    scrapes (dict): futures by (URL, table id), from plan_scrapes(...) run with
+        fetch.run_concurrently
+    frames (dict): dataframes already made from the scrapes, by (URL, table
+        id); filled in with any this tiebreaker makes
+
+    Returns: int or float
+    '''
+    if tiebreaker['aggregate'] == 'games_together':
+        return count_games_together(tiebreaker, scrapes)
+
+    if frames is None:
+        frames = {}
+    source = SOURCES[tiebreaker['source']]
+
+    player_values = []
+    for table in get_tables(tiebreaker):
+        if table not in frames:
+            frames[table] = make_frame(scrapes[table].result())
+        df = frames[table]
+        if df.empty:
+            # e.g. a game log before the first game; adds nothing
+            player_values.append(pd.Series(dtype=int))
+            continue
+
+        if source['row_id'] is not None:
+            df = df[df['row_id'] == source['row_id'].format(
+                season=tiebreaker['season']
+            )]
+        if tiebreaker.get('filter'):
+            df = df.query(tiebreaker['filter'])
+        values = df.eval(tiebreaker['expression'])
+        player_values.append(pd.Series(values, index=df.index))
+
+    aggregate = tiebreaker['aggregate']
+    if aggregate == 'sum':
+        value = sum(values.sum() for values in player_values)
+    elif aggregate == 'count':
+        value = sum(len(values) for values in player_values)
+    elif aggregate == 'count_common':
+        value = len(set.intersection(
+            *[set(values.dropna()) for values in player_values]
+        ))
+    else:
+        raise ValueError(f'Unknown aggregate: {aggregate}')
+
+    # numpy numbers aren't JSON serializable for the Sheets API
+    return value.item() if isinstance(value, np.generic) else value